@@ -0,0 +1,170 @@
+"""
+Analyzer Metrics for The Human Pulse
+In-process registry of per-call latency, tokens, retries and parse outcomes for the sentiment analyzer
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from model_router import estimate_cost
+
+# Per-call parse outcomes
+OUTCOMES = ['parsed', 'parse_failed', 'api_error']
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0-100) of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def metrics_file_for(results_file):
+    """Metrics dump path next to a results file (sentiment_results.json -> sentiment_results_metrics.json)"""
+    base, _ = os.path.splitext(results_file)
+    return f"{base}_metrics.json"
+
+
+class MetricsRegistry:
+    """Thread-safe record of every API call an analyzer makes"""
+
+    def __init__(self, max_calls=None):
+        """
+        Args:
+            max_calls: Keep only this many of the most recent calls (None = all);
+                       summaries then cover those calls only
+        """
+        self.calls = deque(maxlen=max_calls)
+        self.started_at = datetime.utcnow().isoformat()
+        self._lock = threading.Lock()
+
+    def cap(self, max_calls):
+        """Keep only the most recent max_calls records from now on (for long-running streams)"""
+        with self._lock:
+            self.calls = deque(self.calls, maxlen=max_calls)
+
+    def record_call(self, tier, model, latency, input_tokens, output_tokens,
+                    retries=0, outcome=None, queue_wait=0.0, escalated=False, discount=1.0):
+        """
+        Record one API call
+
+        Args:
+            tier: Routing tier ('fast', 'full', 'repair', '*-batch', ...)
+            model: Model name
+            latency: Seconds spent in the call (None for batch results)
+            input_tokens: Input tokens from the response usage
+            output_tokens: Output tokens from the response usage
+            retries: Retries taken before the call succeeded or gave up
+            outcome: One of OUTCOMES (may be set later on the returned record)
+            queue_wait: Seconds spent waiting for dispatcher capacity
+            escalated: Whether this call re-scored an ambiguous fast-tier result
+            discount: Price multiplier (batch calls are half price)
+
+        Returns:
+            The stored record (a dict; callers fill in 'outcome' once parsed)
+        """
+        record = {
+            'tier': tier,
+            'model': model,
+            'latency': latency,
+            'queue_wait': queue_wait,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'retries': retries,
+            'outcome': outcome,
+            'escalated': escalated,
+            'cost_usd': estimate_cost(model, input_tokens, output_tokens, discount)
+        }
+        with self._lock:
+            self.calls.append(record)
+        return record
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self.calls)
+
+    @staticmethod
+    def _summarize(calls):
+        latencies = [c['latency'] for c in calls if c['latency'] is not None]
+        outcomes = {outcome: 0 for outcome in OUTCOMES}
+        for call in calls:
+            if call['outcome'] in outcomes:
+                outcomes[call['outcome']] += 1
+        models = sorted({c['model'] for c in calls})
+
+        return {
+            'model': models[0] if len(models) == 1 else models,
+            'calls': len(calls),
+            'escalations': sum(1 for c in calls if c['escalated']),
+            'latency_s': {
+                'p50': _round(percentile(latencies, 50)),
+                'p95': _round(percentile(latencies, 95)),
+                'p99': _round(percentile(latencies, 99)),
+                'mean': _round(sum(latencies) / len(latencies)) if latencies else None,
+                'max': _round(max(latencies)) if latencies else None
+            },
+            'queue_wait_s': _round(sum(c['queue_wait'] for c in calls)),
+            'input_tokens': sum(c['input_tokens'] for c in calls),
+            'output_tokens': sum(c['output_tokens'] for c in calls),
+            'retries': sum(c['retries'] for c in calls),
+            'outcomes': outcomes,
+            'cost_usd': round(sum(c['cost_usd'] for c in calls), 4)
+        }
+
+    def tier_report(self):
+        """
+        Per-tier latency, token, retry, outcome and cost summaries
+
+        Returns:
+            Dictionary keyed by tier name
+        """
+        by_tier = {}
+        for call in self._snapshot():
+            by_tier.setdefault(call['tier'], []).append(call)
+        return {tier: self._summarize(calls) for tier, calls in by_tier.items()}
+
+    def summary(self):
+        """Run-level summary (all calls) plus the per-tier breakdown"""
+        calls = self._snapshot()
+        return {
+            **self._summarize(calls),
+            'by_tier': self.tier_report()
+        }
+
+    def dump(self, filename, extra=None):
+        """Write the summary and raw call records as JSON"""
+        payload = {
+            'started_at': self.started_at,
+            'dumped_at': datetime.utcnow().isoformat(),
+            **(extra or {}),
+            'summary': self.summary(),
+            'calls': self._snapshot()
+        }
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+
+    def print_summary(self):
+        """Print p50/p95/p99 latency and cost per tier"""
+        summary = self.summary()
+        if not summary['calls']:
+            return
+        latency = summary['latency_s']
+        if latency['p50'] is not None:
+            print(f"API latency: p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  p99 {latency['p99']:.2f}s")
+        print(f"Tokens: {summary['input_tokens']:,} in / {summary['output_tokens']:,} out  "
+              f"retries {summary['retries']}  cost ${summary['cost_usd']:.4f}")
+        for tier, stats in summary['by_tier'].items():
+            p95 = stats['latency_s']['p95']
+            p95_text = f"p95 {p95:.2f}s" if p95 is not None else "batch"
+            print(f"  {tier:12} {stats['calls']:4} calls  {p95_text:11}  ${stats['cost_usd']:.4f}  ({stats['model']})")
+
+
+def _round(value, digits=3):
+    return round(value, digits) if value is not None else None
@@ -0,0 +1,326 @@
+"""
+API Dispatcher for The Human Pulse
+Keeps Claude API calls under token/request-per-minute ceilings and a hard per-run cost cap
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from model_router import estimate_cost
+
+WINDOW_SECONDS = 60
+
+
+class BudgetExceeded(Exception):
+    """Raised when a call would push the run past its cost cap"""
+
+
+def _header_int(headers, name):
+    """Read an integer rate-limit header (None if missing or malformed)"""
+    value = headers.get(name) if headers else None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds_until(reset_value):
+    """Seconds until an RFC 3339 reset timestamp (0 if missing or in the past)"""
+    if not reset_value:
+        return 0.0
+    try:
+        reset = datetime.fromisoformat(reset_value.replace('Z', '+00:00'))
+    except ValueError:
+        return 0.0
+    return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+
+
+class APIDispatcher:
+    """
+    Rate- and budget-aware wrapper around client.messages.create
+
+    Tracks input/output tokens and requests over a sliding minute, honors the
+    anthropic-ratelimit-* and retry-after headers, adapts concurrency (halve on
+    429, grow slowly while there is headroom) and refuses calls that could push
+    spend past max_cost_usd.
+    """
+
+    def __init__(self, client, tpm_limit=80000, rpm_limit=50, max_cost_usd=None,
+                 max_concurrency=8, max_retries=4):
+        """
+        Args:
+            client: Anthropic client (point base_url at a mock server for offline runs)
+            tpm_limit: Input+output tokens allowed per minute
+            rpm_limit: Requests allowed per minute
+            max_cost_usd: Hard cap on estimated spend for this run (None = no cap)
+            max_concurrency: Upper bound on in-flight requests
+            max_retries: Retries per call after a 429 or overload response
+        """
+        # The dispatcher owns retries; SDK-level retries would hide 429s from it
+        self.client = client.with_options(max_retries=0) if hasattr(client, 'with_options') else client
+        self.tpm_limit = tpm_limit
+        self.rpm_limit = rpm_limit
+        self.max_cost_usd = max_cost_usd
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.truncated = False
+
+        self.spent_usd = 0.0
+        self.reserved_usd = 0.0
+        self.stats = {
+            'requests': 0,
+            'rate_limited': 0,
+            'input_tokens': 0,
+            'output_tokens': 0
+        }
+
+        self._requests = deque()   # request timestamps in the last minute
+        self._tokens = deque()     # (timestamp, tokens) in the last minute
+        self._pending_tokens = 0   # estimated tokens of in-flight calls
+        self._pause_until = 0.0    # set from retry-after / exhausted headers
+        self._successes = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()  # per-thread retries/queue wait of the last call
+
+    def create(self, **kwargs):
+        """
+        Send one Messages API request once there is capacity for it
+
+        Returns:
+            The parsed Message
+
+        Raises:
+            BudgetExceeded: If the cost cap would be exceeded
+        """
+        estimated_input = self._estimate_input_tokens(kwargs)
+        estimated_total = estimated_input + kwargs.get('max_tokens', 0)
+        worst_case_cost = estimate_cost(kwargs.get('model'), estimated_input, kwargs.get('max_tokens', 0))
+
+        self._local.retries = 0
+        self._local.queue_wait = 0.0
+        for attempt in range(self.max_retries + 1):
+            self._local.retries = attempt
+            waited_from = time.monotonic()
+            self._acquire(estimated_total, worst_case_cost)
+            self._local.queue_wait += time.monotonic() - waited_from
+            try:
+                raw = self.client.messages.with_raw_response.create(**kwargs)
+            except Exception as e:
+                self._release(estimated_total, worst_case_cost)
+                status = getattr(e, 'status_code', None)
+                if status in (429, 529) and attempt < self.max_retries:
+                    self._on_rate_limited(getattr(getattr(e, 'response', None), 'headers', None), attempt)
+                    continue
+                raise
+
+            try:
+                response = raw.parse()
+            finally:
+                self._release(estimated_total, worst_case_cost)
+            self._on_success(kwargs.get('model'), getattr(response, 'usage', None), raw.headers)
+            return response
+
+    def reserve_batch(self, requests, discount=1.0):
+        """
+        Reserve the worst-case cost of a Message Batches submission against the cost cap
+
+        Batches are not paced by the per-minute limits (the Batches API has its
+        own), but they count toward max_cost_usd. Requests are admitted in order
+        while their worst case still fits; the rest are dropped and the run is
+        marked truncated. Pass the reservation to settle_batch once the results are in.
+
+        Args:
+            requests: Message Batches request list ({'custom_id', 'params'})
+            discount: Price multiplier of batch calls
+
+        Returns:
+            (admitted requests, reserved cost) tuple
+
+        Raises:
+            BudgetExceeded: If not even the first request fits
+        """
+        admitted = []
+        reserved = 0.0
+        with self._cond:
+            for entry in requests:
+                params = entry['params']
+                cost = estimate_cost(params.get('model'), self._estimate_input_tokens(params),
+                                     params.get('max_tokens', 0), discount)
+                if self.max_cost_usd is not None and \
+                        self.spent_usd + self.reserved_usd + reserved + cost > self.max_cost_usd:
+                    self.truncated = True
+                    break
+                admitted.append(entry)
+                reserved += cost
+            self.reserved_usd += reserved
+        if not admitted and requests:
+            raise BudgetExceeded(f"Cost cap ${self.max_cost_usd:.2f} reached (spent ${self.spent_usd:.4f})")
+        return admitted, reserved
+
+    def settle_batch(self, reserved, usages, discount=1.0):
+        """
+        Replace a batch's reservation with its actual spend
+
+        Args:
+            reserved: Cost returned by reserve_batch
+            usages: (model, input_tokens, output_tokens) of every billed request
+            discount: Price multiplier of batch calls
+        """
+        with self._cond:
+            self.reserved_usd -= reserved
+            for model, input_tokens, output_tokens in usages:
+                self.stats['requests'] += 1
+                self.stats['input_tokens'] += input_tokens
+                self.stats['output_tokens'] += output_tokens
+                self.spent_usd += estimate_cost(model, input_tokens, output_tokens, discount)
+            self._cond.notify_all()
+
+    def last_call_info(self):
+        """
+        Retries and queue wait of the calling thread's most recent create()
+
+        Returns:
+            (retries, queue_wait_seconds) tuple
+        """
+        return getattr(self._local, 'retries', 0), getattr(self._local, 'queue_wait', 0.0)
+
+    def map(self, fn, items):
+        """
+        Run fn over items concurrently, stopping cleanly if the cost cap is hit
+
+        Returns:
+            List of results in input order (None for items skipped after truncation)
+        """
+        def run(item):
+            if self.truncated:
+                return None
+            try:
+                return fn(item)
+            except BudgetExceeded:
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            return list(pool.map(run, items))
+
+    def report(self):
+        """Summary of usage and limits for this run"""
+        return {
+            **self.stats,
+            'spent_usd': round(self.spent_usd, 4),
+            'max_cost_usd': self.max_cost_usd,
+            'truncated': self.truncated,
+            'final_concurrency': self.concurrency,
+            'tpm_limit': self.tpm_limit,
+            'rpm_limit': self.rpm_limit
+        }
+
+    def _estimate_input_tokens(self, kwargs):
+        # ~4 characters per token is close enough for pacing
+        payload = json.dumps([kwargs.get('messages'), kwargs.get('tools'), kwargs.get('system')], default=str)
+        return len(payload) // 4 + 1
+
+    def _acquire(self, tokens, cost):
+        with self._cond:
+            while True:
+                if self.max_cost_usd is not None and self.spent_usd + cost > self.max_cost_usd:
+                    self.truncated = True
+                    self._cond.notify_all()
+                    raise BudgetExceeded(
+                        f"Cost cap ${self.max_cost_usd:.2f} reached (spent ${self.spent_usd:.4f})"
+                    )
+
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._pause_until - now
+                # In-flight calls might still use their reservation; wait for them to settle
+                if wait <= 0 and self.max_cost_usd is not None and \
+                        self.spent_usd + self.reserved_usd + cost > self.max_cost_usd:
+                    wait = 0.05
+                if wait <= 0 and self.in_flight >= self.concurrency:
+                    wait = 0.05
+                if wait <= 0 and len(self._requests) >= self.rpm_limit:
+                    wait = self._requests[0] + WINDOW_SECONDS - now if self._requests else 0.05
+                if wait <= 0 and self._window_tokens() + self._pending_tokens + tokens > self.tpm_limit \
+                        and (self._tokens or self._pending_tokens):
+                    wait = self._tokens[0][0] + WINDOW_SECONDS - now if self._tokens else 0.05
+
+                if wait <= 0:
+                    self.in_flight += 1
+                    self._pending_tokens += tokens
+                    self.reserved_usd += cost
+                    self._requests.append(now)
+                    return
+                self._cond.wait(timeout=max(wait, 0.01))
+
+    def _release(self, tokens, cost):
+        with self._cond:
+            self.in_flight -= 1
+            self._pending_tokens -= tokens
+            self.reserved_usd -= cost
+            self._cond.notify_all()
+
+    def _expire(self, now):
+        while self._requests and now - self._requests[0] >= WINDOW_SECONDS:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= WINDOW_SECONDS:
+            self._tokens.popleft()
+
+    def _window_tokens(self):
+        return sum(tokens for _, tokens in self._tokens)
+
+    def _on_success(self, model, usage, headers):
+        input_tokens = getattr(usage, 'input_tokens', 0) or 0
+        output_tokens = getattr(usage, 'output_tokens', 0) or 0
+
+        with self._cond:
+            now = time.monotonic()
+            self._tokens.append((now, input_tokens + output_tokens))
+            self.stats['requests'] += 1
+            self.stats['input_tokens'] += input_tokens
+            self.stats['output_tokens'] += output_tokens
+            self.spent_usd += estimate_cost(model, input_tokens, output_tokens)
+
+            # Server-side view of the limits wins over our own bookkeeping
+            requests_left = _header_int(headers, 'anthropic-ratelimit-requests-remaining')
+            tokens_left = _header_int(headers, 'anthropic-ratelimit-tokens-remaining')
+            if requests_left == 0:
+                self._pause_until = max(self._pause_until, now + _seconds_until(
+                    headers.get('anthropic-ratelimit-requests-reset')))
+            if tokens_left == 0:
+                self._pause_until = max(self._pause_until, now + _seconds_until(
+                    headers.get('anthropic-ratelimit-tokens-reset')))
+
+            # Additive increase while the server reports headroom
+            low_headroom = (requests_left is not None and requests_left < self.concurrency) or \
+                           (tokens_left is not None and tokens_left < self.tpm_limit // 10)
+            self._successes += 1
+            if not low_headroom and self._successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._successes = 0
+            self._cond.notify_all()
+
+    def _on_rate_limited(self, headers, attempt):
+        retry_after = None
+        if headers:
+            try:
+                retry_after = float(headers.get('retry-after'))
+            except (TypeError, ValueError):
+                retry_after = None
+        if retry_after is None:
+            retry_after = min(30.0, 2 ** attempt)
+
+        with self._cond:
+            # Multiplicative decrease
+            self.stats['rate_limited'] += 1
+            self.concurrency = max(1, self.concurrency // 2)
+            self._successes = 0
+            self._pause_until = max(self._pause_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+        print(f"   ⚠️  Rate limited - backing off {retry_after:.1f}s (concurrency {self.concurrency})")
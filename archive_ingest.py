@@ -0,0 +1,310 @@
+"""
+Archive Ingest for The Human Pulse
+Streams compressed NDJSON Reddit submission dumps (.zst, .gz, .bz2, .xz) and keeps the posts
+from the target subreddits inside each backtest event's window, one JSONL file per event
+
+The Reddit API only reaches back a few weeks, so historical events (2020-2024)
+come from locally stored dumps such as RS_2021-01.zst or anxiety_submissions.zst.
+Each archive is decompressed incrementally on its own process; nothing is held
+in memory beyond the current line.
+
+Usage:
+    python archive_ingest.py ARCHIVE_OR_DIR [...]
+"""
+
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from multiprocessing import Pool
+
+from backtest_data_collector import EVENTS
+from reddit_collector import TARGET_SUBREDDITS
+
+OUTPUT_DIR = 'backtest_data/reddit'
+
+ARCHIVE_SUFFIXES = ('.zst', '.gz', '.bz2', '.xz', '.ndjson', '.jsonl', '.json')
+
+# Pushshift-style dumps are compressed with a 2 GB zstd window
+ZSTD_MAX_WINDOW = 2 ** 31
+
+# Read from the raw line before parsing it: most lines belong to other
+# subreddits, and skipping them unparsed is most of the speed. Nested objects
+# (crosspost_parent_list) carry their own subreddit and created_utc, so these
+# only prefilter; the parsed record decides.
+SUBREDDIT_PATTERN = re.compile(rb'"subreddit"\s*:\s*"([^"]+)"')
+CREATED_PATTERN = re.compile(rb'"created_utc"\s*:\s*"?(\d+)')
+MONTH_PATTERN = re.compile(r'(\d{4})-(\d{2})')
+
+
+def event_windows(events=EVENTS, days_before=7, days_after=0):
+    """
+    UTC time window of every event
+
+    Returns:
+        List of (event name, start epoch, end epoch) tuples; a window runs from
+        days_before days before the event to the end of the event day plus days_after
+    """
+    windows = []
+    for event in events:
+        day = datetime.strptime(event['date'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        start = day - timedelta(days=days_before)
+        end = day + timedelta(days=days_after + 1)
+        windows.append((event['name'], start.timestamp(), end.timestamp()))
+    return windows
+
+
+def open_archive(path):
+    """Binary line stream of an archive, decompressed as it is read"""
+    if path.endswith('.zst'):
+        import zstandard  # only needed for .zst dumps
+
+        raw = open(path, 'rb')
+        reader = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW).stream_reader(
+            raw, read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader, buffer_size=1 << 20)
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        import bz2
+        return bz2.open(path, 'rb')
+    if path.endswith('.xz'):
+        import lzma
+        return lzma.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def archive_overlaps(path, windows):
+    """
+    False only when the file name carries a month (RS_2020-03.zst) that no window touches
+
+    Monthly dumps outside every event are then skipped without being opened.
+    """
+    match = MONTH_PATTERN.search(os.path.basename(path))
+    if not match:
+        return True
+    year, month = int(match.group(1)), int(match.group(2))
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return any(w_start < end.timestamp() and w_end > start.timestamp() for _, w_start, w_end in windows)
+
+
+def archive_post(record):
+    """Dump record -> post dictionary in the RedditCollector._post_data shape (None for non-submissions)"""
+    if 'title' not in record:
+        return None
+    try:
+        created = float(record['created_utc'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    author = record.get('author')
+    return {
+        'id': record.get('id'),
+        'subreddit': record.get('subreddit'),
+        'title': record.get('title') or '',
+        'text': record.get('selftext') or '',
+        'score': record.get('score') or 0,
+        'num_comments': record.get('num_comments') or 0,
+        'created_utc': datetime.fromtimestamp(created).isoformat(),
+        'url': record.get('url'),
+        'author': author if author else '[deleted]',
+        'collected_at': datetime.utcnow().isoformat()
+    }
+
+
+def scan_archive(path, subreddits, windows, parts_dir, part_name=None):
+    """
+    Stream one archive and append its matching posts to per-event part files
+
+    Runs on a worker process. Every archive gets its own part_name (default:
+    the archive's file name), so workers never share a file.
+
+    Returns:
+        Dictionary of per-archive counts
+    """
+    by_name = {name.lower(): name for name in subreddits}
+    stats = {'archive': path, 'lines': 0, 'matched': 0, 'bad_lines': 0, 'events': {}}
+    if not archive_overlaps(path, windows):
+        stats['skipped'] = True
+        return stats
+
+    part_name = part_name or re.sub(r'[^\w.-]', '_', os.path.basename(path)) + '.jsonl'
+    outputs = {}
+    started = time.monotonic()
+    try:
+        with open_archive(path) as stream:
+            for line in stream:
+                stats['lines'] += 1
+                if not any(match.group(1).decode('utf-8', 'replace').lower() in by_name
+                           for match in SUBREDDIT_PATTERN.finditer(line)):
+                    continue
+                if not any(start <= int(match.group(1)) < end
+                           for match in CREATED_PATTERN.finditer(line) for _, start, end in windows):
+                    continue
+
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    stats['bad_lines'] += 1
+                    continue
+                if not isinstance(record, dict):
+                    continue
+                subreddit = by_name.get(str(record.get('subreddit') or '').lower())
+                post = archive_post(record) if subreddit else None
+                if post is None:
+                    continue
+                post['subreddit'] = subreddit
+                created = float(record['created_utc'])
+                events = [name for name, start, end in windows if start <= created < end]
+                if not events:
+                    continue
+                stats['matched'] += 1
+                encoded = json.dumps(post, ensure_ascii=False) + '\n'
+                for name in events:
+                    output = outputs.get(name)
+                    if output is None:
+                        os.makedirs(os.path.join(parts_dir, name), exist_ok=True)
+                        output = outputs[name] = open(os.path.join(parts_dir, name, part_name), 'w',
+                                                      encoding='utf-8')
+                    output.write(encoded)
+                    stats['events'][name] = stats['events'].get(name, 0) + 1
+    except Exception as e:
+        # A truncated or corrupt archive keeps whatever was read before the error
+        stats['error'] = str(e)
+    finally:
+        for output in outputs.values():
+            output.close()
+    stats['seconds'] = round(time.monotonic() - started, 1)
+    return stats
+
+
+def _scan_job(job):
+    return scan_archive(*job)
+
+
+def find_archives(paths):
+    """Expand directories into the archive files inside them (largest first, so workers finish together)"""
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                archives.extend(os.path.join(root, name) for name in files if name.endswith(ARCHIVE_SUFFIXES))
+        else:
+            archives.append(path)
+    return sorted(archives, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0, reverse=True)
+
+
+def merge_parts(parts_dir, output_dir, metadata):
+    """
+    Combine each event's part files into output_dir/<event>.jsonl
+
+    Posts that appear in several archives (e.g. a monthly and a per-subreddit
+    dump) are written once. Each file opens with a metadata record, in the
+    format RedditCollector.save_to_jsonl writes.
+
+    Returns:
+        Dictionary of event name -> posts written
+    """
+    written = {}
+    if not os.path.isdir(parts_dir):
+        return written
+    for name in sorted(os.listdir(parts_dir)):
+        seen = set()
+        with open(os.path.join(output_dir, f"{name}.jsonl"), 'w', encoding='utf-8') as out:
+            out.write(json.dumps({'type': 'metadata', 'metadata': {**metadata, 'event': name}}) + '\n')
+            for part in sorted(os.listdir(os.path.join(parts_dir, name))):
+                with open(os.path.join(parts_dir, name, part), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        post_id = json.loads(line).get('id')
+                        if post_id in seen:
+                            continue
+                        seen.add(post_id)
+                        out.write(line)
+        written[name] = len(seen)
+    return written
+
+
+def ingest_archives(paths, events=EVENTS, subreddits=TARGET_SUBREDDITS, output_dir=OUTPUT_DIR,
+                    processes=None, days_before=7, days_after=0):
+    """
+    Filter Reddit dumps down to the target subreddits and event windows
+
+    Args:
+        paths: Archive files or directories of archives
+        events: Backtest events ({'name', 'date'})
+        subreddits: Subreddits to keep
+        output_dir: Where <event>.jsonl files are written
+        processes: Worker processes (default: one per CPU)
+        days_before: Days before each event to keep
+        days_after: Days after each event day to keep
+
+    Returns:
+        Summary dictionary with per-archive stats and posts per event
+    """
+    archives = find_archives(paths)
+    windows = event_windows(events, days_before, days_after)
+    parts_dir = os.path.join(output_dir, '.parts')
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir)
+
+    processes = min(processes or os.cpu_count() or 1, max(len(archives), 1))
+    print(f"Scanning {len(archives)} archives on {processes} processes "
+          f"({len(windows)} events, {len(subreddits)} subreddits)...")
+    started = time.monotonic()
+    results = []
+    jobs = [(path, subreddits, windows, parts_dir, f"{i:05d}.jsonl") for i, path in enumerate(archives)]
+    with Pool(processes) as pool:
+        for stats in pool.imap_unordered(_scan_job, jobs):
+            results.append(stats)
+            if stats.get('skipped'):
+                print(f"  - {os.path.basename(stats['archive'])}: outside every event window")
+            elif stats.get('error'):
+                print(f"  ✗ {os.path.basename(stats['archive'])}: {stats['error']} "
+                      f"(kept {stats['matched']} posts read before the error)")
+            else:
+                print(f"  ✓ {os.path.basename(stats['archive'])}: {stats['matched']:,} of "
+                      f"{stats['lines']:,} lines kept in {stats['seconds']}s")
+
+    metadata = {
+        'source': 'reddit_archive',
+        'collected_at': datetime.utcnow().isoformat(),
+        'subreddits': subreddits,
+        'days_before': days_before,
+        'days_after': days_after
+    }
+    per_event = merge_parts(parts_dir, output_dir, metadata)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+
+    summary = {
+        'archives': results,
+        'events': per_event,
+        'lines': sum(stats['lines'] for stats in results),
+        'seconds': round(time.monotonic() - started, 1)
+    }
+    print(f"{summary['lines']:,} lines scanned in {summary['seconds']}s; "
+          f"{sum(per_event.values()):,} posts across {len(per_event)} events in {output_dir}/")
+    return summary
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python archive_ingest.py ARCHIVE_OR_DIR [...]")
+        sys.exit(2)
+
+    print("=" * 60)
+    print("THE HUMAN PULSE - Reddit Archive Ingest")
+    print("=" * 60)
+
+    summary = ingest_archives(sys.argv[1:])
+    for name, count in sorted(summary['events'].items()):
+        print(f"  {name:28} {count:>8,} posts")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
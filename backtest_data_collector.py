@@ -7,14 +7,24 @@ Usage:
     python backtest_data_collector.py
 """
 
-from pytrends.request import TrendReq
 import json
 import time
 import os
 from datetime import datetime, timedelta
 
-# Initialize PyTrends
-pytrends = TrendReq(hl='en-US', tz=360)
+# PyTrends is created on first use: its constructor does a cookie handshake
+# with Google and pulls in pandas, which importing this module should not do
+_pytrends = None
+
+
+def get_pytrends():
+    """Shared TrendReq instance, created on first use"""
+    global _pytrends
+    if _pytrends is None:
+        from pytrends.request import TrendReq
+        _pytrends = TrendReq(hl='en-US', tz=360)
+    return _pytrends
+
 
 # US States mapping
 US_STATES = {
@@ -44,6 +54,83 @@ BACKTEST_KEYWORDS = [
     'financial crisis'
 ]
 
+# Google Trends accepts at most 5 keywords per request
+MAX_KEYWORDS = 5
+
+# A state "panics" when its panic score reaches this
+PANIC_THRESHOLD = 70
+
+# Regions used for the regional-spread criterion
+REGIONS = {
+    'Northeast': ['New York', 'Pennsylvania', 'Massachusetts', 'New Jersey', 'Connecticut', 
+                 'Rhode Island', 'Vermont', 'New Hampshire', 'Maine'],
+    'Southeast': ['Florida', 'Georgia', 'North Carolina', 'South Carolina', 'Virginia', 
+                 'West Virginia', 'Kentucky', 'Tennessee', 'Alabama', 'Mississippi', 'Louisiana'],
+    'Midwest': ['Ohio', 'Illinois', 'Michigan', 'Indiana', 'Wisconsin', 'Minnesota', 
+               'Iowa', 'Missouri', 'North Dakota', 'South Dakota', 'Nebraska', 'Kansas'],
+    'Southwest': ['Texas', 'Arizona', 'New Mexico', 'Oklahoma', 'Arkansas'],
+    'West': ['California', 'Washington', 'Oregon', 'Nevada', 'Idaho', 'Montana', 
+            'Wyoming', 'Utah', 'Colorado', 'Alaska', 'Hawaii']
+}
+
+
+def keyword_batches(keywords):
+    """Split keywords into request-sized batches"""
+    return [keywords[i:i+MAX_KEYWORDS] for i in range(0, len(keywords), MAX_KEYWORDS)]
+
+
+def calculate_panic_scores(keyword_data):
+    """
+    Panic score per state: the average of its non-zero keyword values
+    
+    Args:
+        keyword_data: Dictionary of state name -> {keyword: value}
+    
+    Returns:
+        Dictionary of state name -> {'panic_score', 'keyword_data'}
+    """
+    state_panic_scores = {}
+    for state_name, data in keyword_data.items():
+        values = [v for v in data.values() if v > 0]
+        panic_score = sum(values) / len(values) if values else 0
+        state_panic_scores[state_name] = {
+            'panic_score': round(panic_score, 1),
+            'keyword_data': data
+        }
+    return state_panic_scores
+
+
+def summarize_panic(state_panic_scores, panic_threshold=PANIC_THRESHOLD):
+    """
+    Event summary (the 'summary' block EventAnalyzer.check_panic_signature reads)
+    
+    Args:
+        state_panic_scores: Output of calculate_panic_scores
+        panic_threshold: Panic score a state must reach to count
+    
+    Returns:
+        Dictionary with states above threshold, top 10 states and affected regions
+    """
+    sorted_states = sorted(
+        state_panic_scores.items(), 
+        key=lambda x: x[1]['panic_score'], 
+        reverse=True
+    )
+    above = {state for state, data in state_panic_scores.items() if data['panic_score'] >= panic_threshold}
+    affected_regions = [region for region, states in REGIONS.items() if any(state in above for state in states)]
+    
+    return {
+        'states_above_threshold': len(above),
+        'threshold_used': panic_threshold,
+        'top_10_states': [
+            {'state': state, 'panic_score': data['panic_score']} 
+            for state, data in sorted_states[:10]
+        ],
+        'regions_affected': affected_regions,
+        'total_regions_affected': len(affected_regions)
+    }
+
+
 def collect_historical_data_by_state(keywords, start_date, end_date, description):
     """
     Collect trend data for SPECIFIC HISTORICAL DATE RANGE across all states
@@ -69,11 +156,10 @@ def collect_historical_data_by_state(keywords, start_date, end_date, description
     timeframe = f'{start_date} {end_date}'
     
     # Split keywords into batches of 5 (Google Trends limit)
-    MAX_KEYWORDS = 5
-    keyword_batches = [keywords[i:i+MAX_KEYWORDS] for i in range(0, len(keywords), MAX_KEYWORDS)]
+    batches = keyword_batches(keywords)
     
-    if len(keyword_batches) > 1:
-        print(f"   Splitting into {len(keyword_batches)} batches (max {MAX_KEYWORDS} keywords each)")
+    if len(batches) > 1:
+        print(f"   Splitting into {len(batches)} batches (max {MAX_KEYWORDS} keywords each)")
     
     state_data = {}
     
@@ -84,12 +170,12 @@ def collect_historical_data_by_state(keywords, start_date, end_date, description
         
         try:
             # Collect data for each batch
-            for batch_num, keyword_batch in enumerate(keyword_batches, 1):
-                if len(keyword_batches) > 1:
-                    print(f"[batch {batch_num}/{len(keyword_batches)}]", end=' ')
+            for batch_num, keyword_batch in enumerate(batches, 1):
+                if len(batches) > 1:
+                    print(f"[batch {batch_num}/{len(batches)}]", end=' ')
                 
-                pytrends.build_payload(keyword_batch, timeframe=timeframe, geo=state_code)
-                data = pytrends.interest_over_time()
+                get_pytrends().build_payload(keyword_batch, timeframe=timeframe, geo=state_code)
+                data = get_pytrends().interest_over_time()
                 
                 if not data.empty:
                     # Add this batch's keywords to state results
@@ -133,8 +219,8 @@ def get_historical_related_queries(keyword, state_code, start_date, end_date):
     """
     try:
         timeframe = f'{start_date} {end_date}'
-        pytrends.build_payload([keyword], timeframe=timeframe, geo=state_code)
-        related = pytrends.related_queries()
+        get_pytrends().build_payload([keyword], timeframe=timeframe, geo=state_code)
+        related = get_pytrends().related_queries()
         
         if related and keyword in related:
             rising = related[keyword]['rising']
@@ -186,71 +272,26 @@ def collect_event_data(event_name, event_date, days_before=7):
     
     # Calculate panic scores for each state
     print("\nPhase 2: Calculating panic scores...")
-    state_panic_scores = {}
-    
-    for state_name, data in keyword_data.items():
-        # Simple panic score: average of all keywords
-        values = [v for v in data.values() if v > 0]
-        if values:
-            panic_score = sum(values) / len(values)
-        else:
-            panic_score = 0
-        
-        state_panic_scores[state_name] = {
-            'panic_score': round(panic_score, 1),
-            'keyword_data': data
-        }
-    
-    # Identify top panicking states
-    sorted_states = sorted(
-        state_panic_scores.items(), 
-        key=lambda x: x[1]['panic_score'], 
-        reverse=True
-    )
-    
-    top_10_states = sorted_states[:10]
+    state_panic_scores = calculate_panic_scores(keyword_data)
+    summary = summarize_panic(state_panic_scores)
     
     print("\n📈 Top 10 Panicking States:")
-    for rank, (state, data) in enumerate(top_10_states, 1):
-        print(f"   {rank}. {state}: {data['panic_score']:.1f}")
+    for rank, entry in enumerate(summary['top_10_states'], 1):
+        print(f"   {rank}. {entry['state']}: {entry['panic_score']:.1f}")
     
     # Count states above panic threshold
-    panic_threshold = 70
     states_above_threshold = [
         state for state, data in state_panic_scores.items() 
-        if data['panic_score'] >= panic_threshold
+        if data['panic_score'] >= PANIC_THRESHOLD
     ]
     
-    print(f"\n🚨 States Above {panic_threshold}% Panic Threshold: {len(states_above_threshold)}")
+    print(f"\n🚨 States Above {PANIC_THRESHOLD}% Panic Threshold: {len(states_above_threshold)}")
     if states_above_threshold:
         for state in states_above_threshold[:5]:  # Show first 5
             print(f"   • {state}")
     
-    # Determine regional spread
-    regions = {
-        'Northeast': ['New York', 'Pennsylvania', 'Massachusetts', 'New Jersey', 'Connecticut', 
-                     'Rhode Island', 'Vermont', 'New Hampshire', 'Maine'],
-        'Southeast': ['Florida', 'Georgia', 'North Carolina', 'South Carolina', 'Virginia', 
-                     'West Virginia', 'Kentucky', 'Tennessee', 'Alabama', 'Mississippi', 'Louisiana'],
-        'Midwest': ['Ohio', 'Illinois', 'Michigan', 'Indiana', 'Wisconsin', 'Minnesota', 
-                   'Iowa', 'Missouri', 'North Dakota', 'South Dakota', 'Nebraska', 'Kansas'],
-        'Southwest': ['Texas', 'Arizona', 'New Mexico', 'Oklahoma', 'Arkansas'],
-        'West': ['California', 'Washington', 'Oregon', 'Nevada', 'Idaho', 'Montana', 
-                'Wyoming', 'Utah', 'Colorado', 'Alaska', 'Hawaii']
-    }
-    
-    affected_regions = []
-    for region, states in regions.items():
-        region_panic = [
-            state_panic_scores[state]['panic_score'] 
-            for state in states 
-            if state in state_panic_scores and state_panic_scores[state]['panic_score'] >= panic_threshold
-        ]
-        if region_panic:
-            affected_regions.append(region)
-    
-    print(f"\n🌎 Regions Affected: {len(affected_regions)}/5")
-    for region in affected_regions:
+    print(f"\n🌎 Regions Affected: {summary['total_regions_affected']}/{len(REGIONS)}")
+    for region in summary['regions_affected']:
         print(f"   • {region}")
     
     # Create final results structure
@@ -264,16 +305,7 @@ def collect_event_data(event_name, event_date, days_before=7):
         },
         'collection_timestamp': datetime.now().isoformat(),
         'state_data': state_panic_scores,
-        'summary': {
-            'states_above_threshold': len(states_above_threshold),
-            'threshold_used': panic_threshold,
-            'top_10_states': [
-                {'state': state, 'panic_score': data['panic_score']} 
-                for state, data in top_10_states
-            ],
-            'regions_affected': affected_regions,
-            'total_regions_affected': len(affected_regions)
-        }
+        'summary': summary
     }
     
     # Save to file
@@ -324,6 +356,47 @@ EVENTS = [
 ]
 
 
+def collect_events(events, days_before=7, pause_seconds=10):
+    """
+    Collect data for a list of events, continuing past failures
+    
+    Args:
+        events: List of {'name': ..., 'date': 'YYYY-MM-DD'} dictionaries
+        days_before: How many days before each event to collect
+        pause_seconds: Pause between events to avoid rate limiting
+    
+    Returns:
+        Dictionary with completed and failed event names and whether Ctrl+C stopped the run
+    """
+    outcome = {'completed': [], 'failed': [], 'interrupted': False}
+    
+    for i, event in enumerate(events, 1):
+        print(f"\n[Event {i}/{len(events)}]")
+        try:
+            collect_event_data(event['name'], event['date'], days_before=days_before)
+            outcome['completed'].append(event['name'])
+            if i < len(events):
+                time.sleep(pause_seconds)
+        except KeyboardInterrupt:
+            print("\n\n⚠️ Collection interrupted by user")
+            print(f"Progress: {i-1}/{len(events)} events completed")
+            print("You can resume by running this script again")
+            outcome['interrupted'] = True
+            break
+        except Exception as e:
+            print(f"\n❌ Error collecting {event['name']}: {e}")
+            print("Continuing to next event...")
+            outcome['failed'].append(event['name'])
+            continue
+    
+    if not outcome['interrupted']:
+        print("\n" + "=" * 70)
+        print("✅ DATA COLLECTION COMPLETE")
+        print(f"Files saved in: backtest_data/")
+        print("=" * 70)
+    return outcome
+
+
 def main():
     """
     Main function to collect data for all events
@@ -356,25 +429,7 @@ def main():
         print("This will take 2-3 hours. You can stop anytime (Ctrl+C).")
         input("\nPress ENTER to start...")
         
-        for i, event in enumerate(EVENTS, 1):
-            print(f"\n[Event {i}/{len(EVENTS)}]")
-            try:
-                collect_event_data(event['name'], event['date'], days_before=7)
-                time.sleep(10)  # Pause between events to avoid rate limiting
-            except KeyboardInterrupt:
-                print("\n\n⚠️ Collection interrupted by user")
-                print(f"Progress: {i-1}/{len(EVENTS)} events completed")
-                print("You can resume by running this script again")
-                break
-            except Exception as e:
-                print(f"\n❌ Error collecting {event['name']}: {e}")
-                print("Continuing to next event...")
-                continue
-        
-        print("\n" + "=" * 70)
-        print("✅ DATA COLLECTION COMPLETE")
-        print(f"Files saved in: backtest_data/")
-        print("=" * 70)
+        collect_events(EVENTS, days_before=7)
         
     elif choice == '3':
         # Custom event
@@ -0,0 +1,155 @@
+"""
+Collector Benchmark for The Human Pulse
+Times RedditCollector against the mock Reddit server (no network or credentials needed)
+and reports posts/sec and API requests per post for listing and comment collection
+
+Usage:
+    python benchmark_collector.py [--latency 0.05] [--real-rate-limit] [--json bench.json]
+    python benchmark_collector.py --min-posts-per-sec 50   # exit 1 below the floor (CI)
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from mock_reddit_server import reddit_kwargs, run_mock_server
+from reddit_collector import RedditCollector
+
+# High enough that the client-side limiter never waits unless --real-rate-limit is given
+UNTHROTTLED_RPM = 1000000
+
+
+def _phase(server, name, items, fn):
+    """Run fn(), returning timing and the mock server's request counts for that call"""
+    server.state.reset_counts()
+    started = time.perf_counter()
+    produced = fn()
+    seconds = time.perf_counter() - started
+    counts = dict(server.state.counts)
+    return {
+        'name': name,
+        'seconds': round(seconds, 3),
+        items: produced,
+        f'{items}_per_sec': round(produced / seconds, 1) if seconds else None,
+        'api_requests': counts['requests'],
+        'auth_requests': counts['auth'],
+        'rate_limited': counts['rate_limited']
+    }
+
+
+def run_benchmark(subreddits=10, posts_per_sub=100, comment_posts=40, comment_limit=50, workers=8,
+                  latency=0.05, requests_per_minute=UNTHROTTLED_RPM, server_rpm_limit=None, seed=0):
+    """
+    Benchmark collect_all_subreddits, collect_comments and collect_comments_bulk
+
+    Args:
+        subreddits: Number of synthetic subreddits
+        posts_per_sub: Posts requested per subreddit
+        comment_posts: Posts whose comments are collected
+        comment_limit: Comments requested per post
+        workers: RedditCollector max_workers
+        latency: Seconds the mock server adds to each response
+        requests_per_minute: Client-side limiter budget
+        server_rpm_limit: Server-side limit that answers 429 (None = unlimited)
+        seed: Synthetic data seed
+
+    Returns:
+        Dictionary with one result per phase
+    """
+    names = [f"bench{i:02d}" for i in range(subreddits)]
+    server, base_url = run_mock_server(latency=latency, rpm_limit=server_rpm_limit,
+                                       posts_per_subreddit=max(posts_per_sub, 300), seed=seed)
+    try:
+        collector = RedditCollector(max_workers=workers, requests_per_minute=requests_per_minute,
+                                    **reddit_kwargs(base_url))
+        data = {}
+
+        def listings():
+            data.update(collector.collect_all_subreddits(posts_per_sub=posts_per_sub, subreddits=names))
+            return len(data['posts'])
+
+        results = {'collect_all_subreddits': _phase(server, 'collect_all_subreddits', 'posts', listings)}
+        post_ids = [post['id'] for post in sorted(data['posts'], key=lambda p: p['score'], reverse=True)]
+        post_ids = post_ids[:comment_posts]
+
+        def sequential():
+            return sum(len(collector.collect_comments(post_id, limit=comment_limit)) for post_id in post_ids)
+
+        def bulk():
+            return sum(len(comments or []) for _, comments, _ in
+                       collector.collect_comments_bulk(post_ids, limit=comment_limit))
+
+        results['collect_comments'] = _phase(server, 'collect_comments', 'comments', sequential)
+        results['collect_comments_bulk'] = _phase(server, 'collect_comments_bulk', 'comments', bulk)
+    finally:
+        server.shutdown()
+
+    listing = results['collect_all_subreddits']
+    listing['requests_per_post'] = round(listing['api_requests'] / listing['posts'], 3) if listing['posts'] else None
+    for name in ('collect_comments', 'collect_comments_bulk'):
+        result = results[name]
+        result['posts'] = len(post_ids)
+        result['posts_per_sec'] = round(len(post_ids) / result['seconds'], 1) if result['seconds'] else None
+        result['requests_per_post'] = round(result['api_requests'] / len(post_ids), 3) if post_ids else None
+
+    results['config'] = {
+        'subreddits': subreddits, 'posts_per_sub': posts_per_sub, 'comment_posts': comment_posts,
+        'comment_limit': comment_limit, 'workers': workers, 'latency': latency,
+        'requests_per_minute': requests_per_minute, 'server_rpm_limit': server_rpm_limit
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Reddit collector against a local mock API")
+    parser.add_argument('--subreddits', type=int, default=10, help="Synthetic subreddits (default: 10)")
+    parser.add_argument('--posts-per-sub', type=int, default=100, help="Posts per subreddit (default: 100)")
+    parser.add_argument('--comment-posts', type=int, default=40,
+                        help="Posts whose comments are collected (default: 40)")
+    parser.add_argument('--comment-limit', type=int, default=50, help="Comments per post (default: 50)")
+    parser.add_argument('--workers', type=int, default=8, help="Collector threads (default: 8)")
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="Seconds of simulated network latency per request (default: 0.05)")
+    parser.add_argument('--real-rate-limit', action='store_true',
+                        help="Pace requests at Reddit's real per-minute limit (slow, but realistic)")
+    parser.add_argument('--server-rpm-limit', type=int, default=None,
+                        help="Have the mock server answer 429 above this many requests per minute")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic data seed (default: 0)")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--min-posts-per-sec', type=float, default=None,
+                        help="Exit with status 1 if listing throughput falls below this")
+    args = parser.parse_args()
+
+    from reddit_collector import REDDIT_REQUESTS_PER_MINUTE
+    results = run_benchmark(
+        subreddits=args.subreddits, posts_per_sub=args.posts_per_sub, comment_posts=args.comment_posts,
+        comment_limit=args.comment_limit, workers=args.workers, latency=args.latency,
+        requests_per_minute=REDDIT_REQUESTS_PER_MINUTE if args.real_rate_limit else UNTHROTTLED_RPM,
+        server_rpm_limit=args.server_rpm_limit, seed=args.seed
+    )
+
+    print("=" * 60)
+    print("THE HUMAN PULSE - Collector Benchmark")
+    print("=" * 60)
+    for name in ('collect_all_subreddits', 'collect_comments', 'collect_comments_bulk'):
+        result = results[name]
+        print(f"{name:24} {result['posts']:>6} posts  {result['seconds']:>7.2f}s  "
+              f"{result['posts_per_sec']:>8} posts/s  {result['requests_per_post']:>6} req/post  "
+              f"{result['rate_limited']} x 429")
+    print("=" * 60)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved to {args.json}")
+
+    if args.min_posts_per_sec is not None:
+        throughput = results['collect_all_subreddits']['posts_per_sec'] or 0
+        if throughput < args.min_posts_per_sec:
+            print(f"✗ {throughput} posts/s is below the {args.min_posts_per_sec} posts/s floor")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
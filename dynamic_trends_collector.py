@@ -6,14 +6,24 @@ Usage:
     python dynamic_trends_collector.py
 """
 
-from pytrends.request import TrendReq
 import json
 import time
 import os
 from datetime import datetime
 
-# Initialize PyTrends
-pytrends = TrendReq(hl='en-US', tz=360)
+# PyTrends is created on first use: its constructor does a cookie handshake
+# with Google and pulls in pandas, which importing this module should not do
+_pytrends = None
+
+
+def get_pytrends():
+    """Shared TrendReq instance, created on first use"""
+    global _pytrends
+    if _pytrends is None:
+        from pytrends.request import TrendReq
+        _pytrends = TrendReq(hl='en-US', tz=360)
+    return _pytrends
+
 
 # US States mapping
 US_STATES = {
@@ -94,8 +104,8 @@ def get_rising_searches_for_state(state_name, state_code):
     
     try:
         # Use 'news' as the seed keyword - gets general rising searches
-        pytrends.build_payload(['news'], timeframe='now 1-d', geo=state_code)
-        related = pytrends.related_queries()
+        get_pytrends().build_payload(['news'], timeframe='now 1-d', geo=state_code)
+        related = get_pytrends().related_queries()
         
         if related and 'news' in related:
             rising = related['news']['rising']
@@ -135,8 +145,8 @@ def collect_emotional_data_by_state():
     
     for state_name, state_code in US_STATES.items():
         try:
-            pytrends.build_payload(EMOTIONAL_KEYWORDS, timeframe='now 1-d', geo=state_code)
-            data = pytrends.interest_over_time()
+            get_pytrends().build_payload(EMOTIONAL_KEYWORDS, timeframe='now 1-d', geo=state_code)
+            data = get_pytrends().interest_over_time()
             
             if not data.empty:
                 state_data[state_name] = {
@@ -157,7 +167,16 @@ def collect_emotional_data_by_state():
     return state_data
 
 
-def main():
+def main(wait_for_enter=True):
+    """
+    Collect emotional baselines and rising concerns for every state
+    
+    Args:
+        wait_for_enter: Pause for ENTER before starting (False for scheduled runs)
+    
+    Returns:
+        The results written to sentiment_results.json
+    """
     print("\n" + "="*70)
     print("🔥 DYNAMIC TRENDS COLLECTOR - PHASE 2")
     print("="*70)
@@ -166,7 +185,8 @@ def main():
     print("\nEstimated time: ~40-50 minutes")
     print("="*70)
     
-    input("\nPress ENTER to start...")
+    if wait_for_enter:
+        input("\nPress ENTER to start...")
     
     # Step 1: Collect emotional baseline (anxiety, hope, etc.)
     emotional_data = collect_emotional_data_by_state()
@@ -253,6 +273,7 @@ def main():
     
     print(f"\n💾 Data saved to: sentiment_results.json")
     print("="*70 + "\n")
+    return results
 
 
 if __name__ == "__main__":
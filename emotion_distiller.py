@@ -0,0 +1,296 @@
+"""
+Emotion Distiller for The Human Pulse
+Trains a small local emotion model from cached Claude API labels so bulk scoring can run on CPU
+
+Labels are only kept when asked for: collect them with
+    python pulse.py analyze-sentiment reddit_data.json --collect-labels
+
+Usage:
+    python emotion_distiller.py [labels_file] [model_file]
+"""
+
+import json
+import math
+import random
+import re
+import sys
+import time
+import zlib
+from datetime import datetime
+
+from sentiment_analyzer import EMOTIONS, LABELS_FILE
+
+MODEL_FILE = 'emotion_model.json'
+REPORT_FILE = 'emotion_model_report.json'
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def load_labels(filename=LABELS_FILE):
+    """
+    Load cached labels, keeping the latest label per distinct text
+
+    Returns:
+        List of (text, scores) tuples
+    """
+    latest = {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            scores = record.get('scores') or {}
+            if record.get('text') and all(e in scores for e in EMOTIONS):
+                latest[record['text']] = scores
+    return list(latest.items())
+
+
+def hashed_features(text, n_features=2 ** 18):
+    """
+    Hash word unigrams and bigrams of a text into a sparse, L2-normalized vector
+
+    Returns:
+        Dictionary of feature index -> weight
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    features = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode('utf-8')) % n_features
+        features[index] = features.get(index, 0.0) + 1.0
+
+    norm = math.sqrt(sum(v * v for v in features.values()))
+    if norm:
+        for index in features:
+            features[index] /= norm
+    return features
+
+
+class LocalEmotionModel:
+    """Linear regressor over hashed n-grams, one output per emotion (scores 0-100)"""
+
+    def __init__(self, n_features=2 ** 18):
+        self.n_features = n_features
+        self.bias = [0.0] * len(EMOTIONS)
+        self.label_means = [0.0] * len(EMOTIONS)
+        self.weights = {}   # feature index -> list of per-emotion weights (sparse)
+        self.trained_on = 0
+
+    def train(self, examples, epochs=15, learning_rate=0.5, l2=1e-5, seed=0):
+        """
+        Fit with SGD on squared error (targets scaled to 0-1)
+
+        Args:
+            examples: List of (text, scores) tuples
+            epochs: Passes over the data
+            learning_rate: Initial step size (decays per epoch)
+            l2: L2 penalty on feature weights
+            seed: Shuffle seed
+        """
+        rng = random.Random(seed)
+        data = [(hashed_features(text, self.n_features),
+                 [scores[e] / 100.0 for e in EMOTIONS]) for text, scores in examples]
+        if not data:
+            return self
+
+        # Start from the label means so unseen vocabulary predicts the average
+        self.label_means = [sum(y[k] for _, y in data) / len(data) for k in range(len(EMOTIONS))]
+        self.bias = list(self.label_means)
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+            for features, targets in data:
+                predictions = self._predict_scaled(features)
+                errors = [p - t for p, t in zip(predictions, targets)]
+                for k, error in enumerate(errors):
+                    self.bias[k] -= rate * error * 0.1
+                for index, value in features.items():
+                    w = self.weights.get(index)
+                    if w is None:
+                        w = self.weights[index] = [0.0] * len(EMOTIONS)
+                    for k, error in enumerate(errors):
+                        w[k] -= rate * (error * value + l2 * w[k])
+
+        self.trained_on = len(data)
+        return self
+
+    def _predict_scaled(self, features):
+        out = list(self.bias)
+        weights = self.weights
+        for index, value in features.items():
+            w = weights.get(index)
+            if w is not None:
+                for k in range(len(out)):
+                    out[k] += w[k] * value
+        return out
+
+    def predict(self, text):
+        """
+        Score one text
+
+        Returns:
+            Dictionary of emotion -> score (0-100)
+        """
+        scaled = self._predict_scaled(hashed_features(text, self.n_features))
+        return {emotion: int(round(min(100.0, max(0.0, v * 100))))
+                for emotion, v in zip(EMOTIONS, scaled)}
+
+    def analyze_text(self, text, context="general"):
+        """Same result shape as SentimentAnalyzer.analyze_text (no struggle/themes)"""
+        result = self.predict(text)
+        result['primary_struggle'] = ''
+        result['themes'] = []
+        result['model_tier'] = 'local'
+        return result
+
+    def analyze_batch(self, texts, context="general", max_items=None):
+        """Score many texts locally"""
+        if max_items:
+            texts = texts[:max_items]
+        return [self.analyze_text(text, context) for text in texts]
+
+    def save(self, filename=MODEL_FILE):
+        """Save the model as JSON (only non-zero features are stored)"""
+        model = {
+            'n_features': self.n_features,
+            'emotions': EMOTIONS,
+            'bias': self.bias,
+            'label_means': self.label_means,
+            'trained_on': self.trained_on,
+            'weights': {str(i): [round(x, 6) for x in w] for i, w in self.weights.items()
+                        if any(abs(x) > 1e-6 for x in w)}
+        }
+        with open(filename, 'w') as f:
+            json.dump(model, f)
+
+    @classmethod
+    def load(cls, filename=MODEL_FILE):
+        """Load a model saved with save()"""
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        if data.get('emotions') != EMOTIONS:
+            raise ValueError(f"Model in {filename} was trained on different emotions: {data.get('emotions')}")
+        model = cls(n_features=data['n_features'])
+        model.bias = data['bias']
+        model.label_means = data.get('label_means', data['bias'])
+        model.trained_on = data.get('trained_on', 0)
+        model.weights = {int(i): w for i, w in data['weights'].items()}
+        return model
+
+
+def split_examples(examples, holdout=0.2, seed=0):
+    """Shuffle and split examples into (train, held-out)"""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    cut = int(len(shuffled) * (1 - holdout))
+    return shuffled[:cut], shuffled[cut:]
+
+
+def evaluate(model, examples, baseline_scores=None):
+    """
+    Compare model predictions against held-out API labels
+
+    Args:
+        model: Trained LocalEmotionModel
+        examples: Held-out (text, scores) tuples
+        baseline_scores: Per-emotion constant predictions to compare against
+                         (defaults to the training label means)
+
+    Returns:
+        Dictionary with per-emotion MAE, RMSE, Pearson r and baseline MAE
+    """
+    if baseline_scores is None:
+        baseline_scores = {e: m * 100 for e, m in zip(EMOTIONS, model.label_means)}
+
+    predictions = [model.predict(text) for text, _ in examples]
+    report = {'examples': len(examples), 'emotions': {}}
+
+    for emotion in EMOTIONS:
+        actual = [scores[emotion] for _, scores in examples]
+        predicted = [p[emotion] for p in predictions]
+        n = len(actual)
+        if not n:
+            continue
+
+        errors = [p - a for p, a in zip(predicted, actual)]
+        mae = sum(abs(e) for e in errors) / n
+        rmse = math.sqrt(sum(e * e for e in errors) / n)
+        baseline_mae = sum(abs(baseline_scores[emotion] - a) for a in actual) / n
+
+        mean_a, mean_p = sum(actual) / n, sum(predicted) / n
+        cov = sum((a - mean_a) * (p - mean_p) for a, p in zip(actual, predicted))
+        var_a = sum((a - mean_a) ** 2 for a in actual)
+        var_p = sum((p - mean_p) ** 2 for p in predicted)
+        pearson = cov / math.sqrt(var_a * var_p) if var_a and var_p else 0.0
+
+        report['emotions'][emotion] = {
+            'mae': round(mae, 2),
+            'rmse': round(rmse, 2),
+            'pearson_r': round(pearson, 3),
+            'baseline_mae': round(baseline_mae, 2),
+            'mean_actual': round(mean_a, 1),
+            'mean_predicted': round(mean_p, 1)
+        }
+
+    if report['emotions']:
+        report['overall_mae'] = round(sum(e['mae'] for e in report['emotions'].values()) / len(report['emotions']), 2)
+        report['overall_baseline_mae'] = round(
+            sum(e['baseline_mae'] for e in report['emotions'].values()) / len(report['emotions']), 2)
+    return report
+
+
+def benchmark(model, texts, repeat=3):
+    """Measure local scoring throughput in texts per second"""
+    if not texts:
+        return 0.0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.analyze_batch(texts)
+    elapsed = time.perf_counter() - start
+    return len(texts) * repeat / elapsed if elapsed else float('inf')
+
+
+def main():
+    labels_file = sys.argv[1] if len(sys.argv) > 1 else LABELS_FILE
+    model_file = sys.argv[2] if len(sys.argv) > 2 else MODEL_FILE
+
+    print("=" * 60)
+    print("THE HUMAN PULSE - Emotion Distiller")
+    print("=" * 60)
+
+    examples = load_labels(labels_file)
+    print(f"\nLoaded {len(examples)} labeled texts from {labels_file}")
+    if len(examples) < 20:
+        print("❌ Need at least 20 labeled texts - run the analyzer with a label cache first")
+        return
+
+    train, held_out = split_examples(examples)
+    print(f"Training on {len(train)}, evaluating on {len(held_out)}...")
+    model = LocalEmotionModel().train(train)
+    report = evaluate(model, held_out)
+    report['throughput_texts_per_sec'] = round(benchmark(model, [t for t, _ in held_out]), 1)
+    report['trained_at'] = datetime.now().isoformat()
+    report['labels_file'] = labels_file
+
+    model.save(model_file)
+    with open(REPORT_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\nHELD-OUT EVALUATION (score points):")
+    print(f"  {'Emotion':12} {'MAE':>6} {'Base':>6} {'r':>6}")
+    for emotion, stats in report['emotions'].items():
+        print(f"  {emotion.capitalize():12} {stats['mae']:6.1f} {stats['baseline_mae']:6.1f} {stats['pearson_r']:6.2f}")
+    print(f"\nOverall MAE: {report['overall_mae']} (mean-baseline {report['overall_baseline_mae']})")
+    print(f"Throughput: {report['throughput_texts_per_sec']:,.0f} texts/sec")
+    print(f"\n✓ Model saved to {model_file}, report to {REPORT_FILE}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
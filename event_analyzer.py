@@ -242,6 +242,7 @@ class EventAnalyzer:
             print("   ❌ Re-evaluate methodology")
         
         print("\n")
+        return report
 
 
 def main():
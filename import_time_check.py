@@ -0,0 +1,91 @@
+"""
+Import Time Check for The Human Pulse
+Measures how long each module takes to import (python -X importtime) and fails if any
+module goes over its budget or opens a network connection while importing
+
+Usage:
+    python import_time_check.py [module ...]
+"""
+
+import subprocess
+import sys
+
+# Cumulative import time allowed per module, in milliseconds
+IMPORT_BUDGET_MS = {
+    'event_analyzer': 50,
+    'trends_processor': 50,
+    'model_router': 50,
+    'trends_collector': 75,
+    'dynamic_trends_collector': 75,
+    'backtest_data_collector': 75,
+    'trends_stitcher': 75,
+    'walk_forward_backtest': 75,
+    'reddit_collector': 75,
+    'api_dispatcher': 100,
+    'analyzer_metrics': 100,
+    'sentiment_analyzer': 150,
+    'emotion_distiller': 150
+}
+
+# Run in the child before the import: any socket connection fails loudly
+NO_NETWORK = """
+import socket
+def _blocked(*args, **kwargs):
+    raise RuntimeError('network access during import')
+socket.socket.connect = _blocked
+socket.create_connection = _blocked
+"""
+
+
+def measure_import(module):
+    """
+    Import a module in a fresh interpreter with the network blocked
+
+    Returns:
+        (milliseconds, error) tuple - error is None if the import succeeded
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"{NO_NETWORK}\nimport {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f"exit code {result.returncode}"
+
+    # Lines look like: "import time:   self [us] | cumulative | name"
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000, None
+    return None, "no importtime line for module"
+
+
+def main():
+    modules = sys.argv[1:] or list(IMPORT_BUDGET_MS)
+
+    print("=" * 60)
+    print("THE HUMAN PULSE - Import Time Check")
+    print("=" * 60)
+
+    failures = 0
+    for module in modules:
+        budget = IMPORT_BUDGET_MS.get(module, 100)
+        elapsed, error = measure_import(module)
+        if error:
+            failures += 1
+            print(f"  ❌ {module:26} {error}")
+        elif elapsed > budget:
+            failures += 1
+            print(f"  ❌ {module:26} {elapsed:7.1f} ms (budget {budget} ms)")
+        else:
+            print(f"  ✓ {module:26} {elapsed:7.1f} ms (budget {budget} ms)")
+
+    print("=" * 60)
+    if failures:
+        print(f"{failures} module(s) over budget or not importable offline")
+        sys.exit(1)
+    print("All modules within their import budget")
+
+
+if __name__ == '__main__':
+    main()
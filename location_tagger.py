@@ -0,0 +1,312 @@
+"""
+Location Tagger for The Human Pulse
+Tags Reddit posts with the US states they mention (state names, "City, ST" abbreviations,
+major cities and state subreddits) and rolls Reddit emotions up per state for the map
+
+Matching is one left-to-right pass over the text with an Aho-Corasick automaton
+built from the whole gazetteer, so tagging cost depends on the post length only,
+not on how many places are listed.
+
+Usage:
+    python location_tagger.py [results_file]
+"""
+
+import json
+import re
+import sys
+
+from trends_collector import US_STATES
+
+# Two-letter postal code -> state name
+STATE_CODES = {code.split('-')[1]: name for name, code in US_STATES.items()}
+
+# Cities whose name points to one state (names shared by several large cities,
+# or that are common words or first names - Phoenix, Savannah, Eugene, Raleigh,
+# Boulder, Wells Fargo - are left out; their city subreddits still count)
+CITIES = {
+    'Alabama': ['huntsville', 'tuscaloosa'],
+    'Alaska': ['anchorage', 'fairbanks'],
+    'Arizona': ['tucson', 'scottsdale', 'tempe'],
+    'Arkansas': ['little rock'],
+    'California': ['los angeles', 'san francisco', 'san diego', 'san jose', 'sacramento', 'oakland',
+                   'fresno', 'long beach', 'bay area', 'silicon valley', 'socal', 'norcal', 'berkeley'],
+    'Colorado': ['denver', 'colorado springs'],
+    'Connecticut': ['hartford', 'new haven', 'stamford'],
+    'District of Columbia': ['washington dc', 'washington d.c.', 'washington, dc', 'washington, d.c.'],
+    'Florida': ['miami', 'orlando', 'tampa', 'jacksonville', 'fort lauderdale', 'tallahassee', 'st. pete'],
+    'Georgia': ['atlanta'],
+    'Hawaii': ['honolulu', 'oahu', 'maui'],
+    'Idaho': ['boise'],
+    'Illinois': ['chicago', 'naperville'],
+    'Indiana': ['indianapolis', 'fort wayne'],
+    'Iowa': ['des moines', 'cedar rapids'],
+    'Kentucky': ['louisville'],
+    'Louisiana': ['new orleans', 'baton rouge', 'shreveport'],
+    'Maryland': ['baltimore'],
+    'Massachusetts': ['boston'],
+    'Michigan': ['detroit', 'grand rapids', 'ann arbor'],
+    'Minnesota': ['minneapolis', 'twin cities'],
+    'Missouri': ['st. louis', 'st louis', 'saint louis', 'kansas city'],
+    'Montana': ['bozeman', 'missoula'],
+    'Nebraska': ['omaha'],
+    'Nevada': ['las vegas', 'vegas', 'reno'],
+    'New Jersey': ['newark', 'jersey city', 'hoboken'],
+    'New Mexico': ['albuquerque', 'santa fe'],
+    'New York': ['new york city', 'nyc', 'brooklyn', 'manhattan', 'the bronx', 'long island', 'albany'],
+    'North Carolina': ['durham', 'asheville'],
+    'North Dakota': ['bismarck'],
+    'Ohio': ['cleveland', 'cincinnati', 'columbus ohio', 'toledo'],
+    'Oklahoma': ['oklahoma city', 'okc', 'tulsa'],
+    'Oregon': ['portland'],
+    'Pennsylvania': ['philadelphia', 'philly', 'pittsburgh'],
+    'South Dakota': ['sioux falls', 'rapid city'],
+    'Tennessee': ['nashville', 'memphis', 'knoxville', 'chattanooga'],
+    'Texas': ['houston', 'dallas', 'san antonio', 'fort worth', 'el paso', 'dfw'],
+    'Utah': ['salt lake city', 'slc', 'provo'],
+    'Virginia': ['virginia beach', 'northern virginia'],
+    'Washington': ['seattle', 'spokane', 'tacoma'],
+    'Wisconsin': ['milwaukee'],
+    'Wyoming': ['laramie']
+}
+
+# City subreddits (every state's own subreddit, e.g. r/newjersey, is added automatically)
+CITY_SUBREDDITS = {
+    'nyc': 'New York', 'chicago': 'Illinois', 'bayarea': 'California', 'losangeles': 'California',
+    'sanfrancisco': 'California', 'sandiego': 'California', 'sacramento': 'California',
+    'seattle': 'Washington', 'austin': 'Texas', 'houston': 'Texas', 'dallas': 'Texas',
+    'sanantonio': 'Texas', 'boston': 'Massachusetts', 'atlanta': 'Georgia', 'denver': 'Colorado',
+    'philadelphia': 'Pennsylvania', 'pittsburgh': 'Pennsylvania', 'portland': 'Oregon',
+    'washingtondc': 'District of Columbia', 'nova': 'Virginia', 'vegas': 'Nevada',
+    'phoenix': 'Arizona', 'miami': 'Florida', 'orlando': 'Florida', 'tampa': 'Florida',
+    'detroit': 'Michigan', 'minneapolis': 'Minnesota', 'stlouis': 'Missouri', 'kansascity': 'Missouri',
+    'nashville': 'Tennessee', 'memphis': 'Tennessee', 'baltimore': 'Maryland', 'cleveland': 'Ohio',
+    'cincinnati': 'Ohio', 'columbus': 'Ohio', 'saltlakecity': 'Utah', 'raleigh': 'North Carolina',
+    'charlotte': 'North Carolina', 'milwaukee': 'Wisconsin', 'neworleans': 'Louisiana',
+    'indianapolis': 'Indiana', 'albuquerque': 'New Mexico', 'okc': 'Oklahoma', 'boise': 'Idaho',
+    'honolulu': 'Hawaii', 'jerseycity': 'New Jersey', 'longisland': 'New York'
+}
+
+STATE_SUBREDDITS = {**{name.lower().replace(' ', ''): name for name in US_STATES}, **CITY_SUBREDDITS}
+
+# Reddit emotions under the names the trends map uses
+MAP_EMOTIONS = {'hope': 'optimism', 'depression': 'sadness'}
+
+NAME, ABBREVIATION = 0, 1
+
+# Postal codes that are also everyday words or acronyms ("Fine, OK.", "Hi, IN my opinion",
+# "the VA"): these only count right after a gazetteer place ("Portland, ME")
+WORD_CODES = {'AL', 'CO', 'DE', 'HI', 'ID', 'IN', 'LA', 'MA', 'MD', 'ME', 'MO', 'MS', 'NE',
+              'OH', 'OK', 'OR', 'PA', 'VA'}
+
+# Word right before a ", ST" code
+PRECEDING_WORD = re.compile(r"([A-Za-z][\w.'-]*)$")
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every pattern in one pass over the text"""
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: Iterable of (pattern, value) pairs; patterns are matched as given
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]   # state -> [(pattern length, value)], including those reached by fail links
+
+        for pattern, value in patterns:
+            state = 0
+            for char in pattern:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                state = nxt
+            self.outputs[state].append((len(pattern), value))
+
+        # Breadth-first: a state's fail link points at the longest proper suffix that is also a prefix
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.outputs[nxt] = self.outputs[nxt] + self.outputs[self.fail[nxt]]
+
+    def finditer(self, text):
+        """
+        Yields:
+            (start, end, value) for every pattern occurrence, in order of end position
+        """
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in outputs[state]:
+                yield i + 1 - length, i + 1, value
+
+
+class LocationTagger:
+    """Assigns state labels to posts from a gazetteer compiled into one automaton"""
+
+    def __init__(self):
+        patterns = []
+        for name in US_STATES:
+            patterns.append((name.lower(), (name, NAME)))
+        for name, cities in CITIES.items():
+            patterns.extend((city, (name, NAME)) for city in cities)
+        for subreddit, name in STATE_SUBREDDITS.items():
+            patterns.append((f"r/{subreddit}", (name, NAME)))
+        # Bare two-letter codes are too often words ("IN", "OR", "ME"), so codes only
+        # count in the "Austin, TX" form, in capitals and after a place name
+        for code, name in STATE_CODES.items():
+            patterns.append((f", {code.lower()}", (name, ABBREVIATION)))
+        self.automaton = AhoCorasick(patterns)
+
+    def tag_text(self, text):
+        """
+        States mentioned in a text
+
+        Overlapping matches keep the longest ("West Virginia" is not also
+        Virginia, "Kansas City" is not Kansas), every match must sit on word
+        boundaries ("Arkansas" does not contain Kansas), and a state code right
+        after a city overrides the city's default state ("Portland, ME"). A
+        ", ST" code only counts after a gazetteer place or a capitalized word
+        ("Springfield, IL"), and codes in WORD_CODES only after a gazetteer place.
+
+        Returns:
+            List of state names, most mentioned first
+        """
+        if not text:
+            return []
+        lowered = text.lower()
+        matches = []
+        for start, end, (name, kind) in self.automaton.finditer(lowered):
+            if lowered[start].isalnum() and start > 0 and lowered[start - 1].isalnum():
+                continue
+            if lowered[end - 1].isalnum() and end < len(lowered) and lowered[end].isalnum():
+                continue
+            if kind == ABBREVIATION and not text[end - 2:end].isupper():
+                continue
+            matches.append((start, end, name, kind))
+
+        # Leftmost-longest: drop any match inside a longer one
+        matches.sort(key=lambda m: (m[0], -m[1]))
+        kept = []
+        for start, end, name, kind in matches:
+            if kept and end <= kept[-1][1]:
+                continue
+            if kind == ABBREVIATION and kept and kept[-1][1] == start:
+                # "Portland, ME": an explicit code decides which state the city is in
+                kept[-1] = (kept[-1][0], end, name)
+                continue
+            if kind == ABBREVIATION:
+                word = PRECEDING_WORD.search(text, 0, start)
+                if text[end - 2:end] in WORD_CODES or not word or not word.group(1)[0].isupper():
+                    continue
+            kept.append((start, end, name))
+
+        counts = {}
+        for _, _, name in kept:
+            counts[name] = counts.get(name, 0) + 1
+        return sorted(counts, key=lambda name: counts[name], reverse=True)
+
+    def tag_post(self, post):
+        """
+        States of a post: its own subreddit if it is a state or city subreddit, then
+        the states its title and text mention
+
+        Returns:
+            List of state names (empty when the post names no place)
+        """
+        states = []
+        home = STATE_SUBREDDITS.get(str(post.get('subreddit') or '').lower())
+        if home:
+            states.append(home)
+        for name in self.tag_text(f"{post.get('title') or ''}\n{post.get('text') or ''}"):
+            if name not in states:
+                states.append(name)
+        return states
+
+
+_tagger = None
+
+
+def tag_post(post):
+    """tag_post with a shared tagger, built on first use"""
+    global _tagger
+    if _tagger is None:
+        _tagger = LocationTagger()
+    return _tagger.tag_post(post)
+
+
+def state_aggregates(analyses, theme_index=None, min_posts=1):
+    """
+    Per-state Reddit emotion aggregates in the trends collector's state_data shape
+
+    Each analysis counts toward every state in its 'states' list.
+
+    Args:
+        analyses: Analyses tagged with 'states' (see sentiment_analyzer.post_tags)
+        theme_index: ThemeIndex for canonical concerns
+        min_posts: Leave out states with fewer tagged posts than this
+
+    Returns:
+        Dictionary of state name -> {emotion scores (plus 'hope' and 'depression'
+        under the map's names), 'sample_size', 'top_concerns'}
+    """
+    from sentiment_analyzer import RunningAggregate
+    from theme_index import ThemeIndex
+
+    theme_index = theme_index if theme_index is not None else ThemeIndex()
+    aggregates = {}
+    for analysis in analyses:
+        for name in analysis.get('states') or []:
+            aggregate = aggregates.get(name)
+            if aggregate is None:
+                aggregate = aggregates[name] = RunningAggregate(theme_index)
+            aggregate.add(analysis)
+
+    state_data = {}
+    for name in sorted(aggregates):
+        snapshot = aggregates[name].snapshot()
+        if snapshot['sample_size'] < min_posts:
+            continue
+        emotions = snapshot['emotions']
+        state_data[name] = {
+            **emotions,
+            **{map_name: emotions[emotion] for map_name, emotion in MAP_EMOTIONS.items() if emotion in emotions},
+            'sample_size': snapshot['sample_size'],
+            'top_concerns': [{'concern': theme['theme'], 'value': theme['count'], 'related_searches': []}
+                             for theme in snapshot['top_themes'][:5]]
+        }
+    return state_data
+
+
+def main():
+    results_file = sys.argv[1] if len(sys.argv) > 1 else 'sentiment_results.json'
+    with open(results_file, 'r', encoding='utf-8') as f:
+        analyses = json.load(f).get('individual_analyses', [])
+
+    print("=" * 60)
+    print(f"THE HUMAN PULSE - Reddit Posts by State ({len(analyses)} analyses)")
+    print("=" * 60)
+
+    state_data = state_aggregates(analyses)
+    tagged = sum(1 for analysis in analyses if analysis.get('states'))
+    print(f"{tagged} posts mention a state ({len(state_data)} states)\n")
+    for name, data in sorted(state_data.items(), key=lambda item: item[1]['sample_size'], reverse=True):
+        print(f"  {name:22} n={data['sample_size']:<4} anxiety {data.get('anxiety', 0):5.1f}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
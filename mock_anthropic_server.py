@@ -0,0 +1,269 @@
+"""
+Mock Anthropic API server for The Human Pulse
+Serves /v1/messages and /v1/messages/batches locally with usage, rate-limit headers
+and 429s so the analyzer, dispatcher and bulk mode can be exercised offline
+
+Usage:
+    python mock_anthropic_server.py [port]
+
+Then point a client at it:
+    Anthropic(api_key='test', base_url='http://127.0.0.1:8765')
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class MockState:
+    """Shared configuration and counters for the mock server"""
+
+    def __init__(self, latency=0.05, rpm_limit=None, tpm_limit=None, malformed_rate=0.0,
+                 batch_duration=1.0, seed=None):
+        self.latency = latency
+        self.batch_duration = batch_duration
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = deque()
+        self.tokens = deque()
+        self.counts = {'messages': 0, 'rate_limited': 0, 'batches': 0, 'batch_requests': 0}
+        self.batches = {}
+
+    def admit(self, tokens):
+        """
+        Apply the configured per-minute limits
+
+        Returns:
+            (allowed, headers) tuple
+        """
+        with self.lock:
+            now = time.monotonic()
+            while self.requests and now - self.requests[0] >= 60:
+                self.requests.popleft()
+            while self.tokens and now - self.tokens[0][0] >= 60:
+                self.tokens.popleft()
+
+            used_tokens = sum(t for _, t in self.tokens)
+            requests_left = None if self.rpm_limit is None else self.rpm_limit - len(self.requests)
+            tokens_left = None if self.tpm_limit is None else self.tpm_limit - used_tokens
+
+            headers = {}
+            oldest = self.requests[0] if self.requests else now
+            reset = (datetime.now(timezone.utc) + timedelta(seconds=60 - (now - oldest))).isoformat()
+            if requests_left is not None and requests_left <= 0:
+                self.counts['rate_limited'] += 1
+                headers['retry-after'] = str(int(60 - (now - self.requests[0])) + 1)
+                return False, headers
+            if tokens_left is not None and tokens_left < tokens:
+                self.counts['rate_limited'] += 1
+                headers['retry-after'] = str(int(60 - (now - self.tokens[0][0])) + 1) if self.tokens else '1'
+                return False, headers
+
+            self.requests.append(now)
+            self.tokens.append((now, tokens))
+            self.counts['messages'] += 1
+            if requests_left is not None:
+                headers['anthropic-ratelimit-requests-limit'] = str(self.rpm_limit)
+                headers['anthropic-ratelimit-requests-remaining'] = str(requests_left - 1)
+                headers['anthropic-ratelimit-requests-reset'] = reset
+            if tokens_left is not None:
+                headers['anthropic-ratelimit-tokens-limit'] = str(self.tpm_limit)
+                headers['anthropic-ratelimit-tokens-remaining'] = str(tokens_left - tokens)
+                headers['anthropic-ratelimit-tokens-reset'] = reset
+            return True, headers
+
+    def fake_value(self, schema):
+        """Generate a random value that satisfies a (simple) JSON schema"""
+        kind = schema.get('type')
+        if kind == 'object':
+            return {name: self.fake_value(sub) for name, sub in schema.get('properties', {}).items()}
+        if kind == 'array':
+            items = schema.get('items', {})
+            if items.get('type') == 'string':
+                return ['cost of living', 'job security']
+            return [self.fake_value(items) for _ in range(self.rng.randint(2, 5))]
+        if kind == 'integer':
+            return self.rng.randint(schema.get('minimum', 0), schema.get('maximum', 100))
+        if kind == 'number':
+            return self.rng.uniform(schema.get('minimum', 0), schema.get('maximum', 100))
+        return 'making rent'
+
+    def fake_message(self, body):
+        """Build a Messages API response for a request body"""
+        input_tokens = len(json.dumps(body)) // 4
+        tools = body.get('tools') or []
+
+        if tools and self.rng.random() >= self.malformed_rate:
+            tool = tools[0]
+            tool_input = self.fake_value(tool.get('input_schema', {}))
+            content = [{'type': 'tool_use', 'id': f'toolu_{uuid.uuid4().hex[:24]}',
+                        'name': tool['name'], 'input': tool_input}]
+            stop_reason = 'tool_use'
+        else:
+            content = [{'type': 'text', 'text': 'Here is my analysis: the text seems anxious.'}]
+            stop_reason = 'end_turn'
+
+        output_tokens = len(json.dumps(content)) // 4
+        return {
+            'id': f'msg_{uuid.uuid4().hex[:24]}',
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'mock'),
+            'content': content,
+            'stop_reason': stop_reason,
+            'stop_sequence': None,
+            'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+        }, input_tokens + output_tokens
+
+
+    def create_batch(self, requests):
+        """Store a batch; its results are generated immediately but only released after batch_duration"""
+        with self.lock:
+            batch_id = f'msgbatch_{uuid.uuid4().hex[:24]}'
+            results = []
+            for request in requests:
+                message, _ = self.fake_message(request['params'])
+                results.append({'custom_id': request['custom_id'],
+                                'result': {'type': 'succeeded', 'message': message}})
+            self.batches[batch_id] = {
+                'created': time.monotonic(),
+                'created_at': datetime.now(timezone.utc),
+                'results': results
+            }
+            self.counts['batches'] += 1
+            self.counts['batch_requests'] += len(requests)
+            return batch_id
+
+    def batch_object(self, batch_id, base_url):
+        """Message Batch object as the API returns it"""
+        batch = self.batches[batch_id]
+        ended = time.monotonic() - batch['created'] >= self.batch_duration
+        total = len(batch['results'])
+        return {
+            'id': batch_id,
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {
+                'processing': 0 if ended else total,
+                'succeeded': total if ended else 0,
+                'errored': 0,
+                'canceled': 0,
+                'expired': 0
+            },
+            'created_at': batch['created_at'].isoformat(),
+            'expires_at': (batch['created_at'] + timedelta(hours=24)).isoformat(),
+            'ended_at': datetime.now(timezone.utc).isoformat() if ended else None,
+            'cancel_initiated_at': None,
+            'archived_at': None,
+            'results_url': f'{base_url}/v1/messages/batches/{batch_id}/results' if ended else None
+        }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host', '127.0.0.1')}"
+
+    def do_GET(self):
+        parts = self.path.split('?')[0].strip('/').split('/')
+        # v1/messages/batches/{id}[/results]
+        if parts[:3] == ['v1', 'messages', 'batches'] and len(parts) >= 4 and parts[3] in self.state.batches:
+            batch_id = parts[3]
+            if len(parts) == 4:
+                self._send_json(200, self.state.batch_object(batch_id, self._base_url()))
+                return
+            if parts[4] == 'results':
+                lines = '\n'.join(json.dumps(r) for r in self.state.batches[batch_id]['results'])
+                data = (lines + '\n').encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/binary')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+        self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}})
+
+    def do_POST(self):
+        path = self.path.split('?')[0]
+        if path == '/v1/messages/batches':
+            batch_id = self.state.create_batch(self._read_body().get('requests', []))
+            self._send_json(200, self.state.batch_object(batch_id, self._base_url()))
+            return
+        parts = path.strip('/').split('/')
+        if len(parts) == 5 and parts[4] == 'cancel' and parts[3] in self.state.batches:
+            self.state.batches[parts[3]]['created'] = float('-inf')
+            self._send_json(200, self.state.batch_object(parts[3], self._base_url()))
+            return
+        if path == '/v1/messages':
+            body = self._read_body()
+            message, tokens = self.state.fake_message(body)
+            allowed, headers = self.state.admit(tokens)
+            if not allowed:
+                self._send_json(429, {'type': 'error', 'error': {
+                    'type': 'rate_limit_error', 'message': 'Mock rate limit exceeded'}}, headers)
+                return
+            time.sleep(self.state.latency)
+            self._send_json(200, message, headers)
+            return
+
+        self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': path}})
+
+
+def run_mock_server(port=0, **state_kwargs):
+    """
+    Start the mock server on a background thread
+
+    Args:
+        port: Port to bind (0 = pick a free one)
+        **state_kwargs: latency, rpm_limit, tpm_limit, malformed_rate, batch_duration, seed
+
+    Returns:
+        (server, base_url) tuple; call server.shutdown() when done
+    """
+    handler = type('BoundMockHandler', (MockHandler,), {'state': MockState(**state_kwargs)})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server, base_url = run_mock_server(port, rpm_limit=50, tpm_limit=80000)
+    print(f"Mock Anthropic API listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+"""
+Mock Reddit API server for The Human Pulse
+Serves the endpoints praw uses (OAuth token, subreddit listings, comment trees, /api/info)
+from synthetic or recorded posts, with latency, rate-limit headers and 429s, so the
+collector can be tested and timed offline
+
+Usage:
+    python mock_reddit_server.py [port] [reddit_data.json]
+
+Then point the collector at it:
+    RedditCollector(**reddit_kwargs('http://127.0.0.1:8766'))
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TIME_FILTERS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400, 'month': 31 * 86400, 'year': 366 * 86400}
+
+PHRASES = [
+    "Got laid off today and I don't know how I'll make rent",
+    "Anyone else feel like prices keep going up every week?",
+    "Finally got the offer after six months of applying",
+    "My anxiety is through the roof about the economy",
+    "Moving to Austin, TX for a new job - nervous but excited",
+    "Portfolio down 30% this year, should I keep buying?",
+    "Can't sleep, worried about my student loans",
+    "Small win: paid off my credit card",
+    "Rent in Seattle went up 20% at renewal",
+    "Hiring freeze at my company in Chicago, everyone is on edge"
+]
+
+
+def reddit_kwargs(base_url):
+    """praw.Reddit / RedditCollector arguments that send every request to the mock server"""
+    return {
+        'client_id': 'mock',
+        'client_secret': 'mock',
+        'user_agent': 'HumanPulse/mock',
+        'oauth_url': base_url,
+        'reddit_url': base_url,
+        'check_for_updates': False,
+        'check_for_async': False
+    }
+
+
+class MockRedditState:
+    """Shared posts, configuration and counters for the mock server"""
+
+    def __init__(self, latency=0.02, rpm_limit=None, posts_per_subreddit=300, max_comments=80,
+                 max_depth=4, forbidden=(), data_file=None, seed=0):
+        """
+        Args:
+            latency: Seconds added to every API response
+            rpm_limit: Requests allowed per rolling minute before 429s (None = unlimited)
+            posts_per_subreddit: Synthetic posts per subreddit
+            max_comments: Most comments in a synthetic thread
+            max_depth: Deepest reply level in a synthetic thread
+            forbidden: Subreddits that answer 403 (private)
+            data_file: Recorded collector output (.json or .jsonl) to serve instead of synthetic posts
+            seed: Seed for the synthetic data
+        """
+        self.latency = latency
+        self.rpm_limit = rpm_limit
+        self.posts_per_subreddit = posts_per_subreddit
+        self.max_comments = max_comments
+        self.max_depth = max_depth
+        self.forbidden = {name.lower() for name in forbidden}
+        self.seed = seed
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.requests = deque()
+        self.subreddits = {}    # lowercase name -> posts, newest first
+        self.by_fullname = {}   # t3_id -> post
+        self.recorded_comments = {}
+        self.reset_counts()
+        if data_file:
+            self._load_recorded(data_file)
+
+    def reset_counts(self):
+        with self.lock:
+            self.counts = {'requests': 0, 'auth': 0, 'listing': 0, 'comments': 0, 'info': 0,
+                           'rate_limited': 0, 'items': 0}
+
+    def count(self, name, items=0):
+        with self.lock:
+            self.counts[name] += 1
+            self.counts['items'] += items
+
+    def admit(self):
+        """
+        Apply the per-minute limit
+
+        Returns:
+            (allowed, headers) tuple with Reddit's x-ratelimit-* headers
+        """
+        with self.lock:
+            now = time.monotonic()
+            while self.requests and now - self.requests[0] >= 60:
+                self.requests.popleft()
+            self.counts['requests'] += 1
+            if self.rpm_limit is None:
+                return True, {}
+            reset = int(60 - (now - self.requests[0])) + 1 if self.requests else 60
+            if len(self.requests) >= self.rpm_limit:
+                self.counts['rate_limited'] += 1
+                return False, {'x-ratelimit-used': str(len(self.requests)), 'x-ratelimit-remaining': '0',
+                               'x-ratelimit-reset': str(reset), 'retry-after': str(reset)}
+            self.requests.append(now)
+            return True, {'x-ratelimit-used': str(len(self.requests)),
+                          'x-ratelimit-remaining': str(self.rpm_limit - len(self.requests)),
+                          'x-ratelimit-reset': str(reset)}
+
+    def _load_recorded(self, data_file):
+        with open(data_file, 'r', encoding='utf-8') as f:
+            if data_file.endswith('.jsonl'):
+                records = [json.loads(line) for line in f if line.strip()]
+                posts = [r for r in records if r.get('type') != 'metadata']
+            else:
+                posts = json.load(f).get('posts', [])
+
+        for post in posts:
+            created = datetime.fromisoformat(post['created_utc']).timestamp()
+            data = self._post(post['id'], post['subreddit'], post.get('title', ''), post.get('text', ''),
+                              post.get('score', 0), post.get('num_comments', 0), created, post.get('author'))
+            self.subreddits.setdefault(post['subreddit'].lower(), []).append(data)
+            self.by_fullname[data['name']] = data
+            if post.get('comments') is not None:
+                self.recorded_comments[post['id']] = post['comments']
+        for listing in self.subreddits.values():
+            listing.sort(key=lambda p: p['created_utc'], reverse=True)
+
+    def _post(self, post_id, subreddit, title, text, score, num_comments, created, author):
+        return {
+            'id': post_id, 'name': f't3_{post_id}', 'subreddit': subreddit, 'title': title,
+            'selftext': text, 'score': score, 'ups': score, 'num_comments': num_comments,
+            'created_utc': created, 'url': f'https://www.reddit.com/r/{subreddit}/comments/{post_id}/',
+            'permalink': f'/r/{subreddit}/comments/{post_id}/', 'author': author or '[deleted]',
+            'is_self': True, 'over_18': False
+        }
+
+    def posts(self, subreddit):
+        """Posts of a subreddit, newest first (synthetic ones are generated on first use)"""
+        key = subreddit.lower()
+        with self.lock:
+            listing = self.subreddits.get(key)
+            if listing is None:
+                listing = []
+                rng = random.Random(f"{self.seed}:{key}")
+                for i in range(self.posts_per_subreddit):
+                    post_id = f"{key[:3]}{i:05d}"
+                    data = self._post(post_id, subreddit, rng.choice(PHRASES), rng.choice(PHRASES) * rng.randint(1, 4),
+                                      int(rng.paretovariate(1.2)) - 1, rng.randint(0, self.max_comments),
+                                      self.started - i * 300 - rng.random() * 300, f"user{rng.randint(1, 5000)}")
+                    listing.append(data)
+                    self.by_fullname[data['name']] = data
+                self.subreddits[key] = listing
+            return listing
+
+    def comment_tree(self, post):
+        """Top-level comments of a post, each with nested 'replies' lists"""
+        recorded = self.recorded_comments.get(post['id'])
+        if recorded is not None:
+            return [self._comment(c['id'], post, c.get('text', ''), c.get('score', 0), post['created_utc'], 0, [])
+                    for c in recorded]
+
+        rng = random.Random(f"{self.seed}:{post['id']}")
+        remaining = post['num_comments']
+        top_level = []
+        pending = deque()
+        while remaining > 0:
+            # Favour new threads near the top of the tree, like real discussions
+            if pending and rng.random() < 0.6:
+                parent, depth = pending.popleft()
+                if depth >= self.max_depth:
+                    continue
+                siblings = parent['replies']
+            else:
+                parent, depth, siblings = None, -1, top_level
+            comment = self._comment(f"{post['id']}c{remaining}", post, rng.choice(PHRASES),
+                                    int(rng.paretovariate(1.5)) - 1,
+                                    post['created_utc'] + rng.random() * 3600, depth + 1, [],
+                                    parent['name'] if parent else post['name'])
+            siblings.append(comment)
+            pending.append((comment, depth + 1))
+            remaining -= 1
+        return top_level
+
+    def _comment(self, comment_id, post, body, score, created, depth, replies, parent_id=None):
+        return {
+            'id': comment_id, 'name': f't1_{comment_id}', 'body': body, 'score': score,
+            'created_utc': created, 'author': 'commenter', 'depth': depth, 'replies': replies,
+            'parent_id': parent_id or post['name'], 'link_id': post['name'], 'subreddit': post['subreddit']
+        }
+
+
+def thing_listing(things, after=None):
+    return {'kind': 'Listing', 'data': {'after': after, 'before': None, 'dist': len(things),
+                                        'modhash': None, 'children': things}}
+
+
+def listing(children, kind='t3', after=None):
+    return thing_listing([{'kind': kind, 'data': child} for child in children], after)
+
+
+def page(items, params, limit_default=25):
+    """Slice a newest-first list by Reddit's after/before/limit parameters"""
+    limit = min(int(params.get('limit', limit_default)), 100)
+    names = [item['name'] for item in items]
+    if params.get('after') in names:
+        items = items[names.index(params['after']) + 1:]
+    elif params.get('before') in names:
+        items = items[:names.index(params['before'])]
+        items = items[-limit:]
+    chunk = items[:limit]
+    after = chunk[-1]['name'] if len(items) > limit else None
+    return chunk, after
+
+
+def comment_listing(comments, sort, limit, depth_limit):
+    """Serialize a comment tree, trimmed to limit comments and depth_limit levels (rest becomes 'more')"""
+    key = (lambda c: -c['created_utc']) if sort == 'new' else (lambda c: -c['score'])
+    budget = [limit]
+
+    def render(nodes, depth):
+        children = []
+        hidden = []
+        for node in sorted(nodes, key=key):
+            if budget[0] <= 0 or depth >= depth_limit:
+                hidden.append(node['id'])
+                continue
+            budget[0] -= 1
+            data = dict(node)
+            replies = render(node['replies'], depth + 1)
+            data['replies'] = thing_listing(replies) if replies else ''
+            children.append(data)
+        rendered = [{'kind': 't1', 'data': child} for child in children]
+        if hidden:
+            rendered.append({'kind': 'more', 'data': {
+                'count': len(hidden), 'children': hidden, 'id': hidden[0], 'name': f't1_{hidden[0]}',
+                'parent_id': nodes[0]['parent_id'], 'depth': depth
+            }})
+        return rendered
+
+    return thing_listing(render(comments, 0))
+
+
+class MockRedditHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlparse(self.path).path == '/api/v1/access_token':
+            self.state.count('auth')
+            self._send_json(200, {'access_token': 'mock-token', 'token_type': 'bearer',
+                                  'expires_in': 86400, 'scope': '*'})
+            return
+        self._send_json(404, {'message': 'Not Found', 'error': 404})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+
+        allowed, headers = self.state.admit()
+        if not allowed:
+            self._send_json(429, {'message': 'Too Many Requests', 'error': 429}, headers)
+            return
+        time.sleep(self.state.latency)
+
+        # /r/{sub[+sub...]}/{top|new|hot}
+        if len(parts) == 3 and parts[0] == 'r' and parts[2] in ('top', 'new', 'hot'):
+            names = parts[1].split('+')
+            if any(name.lower() in self.state.forbidden for name in names):
+                self._send_json(403, {'reason': 'private', 'message': 'Forbidden', 'error': 403}, headers)
+                return
+            items = [post for name in names for post in self.state.posts(name)]
+            if parts[2] == 'top':
+                window = TIME_FILTERS.get(params.get('t', 'day'))
+                if window:
+                    items = [p for p in items if p['created_utc'] >= time.time() - window]
+                items.sort(key=lambda p: p['score'], reverse=True)
+            else:
+                items.sort(key=lambda p: p['created_utc'], reverse=True)
+            chunk, after = page(items, params)
+            self.state.count('listing', len(chunk))
+            self._send_json(200, listing(chunk, after=after), headers)
+            return
+
+        # /comments/{id}
+        if len(parts) >= 2 and parts[0] == 'comments':
+            post = self.state.by_fullname.get(f't3_{parts[1]}')
+            if post is None:
+                self._send_json(404, {'message': 'Not Found', 'error': 404}, headers)
+                return
+            limit = int(params.get('limit') or 200)
+            depth = int(params.get('depth') or 10)
+            comments = comment_listing(self.state.comment_tree(post), params.get('sort', 'confidence'),
+                                       limit, depth)
+            self.state.count('comments', len(comments['data']['children']))
+            self._send_json(200, [listing([post]), comments], headers)
+            return
+
+        # /api/info?id=t3_a,t3_b
+        if url.path.rstrip('/') == '/api/info':
+            found = [self.state.by_fullname[name] for name in params.get('id', '').split(',')
+                     if name in self.state.by_fullname]
+            self.state.count('info', len(found))
+            self._send_json(200, listing(found), headers)
+            return
+
+        self._send_json(404, {'message': 'Not Found', 'error': 404}, headers)
+
+
+def run_mock_server(port=0, **state_kwargs):
+    """
+    Start the mock Reddit server on a background thread
+
+    Args:
+        port: Port to bind (0 = pick a free one)
+        **state_kwargs: latency, rpm_limit, posts_per_subreddit, max_comments, max_depth,
+                        forbidden, data_file, seed
+
+    Returns:
+        (server, base_url) tuple; server.state holds the counters; call server.shutdown() when done
+    """
+    state = MockRedditState(**state_kwargs)
+    handler = type('BoundMockRedditHandler', (MockRedditHandler,), {'state': state})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8766
+    data_file = sys.argv[2] if len(sys.argv) > 2 else None
+    server, base_url = run_mock_server(port, rpm_limit=100, data_file=data_file)
+    print(f"Mock Reddit API listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Model Router for The Human Pulse
+Sends short/low-stakes texts to a fast model and long/ambiguous ones to the full model
+"""
+
+# Model used by each routing tier
+MODEL_TIERS = {
+    'fast': 'claude-3-5-haiku-20241022',
+    'full': 'claude-sonnet-4-20250514'
+}
+
+# USD per million tokens: (input, output)
+MODEL_PRICES = {
+    'claude-3-5-haiku-20241022': (0.80, 4.00),
+    'claude-sonnet-4-20250514': (3.00, 15.00)
+}
+
+# Message Batches are billed at half the synchronous price
+BATCH_DISCOUNT = 0.5
+
+# Contexts where a misread costs more than the extra tokens
+HIGH_STAKES_CONTEXTS = ['financial', 'mental_health']
+
+POSITIVE_EMOTIONS = ['optimism', 'excitement', 'contentment']
+NEGATIVE_EMOTIONS = ['anxiety', 'stress', 'fear', 'anger', 'sadness']
+
+
+def estimate_cost(model, input_tokens, output_tokens, discount=1.0):
+    """Estimate the USD cost of one call from its token usage"""
+    input_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES[MODEL_TIERS['full']])
+    return discount * (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class ModelRouter:
+    """Picks a model tier per text (per-tier latency and cost live in analyzer_metrics)"""
+
+    def __init__(self, short_word_limit=60, long_word_limit=250,
+                 high_stakes_contexts=None, escalate_ambiguous=True):
+        """
+        Args:
+            short_word_limit: Texts up to this many words go to the fast tier
+            long_word_limit: Texts with at least this many words go to the full tier
+            high_stakes_contexts: Contexts that skip the fast tier for mid-length texts
+            escalate_ambiguous: Re-score ambiguous fast-tier results on the full tier
+        """
+        self.short_word_limit = short_word_limit
+        self.long_word_limit = long_word_limit
+        self.high_stakes_contexts = high_stakes_contexts if high_stakes_contexts is not None else HIGH_STAKES_CONTEXTS
+        self.escalate_ambiguous = escalate_ambiguous
+
+    def route(self, text, context="general"):
+        """
+        Choose the tier for a text
+
+        Returns:
+            'fast' or 'full'
+        """
+        word_count = len(text.split())
+
+        if word_count <= self.short_word_limit:
+            return 'fast'
+        if word_count >= self.long_word_limit:
+            return 'full'
+        if context in self.high_stakes_contexts:
+            return 'full'
+        return 'fast'
+
+    def model_for(self, tier):
+        """Model name for a tier"""
+        return MODEL_TIERS[tier]
+
+    def needs_escalation(self, result):
+        """
+        Decide whether a fast-tier result is too ambiguous to keep
+
+        Ambiguous means strong positive and negative emotions at the same time,
+        or every score squeezed into a narrow band (the model could not decide).
+        """
+        if not self.escalate_ambiguous or not result:
+            return False
+
+        positive = max(result.get(e, 0) for e in POSITIVE_EMOTIONS)
+        negative = max(result.get(e, 0) for e in NEGATIVE_EMOTIONS)
+        if positive >= 50 and negative >= 50:
+            return True
+
+        scores = [result.get(e, 0) for e in POSITIVE_EMOTIONS + NEGATIVE_EMOTIONS]
+        if max(scores) - min(scores) <= 10 and max(scores) >= 30:
+            return True
+
+        return False
@@ -0,0 +1,276 @@
+"""
+Post Store for The Human Pulse
+Keeps collected posts and their analyses as Parquet files partitioned by date and subreddit,
+so queries read only the partitions and columns they need instead of re-parsing JSON
+
+Layout:
+    post_store/posts/date=2024-08-05/subreddit=anxiety/part-....parquet
+    post_store/analyses/date=2024-08-05/subreddit=anxiety/part-....parquet
+
+Usage:
+    python post_store.py ingest reddit_data.json [sentiment_results.json]
+    python post_store.py query [subreddit ...]
+"""
+
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+STORE_DIR = 'post_store'
+POSTS = 'posts'
+ANALYSES = 'analyses'
+
+def _arrow():
+    """Import pyarrow on first use (only the store needs it)"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The post store needs pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def _timestamp(value):
+    """ISO string or epoch seconds -> naive datetime (None if missing or malformed)"""
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value)
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).replace(tzinfo=None)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def matches(record, subreddits=None, since=None, until=None, min_score=None):
+    """The scan filters applied to one record in Python (for JSON/JSONL input)"""
+    if subreddits and record.get('subreddit') not in subreddits:
+        return False
+    if since is not None or until is not None:
+        created = _timestamp(record.get('created_utc'))
+        if created is None:
+            return False
+        if since is not None and created < _timestamp(since):
+            return False
+        if until is not None and created >= _timestamp(until):
+            return False
+    if min_score is not None and (record.get('score') or 0) < min_score:
+        return False
+    return True
+
+
+def _partitioning(pa):
+    return pa.dataset.partitioning(pa.schema([('date', pa.string()), ('subreddit', pa.string())]), flavor='hive')
+
+
+def _schema(pa, dataset):
+    if dataset == POSTS:
+        fields = [('id', pa.string()), ('title', pa.string()), ('text', pa.string()),
+                  ('score', pa.int64()), ('num_comments', pa.int64()), ('url', pa.string()),
+                  ('author', pa.string()), ('collected_at', pa.string())]
+    else:
+        from sentiment_analyzer import EMOTIONS
+        fields = ([('post_id', pa.string())] + [(emotion, pa.float64()) for emotion in EMOTIONS] +
+                  [('primary_struggle', pa.string()), ('themes', pa.list_(pa.string())),
+                   ('model_tier', pa.string())])
+    return pa.schema(fields + [('created_utc', pa.timestamp('s')), ('date', pa.string()),
+                               ('subreddit', pa.string())])
+
+
+def _stored_keys(pa, dataset, root, key, dates, subreddits):
+    """Values of the key column already stored in the given date and subreddit partitions"""
+    path = f"{root}/{dataset}"
+    if not os.path.isdir(path) or not dates:
+        return set()
+    field = pa.dataset.field
+    source = pa.dataset.dataset(path, format='parquet', partitioning=_partitioning(pa))
+    table = source.to_table(columns=[key], filter=field('date').isin(sorted(dates)) &
+                            field('subreddit').isin(sorted(subreddits)))
+    return set(table.column(key).to_pylist())
+
+
+def write_records(records, dataset=POSTS, root=STORE_DIR):
+    """
+    Append posts or analyses to the store
+
+    Every call adds new files (named per call), so earlier data is never
+    rewritten. Records without a parseable created_utc cannot be partitioned
+    and are skipped, and so are records whose id (post_id for analyses) is
+    already stored or repeats within the call; a post's created_utc fixes its
+    partition, so only the partitions being written are checked.
+
+    Args:
+        records: Post dictionaries (dataset=POSTS) or tagged analyses (dataset=ANALYSES)
+        dataset: POSTS or ANALYSES
+        root: Store directory
+
+    Returns:
+        Number of records written
+    """
+    pa = _arrow()
+    schema = _schema(pa, dataset)
+    key = 'id' if dataset == POSTS else 'post_id'
+    columns = {name: [] for name in schema.names}
+    keys = set()
+    for record in records:
+        created = _timestamp(record.get('created_utc'))
+        if created is None:
+            continue
+        if record.get(key) is not None:
+            if record[key] in keys:
+                continue
+            keys.add(record[key])
+        for name in schema.names:
+            if name == 'created_utc':
+                columns[name].append(created)
+            elif name == 'date':
+                columns[name].append(created.strftime('%Y-%m-%d'))
+            elif name == 'subreddit':
+                columns[name].append(record.get('subreddit') or 'unknown')
+            else:
+                columns[name].append(record.get(name))
+
+    stored = _stored_keys(pa, dataset, root, key, set(columns['date']), set(columns['subreddit']))
+    if stored:
+        keep = [value is None or value not in stored for value in columns[key]]
+        columns = {name: [value for value, kept in zip(values, keep) if kept] for name, values in columns.items()}
+
+    table = pa.table(columns, schema=schema)
+    if not table.num_rows:
+        return 0
+    pa.dataset.write_dataset(
+        table, f"{root}/{dataset}", format='parquet', partitioning=_partitioning(pa),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+    return table.num_rows
+
+
+def write_posts(posts, root=STORE_DIR):
+    """Append collected posts to the store (see write_records)"""
+    return write_records(posts, POSTS, root)
+
+
+def write_analyses(analyses, root=STORE_DIR):
+    """Append tagged analyses (post_id, subreddit, created_utc) to the store (see write_records)"""
+    return write_records(analyses, ANALYSES, root)
+
+
+def _filter(pa, subreddits=None, since=None, until=None, min_score=None):
+    """
+    Filter expression for a scan
+
+    The date and subreddit terms match partition directories, so non-matching
+    partitions are never opened; the created_utc and score terms are checked
+    against Parquet row-group statistics before any rows are decoded.
+    """
+    field = pa.dataset.field
+    terms = []
+    if subreddits:
+        terms.append(field('subreddit').isin(list(subreddits)))
+    if since is not None:
+        since = _timestamp(since)
+        terms.append(field('date') >= since.strftime('%Y-%m-%d'))
+        terms.append(field('created_utc') >= pa.scalar(since, pa.timestamp('s')))
+    if until is not None:
+        until = _timestamp(until)
+        terms.append(field('date') <= until.strftime('%Y-%m-%d'))
+        terms.append(field('created_utc') < pa.scalar(until, pa.timestamp('s')))
+    if min_score is not None:
+        terms.append(field('score') >= min_score)
+
+    expression = None
+    for term in terms:
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def scan(dataset=POSTS, root=STORE_DIR, columns=None, subreddits=None, since=None, until=None,
+         min_score=None):
+    """
+    Scanner over one dataset of the store with filters pushed down
+
+    Args:
+        dataset: POSTS or ANALYSES
+        root: Store directory
+        columns: Columns to read (None = all); partition columns cost nothing
+        subreddits: Only these subreddits
+        since, until: created_utc range [since, until) as ISO strings, datetimes or epoch seconds
+        min_score: Only posts with at least this score (POSTS only)
+
+    Returns:
+        pyarrow.dataset.Scanner, or None if the dataset has no files yet
+    """
+    pa = _arrow()
+    path = f"{root}/{dataset}"
+    if not os.path.isdir(path):
+        return None
+    source = pa.dataset.dataset(path, format='parquet', partitioning=_partitioning(pa))
+    return source.scanner(columns=columns,
+                          filter=_filter(pa, subreddits, since, until, min_score))
+
+
+def query(dataset=POSTS, root=STORE_DIR, columns=None, **filters):
+    """
+    Filtered rows as a pyarrow Table (see scan for the arguments)
+
+    Returns:
+        pyarrow.Table (empty when nothing matches)
+    """
+    scanner = scan(dataset, root, columns, **filters)
+    if scanner is None:
+        pa = _arrow()
+        schema = _schema(pa, dataset)
+        return schema.empty_table().select(columns) if columns else schema.empty_table()
+    return scanner.to_table()
+
+
+def iter_records(dataset=POSTS, root=STORE_DIR, columns=None, **filters):
+    """
+    Yield matching rows as dictionaries, one record batch at a time
+
+    created_utc is returned as an ISO string, the same as in reddit_data.json.
+    """
+    scanner = scan(dataset, root, columns, **filters)
+    if scanner is None:
+        return
+    for batch in scanner.to_batches():
+        for record in batch.to_pylist():
+            if isinstance(record.get('created_utc'), datetime):
+                record['created_utc'] = record['created_utc'].isoformat()
+            yield record
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'query'
+
+    if command == 'ingest':
+        import json
+
+        if len(sys.argv) < 3:
+            print("Usage: python post_store.py ingest reddit_data.json [sentiment_results.json]")
+            sys.exit(2)
+        from sentiment_analyzer import iter_reddit_posts
+        written = write_posts(iter_reddit_posts(sys.argv[2]))
+        print(f"✓ Stored {written} posts in {STORE_DIR}/{POSTS}")
+        if len(sys.argv) > 3:
+            with open(sys.argv[3], 'r', encoding='utf-8') as f:
+                analyses = json.load(f).get('individual_analyses', [])
+            print(f"✓ Stored {write_analyses(analyses)} analyses in {STORE_DIR}/{ANALYSES}")
+        return
+
+    subreddits = sys.argv[2:] or None
+    since = datetime.utcnow() - timedelta(days=1)
+    table = query(POSTS, columns=['subreddit', 'score'], subreddits=subreddits, since=since)
+    print(f"{table.num_rows} posts in the last 24 hours")
+    counts = {}
+    for subreddit in table.column('subreddit').to_pylist():
+        counts[subreddit] = counts.get(subreddit, 0) + 1
+    for subreddit, count in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+        print(f"  r/{subreddit:20} {count}")
+
+
+if __name__ == '__main__':
+    main()
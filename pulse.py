@@ -0,0 +1,419 @@
+"""
+Pulse CLI for The Human Pulse
+Single non-interactive entry point for every pipeline job, so a scheduler can run them back to back
+
+Usage:
+    python pulse.py collect-trends
+    python pulse.py collect-dynamic
+    python pulse.py collect-reddit --posts-per-sub 50
+    python pulse.py analyze-sentiment reddit_data.json --max-posts 50
+    python pulse.py analyze-sentiment reddit_data.json --max-posts 500 --collect-labels
+    python pulse.py analyze-sentiment reddit_data.json --backend local --max-posts 0
+    python pulse.py stream --duration 3600
+    python pulse.py backtest-collect --all
+    python pulse.py backtest-collect --event SVB_Collapse --date 2023-03-10
+    python pulse.py backtest-analyze --all
+    python pulse.py backtest-walk-forward --start 2020-01-01 --end 2024-12-31
+    python pulse.py ingest-archives reddit_archives/
+    python pulse.py publish
+
+Exit codes:
+    0   success
+    1   job failed (nothing useful was produced)
+    2   bad arguments
+    3   input file or data directory missing
+    4   partial success (some items failed, output was still written)
+    130 interrupted (Ctrl+C)
+"""
+
+import argparse
+import os
+import sys
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_INPUT = 3
+EXIT_PARTIAL = 4
+EXIT_INTERRUPTED = 130
+
+
+# Each command imports its pipeline module itself, so only the chosen job's
+# dependencies (pytrends/pandas, praw, anthropic) are ever loaded
+
+def cmd_collect_trends(args):
+    import trends_collector
+    results = trends_collector.main()
+    return EXIT_OK if results and results.get('state_data') else EXIT_FAILED
+
+
+def cmd_collect_dynamic(args):
+    import dynamic_trends_collector
+    results = dynamic_trends_collector.main(wait_for_enter=False)
+    return EXIT_OK if results and results.get('state_data') else EXIT_FAILED
+
+
+def open_seen_index(args, namespace):
+    """SeenIndex for --skip-seen (None when the flag is off), with old IDs expired"""
+    if not args.skip_seen:
+        return None
+    from seen_index import SeenIndex
+    seen_index = SeenIndex(args.seen_file, namespace)
+    expired = seen_index.expire(args.seen_max_age_hours)
+    print(f"Seen index: {len(seen_index)} {namespace} posts ({expired} expired)")
+    return seen_index
+
+
+def cmd_collect_reddit(args):
+    if args.skip_seen and not (args.incremental or args.output.endswith('.jsonl')):
+        # Only the unseen posts are returned, and a .json output is rewritten with just those
+        print("❌ --skip-seen needs --incremental or a .jsonl --output (a .json file would lose earlier posts)")
+        return EXIT_USAGE
+
+    from reddit_collector import RedditCollector
+
+    seen_index = open_seen_index(args, 'collected')
+    try:
+        collector = RedditCollector(max_workers=args.workers, seen_index=seen_index)
+        if args.incremental:
+            data = collector.collect_incremental(data_file=args.output, window_hours=args.window_hours)
+        else:
+            data = collector.collect_all_subreddits(posts_per_sub=args.posts_per_sub)
+    finally:
+        if seen_index is not None:
+            seen_index.close()
+    if not data['posts']:
+        print("❌ No posts collected")
+        return EXIT_FAILED
+    collector.save_to_file(data, args.output)
+    if args.store:
+        import post_store
+        # Incremental data starts with the posts kept from earlier runs, which are already stored
+        new_posts = data['posts'][data['metadata'].get('kept_posts', 0):]
+        print(f"Stored {post_store.write_posts(new_posts, args.store)} posts in {args.store}")
+    return EXIT_OK
+
+
+def cmd_analyze_sentiment(args):
+    if not os.path.exists(args.input):
+        print(f"❌ Input file not found: {args.input}")
+        return EXIT_NO_INPUT
+
+    if args.backend == 'local':
+        if args.threads or args.bulk:
+            print("❌ --backend local scores posts directly; it cannot be combined with --threads or --bulk")
+            return EXIT_USAGE
+        if not os.path.exists(args.local_model):
+            print(f"❌ Local model not found: {args.local_model} (train one with emotion_distiller.py)")
+            return EXIT_NO_INPUT
+
+    if args.bulk and (args.tpm or args.rpm):
+        print("❌ --bulk is not paced by --tpm/--rpm (the Batches API has its own limits); "
+              "use --max-cost-usd to cap its spend")
+        return EXIT_USAGE
+
+    import sentiment_analyzer
+    from datetime import datetime, timedelta
+
+    post_filters = {
+        'subreddits': args.subreddit,
+        'since': datetime.now() - timedelta(hours=args.since_hours) if args.since_hours else None,
+        'min_score': args.min_score
+    }
+    post_filters = {name: value for name, value in post_filters.items() if value is not None}
+
+    if args.threads:
+        # Threads get their own seen namespace: a post scored alone can still be analyzed as a thread
+        seen_index = open_seen_index(args, 'threads')
+        try:
+            results = sentiment_analyzer.analyze_reddit_threads(
+                args.input,
+                output_file=args.output or 'thread_results.json',
+                max_threads=args.max_posts,
+                top_n=args.top_n,
+                seen_index=seen_index,
+                post_filters=post_filters or None,
+                max_cost_usd=args.max_cost_usd,
+                tpm_limit=args.tpm,
+                rpm_limit=args.rpm
+            )
+        finally:
+            if seen_index is not None:
+                seen_index.close()
+        return EXIT_OK if results and results['threads'] else EXIT_FAILED
+
+    seen_index = open_seen_index(args, 'analyzed')
+    try:
+        results = sentiment_analyzer.analyze_reddit_data(
+            args.input,
+            output_file=args.output or 'sentiment_results.json',
+            max_posts=args.max_posts,
+            target_ci_width=args.target_ci_width,
+            seed=args.seed,
+            bulk=args.bulk,
+            deadline_seconds=args.deadline,
+            seen_index=seen_index,
+            post_filters=post_filters or None,
+            max_cost_usd=args.max_cost_usd,
+            tpm_limit=args.tpm,
+            rpm_limit=args.rpm,
+            backend=args.backend,
+            local_model_file=args.local_model,
+            label_cache_file=args.collect_labels
+        )
+    finally:
+        if seen_index is not None:
+            seen_index.close()
+    return EXIT_OK if results and results['individual_analyses'] else EXIT_FAILED
+
+
+def cmd_stream(args):
+    from sentiment_analyzer import SentimentAnalyzer, make_dispatcher
+    from stream_pipeline import StreamPipeline
+
+    pipeline = StreamPipeline(
+        analyzer=SentimentAnalyzer(dispatcher=make_dispatcher(args.max_cost_usd, args.tpm, args.rpm)),
+        queue_size=args.queue_size,
+        workers=args.workers,
+        window_minutes=args.window_minutes,
+        output_file=args.output,
+        publish_interval=args.publish_interval
+    )
+    results = pipeline.run(duration=args.duration)
+    return EXIT_OK if results['metadata']['stream']['analyzed'] else EXIT_FAILED
+
+
+def cmd_backtest_collect(args):
+    import backtest_data_collector
+
+    if args.all:
+        events = backtest_data_collector.EVENTS
+    else:
+        events = [{'name': args.event, 'date': args.date}]
+
+    outcome = backtest_data_collector.collect_events(events, days_before=args.days_before,
+                                                     pause_seconds=args.pause)
+    if outcome['interrupted']:
+        return EXIT_INTERRUPTED
+    if not outcome['completed']:
+        return EXIT_FAILED
+    return EXIT_PARTIAL if outcome['failed'] else EXIT_OK
+
+
+def cmd_backtest_analyze(args):
+    from event_analyzer import EventAnalyzer
+
+    analyzer = EventAnalyzer()
+    if args.all:
+        report = analyzer.analyze_all_events()
+        if report is None:
+            return EXIT_NO_INPUT
+        return EXIT_OK if report['total_events'] else EXIT_FAILED
+
+    try:
+        analyzer.analyze_single_event(args.event)
+    except FileNotFoundError as e:
+        print(f"\n❌ {e}")
+        return EXIT_NO_INPUT
+    return EXIT_OK
+
+
+def cmd_backtest_walk_forward(args):
+    import walk_forward_backtest
+
+    results = walk_forward_backtest.walk_forward(
+        args.start, args.end,
+        days_before=args.days_before,
+        cache_dir=args.cache_dir,
+        pause_seconds=args.pause,
+        output_file=args.output,
+        overlap_days=args.overlap_days
+    )
+    if not results['totals']['windows']:
+        return EXIT_FAILED
+    return EXIT_PARTIAL if results['fetch']['failed'] else EXIT_OK
+
+
+def cmd_ingest_archives(args):
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Archive not found: {', '.join(missing)}")
+        return EXIT_NO_INPUT
+
+    import archive_ingest
+
+    if not archive_ingest.find_archives(args.paths):
+        print("❌ No archives found")
+        return EXIT_NO_INPUT
+    summary = archive_ingest.ingest_archives(
+        args.paths,
+        output_dir=args.output_dir,
+        processes=args.processes,
+        days_before=args.days_before,
+        days_after=args.days_after
+    )
+    return EXIT_PARTIAL if any(stats.get('error') for stats in summary['archives']) else EXIT_OK
+
+
+def cmd_publish(args):
+    if not os.path.exists(args.input):
+        print(f"❌ Input file not found: {args.input}")
+        return EXIT_NO_INPUT
+
+    from trends_processor import process_trends_data
+    process_trends_data(args.input, args.output)
+    return EXIT_OK
+
+
+def add_dispatch_arguments(sub):
+    sub.add_argument('--max-cost-usd', type=float, help='Stop once estimated API spend reaches this many dollars')
+    sub.add_argument('--tpm', type=int, help='Claude API tokens per minute to stay under')
+    sub.add_argument('--rpm', type=int, help='Claude API requests per minute to stay under')
+
+
+def add_seen_arguments(sub):
+    sub.add_argument('--skip-seen', action='store_true', help='Skip posts already handled by an earlier run')
+    sub.add_argument('--seen-file', default='seen_posts.db', help='Seen-post index (default seen_posts.db)')
+    sub.add_argument('--seen-max-age-hours', type=float, default=168,
+                     help='Forget seen posts after this many hours (default 168)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='pulse',
+        description='Run The Human Pulse pipeline jobs without prompts'
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    sub = subparsers.add_parser('collect-trends', help='Collect Google Trends emotions and concerns per state')
+    sub.set_defaults(func=cmd_collect_trends)
+
+    sub = subparsers.add_parser('collect-dynamic', help='Collect rising searches per state')
+    sub.set_defaults(func=cmd_collect_dynamic)
+
+    sub = subparsers.add_parser('collect-reddit', help='Collect recent posts from the target subreddits')
+    sub.add_argument('--posts-per-sub', type=int, default=50, help='Posts per subreddit (default 50)')
+    sub.add_argument('--workers', type=int, default=8, help='Subreddits collected concurrently (default 8)')
+    sub.add_argument('--incremental', action='store_true',
+                     help='Only fetch posts newer than the last run and refresh scores of the rest')
+    sub.add_argument('--window-hours', type=float, default=24, help='Hours a post stays in incremental data (default 24)')
+    sub.add_argument('--output', default='reddit_data.json',
+                     help='Output file (default reddit_data.json; a .jsonl file is appended to)')
+    add_seen_arguments(sub)
+    sub.add_argument('--store', help='Also append the posts to this post store directory (needs pyarrow)')
+    sub.set_defaults(func=cmd_collect_reddit)
+
+    sub = subparsers.add_parser('analyze-sentiment', help='Score collected Reddit posts with Claude')
+    sub.add_argument('input', nargs='?', default='reddit_data.json',
+                     help='Reddit data file (.json/.jsonl) or post store directory (default reddit_data.json)')
+    sub.add_argument('--output', help='Output file (default sentiment_results.json, or thread_results.json with --threads)')
+    sub.add_argument('--max-posts', type=int, default=50, help='Posts (or threads) to analyze (default 50)')
+    sub.add_argument('--threads', action='store_true', help='Analyze each post with its top comments')
+    sub.add_argument('--top-n', type=int, default=20, help='Comments per thread with --threads (default 20)')
+    sub.add_argument('--bulk', action='store_true', help='Use the Message Batches API (half price, slower)')
+    sub.add_argument('--deadline', type=float, help='Stop after this many seconds and publish what is ready')
+    sub.add_argument('--target-ci-width', type=float, default=10.0, help='Stop once confidence intervals are this narrow')
+    sub.add_argument('--seed', type=int, help='Sampling seed')
+    sub.add_argument('--subreddit', action='append', help='Only analyze this subreddit (repeatable)')
+    sub.add_argument('--since-hours', type=float, help='Only analyze posts from the last N hours')
+    sub.add_argument('--min-score', type=int, help='Only analyze posts with at least this score')
+    sub.add_argument('--backend', choices=['api', 'local'], default='api',
+                     help='Score with Claude (api) or the distilled local model, no API calls (default api)')
+    sub.add_argument('--local-model', default='emotion_model.json',
+                     help='Model trained by emotion_distiller.py, used with --backend local (default emotion_model.json)')
+    sub.add_argument('--collect-labels', nargs='?', const='sentiment_labels.jsonl', metavar='FILE',
+                     help='Append every analysis and its post text to FILE as training labels for '
+                          'emotion_distiller.py (default file sentiment_labels.jsonl)')
+    add_seen_arguments(sub)
+    add_dispatch_arguments(sub)
+    sub.set_defaults(func=cmd_analyze_sentiment)
+
+    sub = subparsers.add_parser('stream', help='Analyze new Reddit posts as they arrive and keep a rolling aggregate')
+    sub.add_argument('--workers', type=int, default=4, help='Concurrent analyzer workers (default 4)')
+    sub.add_argument('--queue-size', type=int, default=100, help='Posts waiting for a worker before intake pauses (default 100)')
+    sub.add_argument('--window-minutes', type=float, default=60, help='Rolling aggregate window (default 60)')
+    sub.add_argument('--publish-interval', type=float, default=5, help='Seconds between result writes (default 5)')
+    sub.add_argument('--duration', type=float, help='Stop after this many seconds (default: run until Ctrl+C)')
+    sub.add_argument('--output', default='sentiment_results.json', help='Output file (default sentiment_results.json)')
+    add_dispatch_arguments(sub)
+    sub.set_defaults(func=cmd_stream)
+
+    sub = subparsers.add_parser('backtest-collect', help='Collect historical Google Trends data for past events')
+    target = sub.add_mutually_exclusive_group(required=True)
+    target.add_argument('--all', action='store_true', help='Collect every event in the backtest list')
+    target.add_argument('--event', help='Name of a single event (use with --date)')
+    sub.add_argument('--date', help='Event date, YYYY-MM-DD')
+    sub.add_argument('--days-before', type=int, default=7, help='Days before the event to collect (default 7)')
+    sub.add_argument('--pause', type=float, default=10, help='Seconds to pause between events (default 10)')
+    sub.set_defaults(func=cmd_backtest_collect)
+
+    sub = subparsers.add_parser('backtest-analyze', help='Check collected events for the panic signature')
+    target = sub.add_mutually_exclusive_group(required=True)
+    target.add_argument('--all', action='store_true', help='Analyze every collected event and write the summary report')
+    target.add_argument('--event', help='Name of a single collected event')
+    sub.set_defaults(func=cmd_backtest_analyze)
+
+    sub = subparsers.add_parser('backtest-walk-forward',
+                                help='Check the panic signature for every day of a range from cached long fetches')
+    sub.add_argument('--start', default='2020-01-01', help='First day fetched, YYYY-MM-DD (default 2020-01-01)')
+    sub.add_argument('--end', default='2024-12-31', help='Last window end date, YYYY-MM-DD (default 2024-12-31)')
+    sub.add_argument('--days-before', type=int, default=7, help='Days in each window before its end date (default 7)')
+    sub.add_argument('--overlap-days', type=int, default=30, help='Days shared by consecutive fetched chunks, used to stitch them (default 30)')
+    sub.add_argument('--cache-dir', default='backtest_data/trends_cache', help='Fetched chunk cache (default backtest_data/trends_cache)')
+    sub.add_argument('--pause', type=float, default=2, help='Seconds to pause after each uncached request (default 2)')
+    sub.add_argument('--output', default='backtest_data/walk_forward.json', help='Results file (default backtest_data/walk_forward.json)')
+    sub.set_defaults(func=cmd_backtest_walk_forward)
+
+    sub = subparsers.add_parser('ingest-archives', help='Filter local Reddit dumps down to the backtest event windows')
+    sub.add_argument('paths', nargs='+', help='Archive files (.zst/.gz/.bz2/.xz/.ndjson) or directories of them')
+    sub.add_argument('--output-dir', default='backtest_data/reddit', help='Per-event JSONL output (default backtest_data/reddit)')
+    sub.add_argument('--processes', type=int, help='Archives scanned in parallel (default: one per CPU)')
+    sub.add_argument('--days-before', type=int, default=7, help='Days before each event to keep (default 7)')
+    sub.add_argument('--days-after', type=int, default=0, help='Days after each event day to keep (default 0)')
+    sub.set_defaults(func=cmd_ingest_archives)
+
+    sub = subparsers.add_parser('publish', help='Turn trends data into the dashboard snapshot')
+    sub.add_argument('--input', default='trends_data.json', help='Trends data file (default trends_data.json)')
+    sub.add_argument('--output', default='sentiment_results.json', help='Dashboard file (default sentiment_results.json)')
+    sub.set_defaults(func=cmd_publish)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == 'collect-reddit' and args.incremental and args.output.endswith('.jsonl'):
+        parser.error("--incremental rewrites its data file; JSONL output is append-only (use --skip-seen instead)")
+    if args.command == 'backtest-collect' and args.event and not args.date:
+        parser.error("--event needs --date")
+    if args.command == 'backtest-collect' and args.date:
+        from datetime import datetime
+        try:
+            datetime.strptime(args.date, '%Y-%m-%d')
+        except ValueError:
+            parser.error(f"--date must be YYYY-MM-DD, got {args.date}")
+    if args.command == 'backtest-walk-forward':
+        from datetime import datetime
+        try:
+            if datetime.strptime(args.start, '%Y-%m-%d') >= datetime.strptime(args.end, '%Y-%m-%d'):
+                parser.error("--start must be before --end")
+        except ValueError:
+            parser.error("--start and --end must be YYYY-MM-DD")
+        if not 0 < args.overlap_days < 269:
+            parser.error("--overlap-days must be between 1 and 268")
+
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"❌ {args.command} failed: {e}")
+        return EXIT_FAILED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,11 @@ Reddit Data Collector for The Human Pulse
 Scrapes posts and comments from emotion/sentiment subreddits
 """
 
-import praw
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import json
 
@@ -27,13 +30,95 @@ TARGET_SUBREDDITS = [
     'stressed'
 ]
 
+# Reddit allows 100 OAuth requests per minute per client id
+REDDIT_REQUESTS_PER_MINUTE = 100
+
+# Items per listing request
+LISTING_PAGE_SIZE = 100
+
+# Default shape of a harvested comment tree: replies this deep below a
+# top-level comment (0 = top-level only) and top-level comments per post
+COMMENT_MAX_DEPTH = 2
+COMMENT_MAX_TOP_LEVEL = 25
+
+# Per-subreddit high-water marks for incremental collection
+CURSORS_FILE = 'reddit_cursors.json'
+
+
+class RequestRateLimiter:
+    """Token bucket shared by every collection thread, so concurrency never exceeds Reddit's rate limit"""
+    
+    def __init__(self, requests_per_minute=REDDIT_REQUESTS_PER_MINUTE, burst=10):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.requests = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until one request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
 class RedditCollector:
-    def __init__(self):
-        self.reddit = praw.Reddit(
-            client_id=REDDIT_CLIENT_ID,
-            client_secret=REDDIT_CLIENT_SECRET,
-            user_agent=REDDIT_USER_AGENT
-        )
+    def __init__(self, max_workers=8, requests_per_minute=REDDIT_REQUESTS_PER_MINUTE, seen_index=None,
+                 **reddit_kwargs):
+        """
+        Args:
+            max_workers: Subreddits collected concurrently
+            requests_per_minute: Shared request budget across all threads
+            seen_index: SeenIndex of post IDs collected by earlier runs; those posts are
+                        left out of the output (None = keep everything)
+            **reddit_kwargs: Extra praw.Reddit arguments (e.g. requestor_kwargs)
+        """
+        self.reddit_kwargs = {
+            'client_id': REDDIT_CLIENT_ID,
+            'client_secret': REDDIT_CLIENT_SECRET,
+            'user_agent': REDDIT_USER_AGENT,
+            **reddit_kwargs
+        }
+        self.max_workers = max_workers
+        self.seen_index = seen_index
+        self.rate_limiter = RequestRateLimiter(requests_per_minute)
+        self._local = threading.local()
+        self.reddit = self._new_reddit()
+        self._local.reddit = self.reddit
+    
+    def _new_reddit(self):
+        import praw  # deferred: praw is slow to import and only needed once collecting starts
+        return praw.Reddit(**self.reddit_kwargs)
+    
+    def _thread_reddit(self):
+        """Reddit instance for the calling thread (praw instances are not thread-safe)"""
+        reddit = getattr(self._local, 'reddit', None)
+        if reddit is None:
+            reddit = self._local.reddit = self._new_reddit()
+        return reddit
+    
+    def _paced(self, listing):
+        """Iterate a praw listing, taking a rate-limit token before each page is fetched"""
+        iterator = iter(listing)
+        count = 0
+        while True:
+            if count % LISTING_PAGE_SIZE == 0:
+                self.rate_limiter.acquire()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            count += 1
+            yield item
         
     def collect_recent_posts(self, subreddit_name, limit=100, time_filter='day'):
         """
@@ -47,89 +132,357 @@ class RedditCollector:
         Returns:
             List of post dictionaries
         """
-        subreddit = self.reddit.subreddit(subreddit_name)
+        subreddit = self._thread_reddit().subreddit(subreddit_name)
         posts = []
         
         # Get top posts from time period
-        for post in subreddit.top(time_filter=time_filter, limit=limit):
-            post_data = {
-                'id': post.id,
-                'subreddit': subreddit_name,
-                'title': post.title,
-                'text': post.selftext,
-                'score': post.score,
-                'num_comments': post.num_comments,
-                'created_utc': datetime.fromtimestamp(post.created_utc).isoformat(),
-                'url': post.url,
-                'author': str(post.author) if post.author else '[deleted]',
-                'collected_at': datetime.utcnow().isoformat()
-            }
-            posts.append(post_data)
+        for post in self._paced(subreddit.top(time_filter=time_filter, limit=limit)):
+            posts.append(self._post_data(post, subreddit_name))
             
         return posts
     
-    def collect_comments(self, post_id, limit=50):
+    def _post_data(self, post, subreddit_name):
+        """Post dictionary as stored in reddit_data.json"""
+        return {
+            'id': post.id,
+            'subreddit': subreddit_name,
+            'title': post.title,
+            'text': post.selftext,
+            'score': post.score,
+            'num_comments': post.num_comments,
+            'created_utc': datetime.fromtimestamp(post.created_utc).isoformat(),
+            'url': post.url,
+            'author': str(post.author) if post.author else '[deleted]',
+            'collected_at': datetime.utcnow().isoformat()
+        }
+    
+    def collect_new_posts(self, subreddit_name, cursor=None, limit=500):
+        """
+        Collect posts newer than a cursor from a subreddit's new() listing
+        
+        The listing is newest-first, so the scan stops at the first post at or
+        before the cursor; a run costs one request per 100 new posts. Posts in
+        the seen index are skipped but do not end the scan: top-listing runs
+        record posts from anywhere in the window, so stopping there would move
+        the cursor past older posts that were never collected.
+        
+        Args:
+            subreddit_name: Name of subreddit (without r/)
+            cursor: {'fullname', 'created_utc'} of the newest post seen so far (None = first run)
+            limit: Most posts to take in one run
+        
+        Returns:
+            (posts, new_cursor) tuple
+        """
+        subreddit = self._thread_reddit().subreddit(subreddit_name)
+        posts = []
+        newest = None
+        
+        for post in self._paced(subreddit.new(limit=limit)):
+            fullname = getattr(post, 'name', None) or f"t3_{post.id}"
+            if cursor and (fullname == cursor['fullname'] or post.created_utc <= cursor['created_utc']):
+                break
+            if newest is None:
+                newest = {'fullname': fullname, 'created_utc': post.created_utc}
+            if self.seen_index is not None and post.id in self.seen_index:
+                continue
+            posts.append(self._post_data(post, subreddit_name))
+        
+        return posts, newest or cursor
+    
+    def refresh_posts(self, posts):
+        """
+        Update score and comment count of already-collected posts in place
+        
+        Uses reddit.info in batches of 100 fullnames, one request per batch.
+        
+        Returns:
+            Number of posts refreshed
+        """
+        by_fullname = {f"t3_{post['id']}": post for post in posts}
+        refreshed = 0
+        now = datetime.utcnow().isoformat()
+        for submission in self._paced(self._thread_reddit().info(fullnames=list(by_fullname))):
+            post = by_fullname.get(getattr(submission, 'name', None) or f"t3_{submission.id}")
+            if post is None:
+                continue
+            post['score'] = submission.score
+            post['num_comments'] = submission.num_comments
+            post['refreshed_at'] = now
+            refreshed += 1
+        return refreshed
+    
+    def collect_comments(self, post_id, limit=50, max_depth=COMMENT_MAX_DEPTH,
+                         max_top_level=COMMENT_MAX_TOP_LEVEL, sort='top'):
         """
         Collect top comments from a post
         
+        Reddit is asked for at most `limit` comments in `sort` order, and the
+        tree is walked breadth-first with the depth and top-level caps applied
+        while walking, so nothing outside the kept comments is flattened.
+        
         Args:
             post_id: Reddit post ID
             limit: Number of comments to collect
+            max_depth: Deepest reply level kept (0 = top-level comments only)
+            max_top_level: Top-level comments whose threads are kept
+            sort: Comment sort ('top', 'best', 'new', 'controversial')
             
         Returns:
-            List of comment dictionaries
+            List of comment dictionaries (top-level first, then replies by depth)
         """
-        submission = self.reddit.submission(id=post_id)
-        submission.comments.replace_more(limit=0)  # Remove "more comments" objects
+        self.rate_limiter.acquire()
+        submission = self._thread_reddit().submission(id=post_id)
+        submission.comment_limit = limit
+        submission.comment_sort = sort
+        submission.comments.replace_more(limit=0)  # Remove "more comments" objects (no extra requests)
         
+        collected_at = datetime.utcnow().isoformat()
         comments = []
-        for comment in submission.comments.list()[:limit]:
-            if hasattr(comment, 'body'):
-                comment_data = {
-                    'id': comment.id,
-                    'post_id': post_id,
-                    'text': comment.body,
-                    'score': comment.score,
-                    'created_utc': datetime.fromtimestamp(comment.created_utc).isoformat(),
-                    'author': str(comment.author) if comment.author else '[deleted]',
-                    'collected_at': datetime.utcnow().isoformat()
-                }
-                comments.append(comment_data)
+        pending = deque((comment, 0) for comment in list(submission.comments)[:max_top_level])
+        while pending and len(comments) < limit:
+            comment, depth = pending.popleft()
+            if not hasattr(comment, 'body'):
+                continue
+            comments.append({
+                'id': comment.id,
+                'post_id': post_id,
+                'text': comment.body,
+                'score': comment.score,
+                'depth': depth,
+                'created_utc': datetime.fromtimestamp(comment.created_utc).isoformat(),
+                'author': str(comment.author) if comment.author else '[deleted]',
+                'collected_at': collected_at
+            })
+            if depth < max_depth:
+                pending.extend((reply, depth + 1) for reply in comment.replies)
                 
         return comments
     
-    def collect_all_subreddits(self, posts_per_sub=50):
+    def collect_comments_bulk(self, post_ids, limit=50, max_depth=COMMENT_MAX_DEPTH,
+                              max_top_level=COMMENT_MAX_TOP_LEVEL, sort='top'):
         """
-        Collect posts from all target subreddits
+        Collect comments for many posts concurrently under the shared rate limit
+        
+        Posts are fetched on the worker pool (one praw instance per thread) and
+        yielded as each one finishes, so callers can start on the first threads
+        while the rest are still downloading. A failed post does not stop the others.
+        
+        Args:
+            post_ids: Reddit post IDs
+            limit, max_depth, max_top_level, sort: As in collect_comments
+            
+        Yields:
+            (post_id, comments, error) tuples in completion order; comments is
+            None when error is set
+        """
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {
+                pool.submit(self.collect_comments, post_id, limit, max_depth, max_top_level, sort): post_id
+                for post_id in post_ids
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            # Stopping early (break / close()) drops posts that have not started yet
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def collect_all_subreddits(self, posts_per_sub=50, subreddits=None):
+        """
+        Collect posts from all target subreddits concurrently
+        
+        Each subreddit is fetched on its own worker thread (with its own praw
+        instance) under the shared rate limiter; one subreddit failing does not
+        affect the others.
+        
+        The top() listing is ordered by score, not age, so seen posts cannot end
+        the scan early: a seen index only leaves them out of the result, and the
+        request count stays the same.
+        
+        Args:
+            posts_per_sub: Posts per subreddit
+            subreddits: Subreddits to collect (default TARGET_SUBREDDITS)
         
         Returns:
             Dictionary with all collected data
         """
+        subreddits = subreddits or TARGET_SUBREDDITS
         all_data = {
             'posts': [],
             'metadata': {
                 'collected_at': datetime.utcnow().isoformat(),
-                'subreddits': TARGET_SUBREDDITS,
-                'posts_per_sub': posts_per_sub
+                'subreddits': subreddits,
+                'posts_per_sub': posts_per_sub,
+                'failed_subreddits': {},
+                'skipped_seen': 0
             }
         }
         
-        for subreddit in TARGET_SUBREDDITS:
-            print(f"Collecting from r/{subreddit}...")
+        print(f"Collecting from {len(subreddits)} subreddits ({self.max_workers} at a time)...")
+        started = time.monotonic()
+        collect = lambda subreddit: self.collect_recent_posts(subreddit, limit=posts_per_sub, time_filter='day')
+        for subreddit, posts, error in self._map_subreddits(collect, subreddits):
+            if error is not None:
+                all_data['metadata']['failed_subreddits'][subreddit] = str(error)
+                print(f"  ✗ Error collecting from r/{subreddit}: {error}")
+                continue
+            if self.seen_index is not None:
+                fresh = self.seen_index.filter_new(posts)
+                all_data['metadata']['skipped_seen'] += len(posts) - len(fresh)
+                self.seen_index.add(post['id'] for post in fresh)
+                posts = fresh
+            all_data['posts'].extend(posts)
+            print(f"  ✓ Collected {len(posts)} posts from r/{subreddit}")
+        
+        print(f"Collected {len(all_data['posts'])} posts in {time.monotonic() - started:.1f}s")
+        return all_data
+    
+    def _map_subreddits(self, fn, subreddits):
+        """
+        Run fn(subreddit) on the worker pool, isolating errors per subreddit
+        
+        Yields:
+            (subreddit, result, error) tuples in input order
+        """
+        def run(subreddit):
             try:
-                posts = self.collect_recent_posts(subreddit, limit=posts_per_sub, time_filter='day')
-                all_data['posts'].extend(posts)
-                print(f"  ✓ Collected {len(posts)} posts from r/{subreddit}")
+                return fn(subreddit), None
             except Exception as e:
-                print(f"  ✗ Error collecting from r/{subreddit}: {e}")
-                
+                return None, e
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for subreddit, (result, error) in zip(subreddits, pool.map(run, subreddits)):
+                yield subreddit, result, error
+    
+    def collect_incremental(self, data_file='reddit_data.json', cursor_file=CURSORS_FILE,
+                            window_hours=24, max_new_per_sub=500, refresh=True, subreddits=None):
+        """
+        Add only posts newer than each subreddit's cursor to an existing data file
+        
+        Posts older than window_hours are dropped, the rest get fresh scores
+        (unless refresh=False), and cursors advance only for subreddits that
+        were collected successfully.
+        
+        Args:
+            data_file: Previous output of this collector (missing = first run)
+            cursor_file: JSON file of per-subreddit cursors
+            window_hours: How long a post stays in the data set
+            max_new_per_sub: Most new posts taken per subreddit per run
+            refresh: Refresh score/num_comments of posts still in the window
+            subreddits: Subreddits to collect (default TARGET_SUBREDDITS)
+        
+        Returns:
+            Dictionary with all collected data (same shape as collect_all_subreddits)
+        """
+        subreddits = subreddits or TARGET_SUBREDDITS
+        cursors = load_json(cursor_file, {})
+        previous = load_json(data_file, {'posts': []})
+        requests_before = self.rate_limiter.requests
+        started = time.monotonic()
+        
+        cutoff = time.time() - window_hours * 3600
+        kept = [post for post in previous.get('posts', [])
+                if _post_timestamp(post) >= cutoff and post.get('subreddit') in subreddits]
+        seen = {post['id'] for post in kept}
+        
+        all_data = {
+            'posts': [],
+            'metadata': {
+                'collected_at': datetime.utcnow().isoformat(),
+                'subreddits': subreddits,
+                'mode': 'incremental',
+                'window_hours': window_hours,
+                'failed_subreddits': {}
+            }
+        }
+        
+        print(f"Collecting new posts from {len(subreddits)} subreddits ({len(kept)} kept from {data_file})...")
+        collect = lambda subreddit: self.collect_new_posts(subreddit, cursors.get(subreddit), max_new_per_sub)
+        new_posts = []
+        for subreddit, result, error in self._map_subreddits(collect, subreddits):
+            if error is not None:
+                all_data['metadata']['failed_subreddits'][subreddit] = str(error)
+                print(f"  ✗ Error collecting from r/{subreddit}: {error}")
+                continue
+            posts, cursor = result
+            if cursor:
+                cursors[subreddit] = {**cursor, 'updated_at': datetime.utcnow().isoformat()}
+            fresh = [post for post in posts if post['id'] not in seen and _post_timestamp(post) >= cutoff]
+            if self.seen_index is not None:
+                self.seen_index.add(post['id'] for post in fresh)
+            new_posts.extend(fresh)
+            print(f"  ✓ {len(fresh)} new posts from r/{subreddit}")
+        
+        refreshed = 0
+        if refresh and kept:
+            try:
+                refreshed = self.refresh_posts(kept)
+            except Exception as e:
+                print(f"  ✗ Error refreshing scores: {e}")
+        
+        all_data['posts'] = kept + new_posts
+        all_data['metadata'].update({
+            'new_posts': len(new_posts),
+            'kept_posts': len(kept),
+            'refreshed_posts': refreshed,
+            'requests': self.rate_limiter.requests - requests_before
+        })
+        save_json(cursor_file, cursors)
+        
+        print(f"{len(new_posts)} new, {refreshed}/{len(kept)} refreshed, "
+              f"{all_data['metadata']['requests']} requests in {time.monotonic() - started:.1f}s")
         return all_data
     
     def save_to_file(self, data, filename='reddit_data.json'):
-        """Save collected data to JSON file"""
+        """Save collected data to JSON file (appended as JSONL if filename ends in .jsonl)"""
+        if filename.endswith('.jsonl'):
+            self.save_to_jsonl(data, filename)
+            return
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         print(f"\nSaved {len(data['posts'])} posts to {filename}")
+    
+    def save_to_jsonl(self, data, filename='reddit_data.jsonl'):
+        """
+        Append collected data to a JSONL file, one post per line
+        
+        Each run starts with a metadata record ({"type": "metadata", "metadata": {...}}),
+        so a new file opens with its header and later runs append without
+        rewriting anything. Use a seen index to keep appends free of repeats.
+        """
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'type': 'metadata', 'metadata': data.get('metadata', {})}, ensure_ascii=False) + '\n')
+            for post in data['posts']:
+                f.write(json.dumps(post, ensure_ascii=False) + '\n')
+        print(f"\nAppended {len(data['posts'])} posts to {filename}")
+
+
+def _post_timestamp(post):
+    """Epoch seconds of a stored post's created_utc (0 if missing or malformed)"""
+    try:
+        return datetime.fromisoformat(post['created_utc']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def load_json(filename, default):
+    """Load a JSON file, or return default if it does not exist"""
+    if not os.path.exists(filename):
+        return default
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(filename, data):
+    """Write a JSON file atomically"""
+    tmp_file = f"{filename}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, filename)
 
 
 def main():
@@ -0,0 +1,208 @@
+"""
+Rollups for The Human Pulse
+Aggregates analyzed posts by any combination of subreddit, hour and theme
+
+Usage:
+    python rollups.py [results_file | post_store_dir] [dimension ...]
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from itertools import combinations
+
+from sentiment_analyzer import EMOTIONS
+from theme_index import ThemeIndex
+
+DIMENSIONS = ('subreddit', 'hour', 'theme')
+
+
+def hour_bucket(timestamp):
+    """Truncate an ISO timestamp (or epoch seconds) to its hour, e.g. '2024-08-05T14:00'"""
+    if timestamp is None or timestamp == '':
+        return None
+    try:
+        if isinstance(timestamp, (int, float)):
+            moment = datetime.utcfromtimestamp(timestamp)
+        else:
+            moment = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except (ValueError, OverflowError, OSError):
+        return None
+    return moment.strftime('%Y-%m-%dT%H:00')
+
+
+def theme_labels(themes, theme_index):
+    """Distinct canonical labels of a row's themes"""
+    labels = []
+    for theme in themes or []:
+        theme_id = theme_index.resolve(theme)
+        if theme_id is not None and theme_index.label(theme_id) not in labels:
+            labels.append(theme_index.label(theme_id))
+    return labels
+
+
+def build_table(analyses, theme_index=None):
+    """
+    Turn analyses into a columnar table (one list per column)
+
+    Themes are canonicalized through theme_index so spelling variants roll up
+    together; each row keeps the list of its canonical theme labels.
+
+    Returns:
+        Dictionary of column name -> list, plus 'rows'
+    """
+    theme_index = theme_index if theme_index is not None else ThemeIndex()
+    table = {'subreddit': [], 'hour': [], 'theme': [], **{emotion: [] for emotion in EMOTIONS}}
+
+    for analysis in analyses:
+        table['subreddit'].append(analysis.get('subreddit'))
+        table['hour'].append(hour_bucket(analysis.get('created_utc')))
+        table['theme'].append(theme_labels(analysis.get('themes'), theme_index))
+        for emotion in EMOTIONS:
+            table[emotion].append(analysis.get(emotion))
+
+    table['rows'] = len(table['subreddit'])
+    return table
+
+
+def load_table(store_dir, dimensions=DIMENSIONS, theme_index=None, **filters):
+    """
+    Columnar table straight from a post store's analyses
+
+    Only the columns the requested dimensions need are read (created_utc for
+    'hour', themes for 'theme', plus the emotions), and the post_store filters
+    (subreddits, since, until) prune partitions before anything is decoded.
+
+    Returns:
+        Table in the build_table shape; dimensions not requested are left empty
+    """
+    import post_store
+
+    columns = ['subreddit'] + (['created_utc'] if 'hour' in dimensions else []) + \
+              (['themes'] if 'theme' in dimensions else []) + list(EMOTIONS)
+    arrow_table = post_store.query(post_store.ANALYSES, store_dir, columns, **filters)
+    rows = arrow_table.num_rows
+
+    table = {emotion: arrow_table.column(emotion).to_pylist() for emotion in EMOTIONS}
+    table['subreddit'] = arrow_table.column('subreddit').to_pylist()
+    table['hour'] = [None] * rows
+    if 'hour' in dimensions:
+        table['hour'] = [moment.strftime('%Y-%m-%dT%H:00') if moment else None
+                         for moment in arrow_table.column('created_utc').to_pylist()]
+    table['theme'] = [[] for _ in range(rows)]
+    if 'theme' in dimensions:
+        theme_index = theme_index if theme_index is not None else ThemeIndex()
+        table['theme'] = [theme_labels(themes, theme_index)
+                          for themes in arrow_table.column('themes').to_pylist()]
+    table['rows'] = rows
+    return table
+
+
+def grouping_sets(dimensions=DIMENSIONS):
+    """Every combination of the dimensions, from the grand total () to all of them (a cube)"""
+    return [combo for size in range(len(dimensions) + 1) for combo in combinations(dimensions, size)]
+
+
+def _group_value(value):
+    """Index value -> plain Python (missing values become None)"""
+    import pandas as pd
+
+    return None if pd.isna(value) else value
+
+
+def rollup(table, sets=None, min_size=1):
+    """
+    Aggregate every grouping set with one pandas groupby per set
+
+    Rows are exploded once into one row per theme for the sets that include
+    'theme', so a row with several themes counts once under each of them; the
+    other sets group the table as it is.
+
+    Args:
+        table: Columnar table from build_table
+        sets: List of dimension tuples (default: the full cube over DIMENSIONS)
+        min_size: Drop groups with fewer rows than this
+
+    Returns:
+        Dictionary of grouping-set name ('subreddit+hour', 'all', ...) -> list of groups,
+        largest first; each group has its dimension values, sample_size and emotions
+    """
+    import pandas as pd  # only needed when rollups are computed
+
+    sets = [tuple(s) for s in (sets if sets is not None else grouping_sets())]
+    frame = pd.DataFrame({
+        'subreddit': pd.Series(table['subreddit'], dtype=object),
+        'hour': pd.Series(table['hour'], dtype=object),
+        'theme': pd.Series([themes or [None] for themes in table['theme']], dtype=object),
+        **{emotion: pd.Series(table[emotion], dtype='float64') for emotion in EMOTIONS}
+    })
+    themed = frame.explode('theme') if any('theme' in dims for dims in sets) else None
+    emotions = list(EMOTIONS)
+
+    results = {}
+    for dims in sets:
+        source = themed if 'theme' in dims else frame
+        if dims:
+            grouped = source.groupby(list(dims), dropna=False, sort=False)
+            sizes = grouped.size()
+            keys = [key if isinstance(key, tuple) else (key,) for key in sizes.index]
+            sums = grouped[emotions].sum().to_numpy()
+            counts = grouped[emotions].count().to_numpy()
+            sizes = sizes.to_numpy()
+        else:
+            keys = [()] if len(source) else []
+            sums = [source[emotions].sum().to_numpy()]
+            counts = [source[emotions].count().to_numpy()]
+            sizes = [len(source)]
+
+        rows = []
+        for key, size, group_sums, group_counts in zip(keys, sizes, sums, counts):
+            if size < min_size:
+                continue
+            rows.append({
+                **{d: _group_value(value) for d, value in zip(dims, key)},
+                'sample_size': int(size),
+                'emotions': {emotion: round(float(group_sums[k]) / int(group_counts[k]), 1)
+                             for k, emotion in enumerate(EMOTIONS) if group_counts[k]}
+            })
+        rows.sort(key=lambda r: r['sample_size'], reverse=True)
+        results['+'.join(dims) or 'all'] = rows
+    return results
+
+
+def rollup_analyses(analyses, sets=None, theme_index=None, min_size=1):
+    """build_table + rollup in one call"""
+    return rollup(build_table(analyses, theme_index), sets, min_size)
+
+
+def main():
+    results_file = sys.argv[1] if len(sys.argv) > 1 else 'sentiment_results.json'
+    dimensions = tuple(sys.argv[2:]) or DIMENSIONS
+    unknown = [d for d in dimensions if d not in DIMENSIONS]
+    if unknown:
+        print(f"❌ Unknown dimension(s): {', '.join(unknown)} (choose from {', '.join(DIMENSIONS)})")
+        sys.exit(2)
+
+    if os.path.isdir(results_file):
+        table = load_table(results_file, dimensions)
+    else:
+        with open(results_file, 'r', encoding='utf-8') as f:
+            table = build_table(json.load(f).get('individual_analyses', []))
+
+    print("=" * 60)
+    print(f"THE HUMAN PULSE - Rollups ({table['rows']} analyses)")
+    print("=" * 60)
+
+    for name, groups in rollup(table, grouping_sets(dimensions)).items():
+        print(f"\n{name.upper()} ({len(groups)} groups)")
+        for group in groups[:10]:
+            label = ' / '.join(str(group[d]) for d in name.split('+')) if name != 'all' else 'all posts'
+            anxiety = group['emotions'].get('anxiety')
+            anxiety_text = f"anxiety {anxiety:5.1f}" if anxiety is not None else ""
+            print(f"  {label[:40]:40} n={group['sample_size']:<4} {anxiety_text}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Seen Index for The Human Pulse
+Remembers which post IDs were already collected or analyzed across runs, so each run
+only spends network requests and API calls on posts it has not seen before
+"""
+
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+
+SEEN_FILE = 'seen_posts.db'
+
+# Namespaces shared by the pipeline stages
+COLLECTED = 'collected'
+ANALYZED = 'analyzed'
+
+# Bloom filter sizing: expected IDs per namespace and false-positive rate
+DEFAULT_CAPACITY = 200000
+DEFAULT_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (k bit positions by double hashing)"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class SeenIndex:
+    """
+    Persistent set of seen post IDs per namespace, with a Bloom filter in front
+
+    The exact set lives in SQLite (keyed by namespace and ID, with the time each
+    ID was first seen). Most IDs a run checks are new, and for those the Bloom
+    filter answers "not seen" without touching the database; only Bloom hits
+    (real repeats plus ~1% false positives) are confirmed on disk. The filter is
+    saved alongside the set on close() and rebuilt when it fills up, entries
+    expire or the saved copy is stale.
+    """
+
+    def __init__(self, filename=SEEN_FILE, namespace=COLLECTED, capacity=DEFAULT_CAPACITY,
+                 error_rate=DEFAULT_ERROR_RATE):
+        """
+        Args:
+            filename: SQLite file holding every namespace
+            namespace: Which stage's IDs this index reads and writes (COLLECTED, ANALYZED, ...)
+            capacity: IDs the Bloom filter is sized for (grows automatically)
+            error_rate: Bloom filter false-positive rate at capacity
+        """
+        self.filename = filename
+        self.namespace = namespace
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS seen (
+                namespace TEXT NOT NULL,
+                id TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (namespace, id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS seen_by_age ON seen (namespace, seen_at);
+            CREATE TABLE IF NOT EXISTS bloom (
+                namespace TEXT PRIMARY KEY,
+                capacity INTEGER NOT NULL,
+                error_rate REAL NOT NULL,
+                count INTEGER NOT NULL,
+                bits BLOB NOT NULL
+            );
+        """)
+        self.count = self._db.execute(
+            "SELECT COUNT(*) FROM seen WHERE namespace = ?", (namespace,)).fetchone()[0]
+        self.bloom = self._load_bloom(capacity)
+        self.bloom_hits = 0
+        self.false_positives = 0
+
+    def _load_bloom(self, capacity):
+        # A saved filter is only trusted if it was saved with the set as it is now
+        # (a run that crashed before close() leaves it stale)
+        row = self._db.execute("SELECT capacity, error_rate, count, bits FROM bloom WHERE namespace = ?",
+                               (self.namespace,)).fetchone()
+        if row and row[2] == self.count and row[0] >= self.count:
+            bloom = BloomFilter(row[0], row[1])
+            if len(row[3]) == len(bloom.bits):
+                bloom.bits = bytearray(row[3])
+                return bloom
+        return self._rebuild(max(capacity, 2 * self.count))
+
+    def _rebuild(self, capacity):
+        """New filter holding every ID currently in the namespace"""
+        bloom = BloomFilter(capacity, self.error_rate)
+        for (post_id,) in self._db.execute("SELECT id FROM seen WHERE namespace = ?", (self.namespace,)):
+            bloom.add(post_id)
+        return bloom
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, post_id):
+        post_id = str(post_id)
+        with self._lock:
+            if post_id not in self.bloom:
+                return False
+            self.bloom_hits += 1
+            found = self._db.execute("SELECT 1 FROM seen WHERE namespace = ? AND id = ?",
+                                     (self.namespace, post_id)).fetchone() is not None
+            if not found:
+                self.false_positives += 1
+            return found
+
+    def filter_new(self, items, key='id'):
+        """
+        Items whose ID has not been seen (dictionaries are read via item[key])
+
+        Returns:
+            List of unseen items, in input order
+        """
+        return [item for item in items if (item[key] if isinstance(item, dict) else item) not in self]
+
+    def add(self, post_ids, seen_at=None):
+        """
+        Mark IDs as seen (IDs already present keep their first-seen time)
+
+        Args:
+            post_ids: Iterable of post IDs (a single string also works)
+            seen_at: Epoch seconds (defaults to now)
+
+        Returns:
+            Number of IDs that were new
+        """
+        post_ids = [post_ids] if isinstance(post_ids, str) else [str(post_id) for post_id in post_ids]
+        seen_at = seen_at if seen_at is not None else time.time()
+        with self._lock:
+            before = self._db.total_changes
+            with self._db:
+                self._db.executemany("INSERT OR IGNORE INTO seen (namespace, id, seen_at) VALUES (?, ?, ?)",
+                                     ((self.namespace, post_id, seen_at) for post_id in post_ids))
+            added = self._db.total_changes - before
+            self.count += added
+            if self.count > self.bloom.capacity:
+                self.bloom = self._rebuild(2 * self.count)
+            else:
+                for post_id in post_ids:
+                    self.bloom.add(post_id)
+        return added
+
+    def expire(self, max_age_hours):
+        """
+        Forget IDs first seen more than max_age_hours ago
+
+        A Bloom filter cannot delete, so it is rebuilt from the remaining IDs.
+
+        Returns:
+            Number of IDs removed
+        """
+        cutoff = time.time() - max_age_hours * 3600
+        with self._lock:
+            with self._db:
+                removed = self._db.execute("DELETE FROM seen WHERE namespace = ? AND seen_at < ?",
+                                           (self.namespace, cutoff)).rowcount
+            if removed:
+                self.count -= removed
+                self.bloom = self._rebuild(self.bloom.capacity)
+        return removed
+
+    def _save_bloom(self):
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO bloom (namespace, capacity, error_rate, count, bits) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (self.namespace, self.bloom.capacity, self.bloom.error_rate, self.count,
+                              bytes(self.bloom.bits)))
+
+    def close(self):
+        """Save the Bloom filter so the next run can skip rebuilding it"""
+        with self._lock:
+            self._save_bloom()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -3,16 +3,393 @@ Sentiment Analyzer for The Human Pulse
 Uses Claude API to analyze emotions and themes in text
 """
 
+import hashlib
+import heapq
 import json
-from anthropic import Anthropic
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from itertools import islice, tee
+from analyzer_metrics import MetricsRegistry, metrics_file_for
+from api_dispatcher import APIDispatcher, BudgetExceeded
+from location_tagger import tag_post, state_aggregates
+from model_router import ModelRouter, MODEL_TIERS, BATCH_DISCOUNT
+from sentiment_sampler import StratifiedSampler, ConfidenceStopRule, reservoir_by_subreddit
+from theme_index import RETENTION_HOURS, ThemeIndex, THEMES_FILE
 
-# Initialize Claude client with hardcoded API key
+# Claude client with hardcoded API key, created on first API call so that
+# importing this module (publishing, local scoring) stays fast and offline
+client = None
+
+
+def get_client():
+    """Shared Anthropic client, created on first use"""
+    global client
+    if client is None:
+        from anthropic import Anthropic
+        client = Anthropic(api_key='API Key Here')
+    return client
+
+
+def make_dispatcher(max_cost_usd=None, tpm_limit=None, rpm_limit=None):
+    """
+    APIDispatcher over the shared client when any limit is given
+
+    Limits left as None keep the dispatcher's defaults.
+
+    Returns:
+        APIDispatcher, or None when no limit was given (calls go straight to the client)
+    """
+    if max_cost_usd is None and tpm_limit is None and rpm_limit is None:
+        return None
+    limits = {'tpm_limit': tpm_limit, 'rpm_limit': rpm_limit}
+    return APIDispatcher(get_client(), max_cost_usd=max_cost_usd,
+                         **{name: value for name, value in limits.items() if value is not None})
+
+# Emotions scored for every text (0-100)
+EMOTIONS = ['anxiety', 'stress', 'fear', 'anger', 'sadness',
+            'optimism', 'excitement', 'contentment']
+
+# Tool schema the model must answer through (forced via tool_choice)
+SENTIMENT_TOOL = {
+    "name": "record_sentiment",
+    "description": "Record the emotion scores, primary struggle and key themes of the analyzed text.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            **{emotion: {"type": "integer", "minimum": 0, "maximum": 100} for emotion in EMOTIONS},
+            "primary_struggle": {"type": "string"},
+            "themes": {"type": "array", "items": {"type": "string"}, "maxItems": 3}
+        },
+        "required": EMOTIONS + ["primary_struggle", "themes"]
+    }
+}
+
+# Thread mode: one profile for the whole thread plus compact per-comment scores
+THREAD_TOOL = {
+    "name": "record_thread_sentiment",
+    "description": "Record the overall emotion profile of a Reddit thread and the emotion scores of each numbered comment.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "thread": SENTIMENT_TOOL['input_schema'],
+            "comments": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "integer"},
+                        **{emotion: {"type": "integer", "minimum": 0, "maximum": 100} for emotion in EMOTIONS}
+                    },
+                    "required": ["index"] + EMOTIONS
+                }
+            }
+        },
+        "required": ["thread", "comments"]
+    }
+}
+
+# Cheap model used for the single repair pass on unparseable replies
+REPAIR_MODEL = MODEL_TIERS['fast']
+
+# API analyses kept as training labels for the local model (see emotion_distiller.py)
+LABELS_FILE = 'sentiment_labels.jsonl'
+
+
+def normalize_analysis(raw):
+    """
+    Validate a raw analysis and coerce it into the canonical shape
+
+    Emotion scores are clamped to 0-100, themes are trimmed to 3 strings.
+
+    Returns:
+        Normalized dictionary, or None if any emotion score is missing/invalid
+    """
+    if not isinstance(raw, dict):
+        return None
+
+    result = {}
+    for emotion in EMOTIONS:
+        try:
+            score = float(raw[emotion])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if score != score:  # NaN
+            return None
+        result[emotion] = int(round(min(100.0, max(0.0, score))))
+
+    struggle = raw.get('primary_struggle')
+    result['primary_struggle'] = str(struggle).strip() if struggle else ''
+
+    themes = raw.get('themes') or []
+    if isinstance(themes, str):
+        themes = [themes]
+    result['themes'] = [str(t).strip() for t in themes if str(t).strip()][:3]
+
+    return result
+
+
+def normalize_thread(raw):
+    """
+    Validate a thread analysis: the thread profile plus per-comment emotion scores
+    
+    Returns:
+        {'thread': analysis, 'comments': [scores...]} or None if the profile is invalid
+    """
+    if not isinstance(raw, dict):
+        return None
+    thread = normalize_analysis(raw.get('thread'))
+    if thread is None:
+        return None
+    
+    comments = []
+    for item in raw.get('comments') or []:
+        if not isinstance(item, dict):
+            continue
+        scores = normalize_analysis({**item, 'primary_struggle': '', 'themes': []})
+        if scores is not None:
+            comments.append({emotion: scores[emotion] for emotion in EMOTIONS})
+    return {'thread': thread, 'comments': comments}
+
+
+def pack_thread(post, comments, top_n=20, token_budget=2000, max_comment_chars=400):
+    """
+    Choose the comments that go into a thread request
+    
+    Comments are ordered by score, capped at top_n and trimmed so the packed
+    text stays under token_budget (estimated at ~4 characters per token).
+    
+    Returns:
+        (post_text, comment_texts) tuple
+    """
+    post_text = f"{post['title']}. {post.get('text', '')}"[:1000]
+    budget = token_budget * 4 - len(post_text)
+    
+    packed = []
+    for comment in sorted(comments, key=lambda c: c.get('score') or 0, reverse=True)[:top_n]:
+        text = (comment.get('text') or '').strip()[:max_comment_chars]
+        if not text or text in ('[deleted]', '[removed]'):
+            continue
+        if len(text) + 8 > budget:
+            break
+        packed.append(text)
+        budget -= len(text) + 8
+    return post_text, packed
+
+
+def _extract_json(text):
+    """Pull the first JSON object out of a (possibly chatty or fenced) reply"""
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+
+class LabelCache:
+    """Append-only JSONL store of (text, emotion scores) pairs returned by the API"""
+
+    def __init__(self, filename=LABELS_FILE):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def add(self, text, analysis):
+        """Record one API analysis as a training example"""
+        record = {
+            'text': text,
+            'scores': {emotion: analysis[emotion] for emotion in EMOTIONS},
+            'model_tier': analysis.get('model_tier'),
+            'labeled_at': datetime.utcnow().isoformat()
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.filename, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class RunningAggregate:
+    """Incrementally maintained equivalent of SentimentAnalyzer.aggregate_emotions"""
+    
+    def __init__(self, theme_index=None):
+        """
+        Args:
+            theme_index: ThemeIndex that merges spellings of themes into canonical
+                         entries (defaults to a fresh in-memory index)
+        
+        Struggles are free-text sentences, so they are merged in a private
+        in-memory index and never reach a persistent theme index.
+        """
+        self.sample_size = 0
+        self.sums = {emotion: 0.0 for emotion in EMOTIONS}
+        self.counts = {emotion: 0 for emotion in EMOTIONS}
+        self.theme_index = theme_index if theme_index is not None else ThemeIndex()
+        self.struggle_index = ThemeIndex()
+        self.theme_counts = {}      # canonical theme id -> mentions in this aggregate
+        self.struggle_counts = {}   # canonical struggle id -> mentions in this aggregate
+    
+    def add(self, analysis):
+        """Fold one analysis into the aggregate"""
+        self.sample_size += 1
+        for emotion in EMOTIONS:
+            if analysis.get(emotion) is not None:
+                self.sums[emotion] += analysis[emotion]
+                self.counts[emotion] += 1
+        for theme in analysis.get('themes') or []:
+            theme_id = self.theme_index.resolve(theme)
+            if theme_id is not None:
+                self.theme_counts[theme_id] = self.theme_counts.get(theme_id, 0) + 1
+        struggle_id = self.struggle_index.resolve(analysis.get('primary_struggle') or '')
+        if struggle_id is not None:
+            self.struggle_counts[struggle_id] = self.struggle_counts.get(struggle_id, 0) + 1
+    
+    def snapshot(self):
+        """
+        Current aggregate in the aggregate_emotions shape
+        
+        Returns:
+            Dictionary with average scores and top themes (None if empty)
+        """
+        if not self.sample_size:
+            return None
+        
+        sorted_themes = sorted(self.theme_counts.items(), key=lambda x: x[1], reverse=True)
+        sorted_struggles = sorted(self.struggle_counts.items(), key=lambda x: x[1], reverse=True)
+        return {
+            'sample_size': self.sample_size,
+            'emotions': {emotion: round(self.sums[emotion] / self.counts[emotion], 1)
+                         for emotion in EMOTIONS if self.counts[emotion]},
+            'top_struggles': [self.struggle_index.label(s[0]) for s in sorted_struggles[:10]],
+            'top_themes': [{'theme': self.theme_index.label(t[0]), 'count': t[1]} for t in sorted_themes[:10]]
+        }
+
+
+def post_priority(post, comment_weight=2.0):
+    """Engagement priority of a Reddit post (log-scaled score plus weighted comment count)"""
+    score = max(post.get('score') or 0, 0)
+    comments = max(post.get('num_comments') or 0, 0)
+    return math.log1p(score) + comment_weight * math.log1p(comments)
+
+
+# Post fields the analyzers read
+POST_COLUMNS = ['id', 'subreddit', 'title', 'text', 'score', 'num_comments', 'created_utc']
+
+
+def iter_reddit_posts(filename, metadata=None, filters=None):
+    """
+    Yield posts one at a time from a RedditCollector output file or post store
+    
+    A post store directory is scanned for the analysis columns only, with the
+    filters pushed down to its partitions and row groups. JSONL files (.jsonl)
+    are read line by line, so memory does not grow with the file; a plain JSON
+    document is loaded whole. A truncated last line from an interrupted append
+    is skipped.
+    
+    Args:
+        filename: reddit_data.jsonl, reddit_data.json or a post_store directory
+        metadata: Optional dictionary updated with the file's metadata records
+                  as they are read (later runs override earlier ones)
+        filters: Optional post_store filters (subreddits, since, until, min_score)
+    """
+    if filters or os.path.isdir(filename):
+        import post_store
+        
+        filters = filters or {}
+        if os.path.isdir(filename):
+            yield from post_store.iter_records(post_store.POSTS, filename, POST_COLUMNS, **filters)
+        else:
+            yield from (post for post in iter_reddit_posts(filename, metadata)
+                        if post_store.matches(post, **filters))
+        return
+    
+    if not filename.endswith('.jsonl'):
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if metadata is not None:
+            metadata.update(data.get('metadata', {}))
+        yield from data.get('posts', [])
+        return
+    
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('type') == 'metadata':
+                if metadata is not None:
+                    metadata.update(record.get('metadata', {}))
+                continue
+            yield record
+
+
+def post_tags(post):
+    """Post fields carried on its analysis so results can be rolled up by subreddit, time and state"""
+    return {
+        'post_id': post.get('id'),
+        'subreddit': post.get('subreddit'),
+        'created_utc': post.get('created_utc'),
+        'states': tag_post(post)
+    }
+
+
+def created_timestamp(analysis):
+    """Epoch seconds of the analyzed post's created_utc (None if missing or malformed)"""
+    try:
+        return datetime.fromisoformat(str(analysis['created_utc']).replace('Z', '+00:00')).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error):
+    """Whether the SDK would have retried this error before giving up"""
+    status = getattr(error, 'status_code', None)
+    return status is None or status in (408, 409, 429) or status >= 500
+
+
+def write_results(output_file, results):
+    """Write results atomically so readers (the dashboard) never see a half-written file"""
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, output_file)
 
-client = Anthropic(api_key='API Key Here')
 
 class SentimentAnalyzer:
-    def __init__(self):
-        self.model = "claude-sonnet-4-20250514"
+    def __init__(self, router=None, dispatcher=None, label_cache=None, local_model=None, theme_index=None):
+        """
+        Args:
+            router: ModelRouter deciding which model tier scores each text
+                    (defaults to length-based routing)
+            dispatcher: Optional APIDispatcher enforcing rate limits and a cost cap;
+                        when set, analyze_batch runs calls concurrently through it
+            label_cache: Optional LabelCache that keeps every API analysis as a training label
+            local_model: Optional distilled model (emotion_distiller.LocalEmotionModel)
+                         used by analyze_batch(backend='local')
+            theme_index: ThemeIndex used to canonicalize themes and struggles when aggregating
+        """
+        self.repair_model = REPAIR_MODEL
+        self.router = router or ModelRouter()
+        self.dispatcher = dispatcher
+        self.label_cache = label_cache
+        self.local_model = local_model
+        self.theme_index = theme_index if theme_index is not None else ThemeIndex()
+        self.metrics = MetricsRegistry()
+        self.truncated = False  # set once the dispatcher's cost cap stops a call
+        self._stats_lock = threading.Lock()
+        self.parse_stats = {
+            'responses': 0,
+            'parse_failures': 0,
+            'repaired': 0,
+            'api_errors': 0
+        }
         
     def analyze_text(self, text, context="general"):
         """
@@ -26,7 +403,30 @@ class SentimentAnalyzer:
             Dictionary with emotion scores and themes
         """
         
-        prompt = f"""Analyze the emotional content of this text. Provide scores (0-100) for these emotions:
+        prompt = self._build_prompt(text)
+        tier = self.router.route(text, context)
+        result = self._score(prompt, tier)
+        
+        # Ambiguous fast-tier reads get a second opinion from the full model
+        if tier == 'fast' and self.router.needs_escalation(result):
+            try:
+                escalated = self._score(prompt, 'full', escalated=True)
+            except BudgetExceeded:
+                # The fast read is already paid for; keep it and let the next call stop the run
+                self.truncated = True
+                escalated = None
+            if escalated is not None:
+                result, tier = escalated, 'full'
+        
+        if result is not None:
+            result['model_tier'] = tier
+            if self.label_cache:
+                self.label_cache.add(text, result)
+        return result
+    
+    def _build_prompt(self, text):
+        """Build the scoring prompt for one text"""
+        return f"""Analyze the emotional content of this text. Provide scores (0-100) for these emotions:
 
 Emotions to score:
 - anxiety: Worry, nervousness, unease about the future
@@ -44,44 +444,150 @@ Also identify:
 
 Text: "{text[:500]}"
 
-Respond ONLY with JSON in this exact format:
-{{
-  "anxiety": 0-100,
-  "stress": 0-100,
-  "fear": 0-100,
-  "anger": 0-100,
-  "sadness": 0-100,
-  "optimism": 0-100,
-  "excitement": 0-100,
-  "contentment": 0-100,
-  "primary_struggle": "brief description",
-  "themes": ["theme1", "theme2", "theme3"]
-}}"""
-
-        try:
-            response = client.messages.create(
-                model=self.model,
-                max_tokens=500,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            # Extract JSON from response
-            response_text = response.content[0].text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith('```'):
-                response_text = response_text.split('```')[1]
-                if response_text.startswith('json'):
-                    response_text = response_text[4:]
-            
-            result = json.loads(response_text.strip())
+Record your analysis by calling the record_sentiment tool."""
+    
+    def _score(self, prompt, tier, escalated=False):
+        """
+        Run one scoring call on the given tier, repairing the reply if needed
+        
+        Returns:
+            Normalized analysis, or None on failure
+        """
+        model = self.router.model_for(tier)
+        response, call = self._create(tier, model, escalated=escalated,
+                                      max_tokens=500, messages=[{"role": "user", "content": prompt}])
+        if response is None:
+            return None
+        
+        self._count('responses')
+        result = self._parse_response(response)
+        call['outcome'] = 'parsed' if result is not None else 'parse_failed'
+        if result is not None:
             return result
-            
+        
+        # One cheap repair pass instead of throwing the call away
+        self._count('parse_failures')
+        try:
+            result = self._repair(response)
+        except BudgetExceeded:
+            self.truncated = True
+            return None
+        if result is not None:
+            self._count('repaired')
+        return result
+    
+    def _create(self, tier, model, escalated=False, tool=SENTIMENT_TOOL, **kwargs):
+        """
+        Call the Messages API with a tool forced, recording latency, tokens and retries
+        
+        Returns:
+            (response, call) tuple - response is None on API error; call is the
+            metrics record, whose 'outcome' the caller sets once it has parsed the reply
+        """
+        request = dict(model=model, tools=[tool], tool_choice={"type": "tool", "name": tool['name']}, **kwargs)
+        start = time.perf_counter()
+        response = None
+        retries = 0
+        try:
+            if self.dispatcher:
+                response = self.dispatcher.create(**request)
+            else:
+                raw = get_client().messages.with_raw_response.create(**request)
+                retries = getattr(raw, 'retries_taken', 0)
+                response = raw.parse()
+        except BudgetExceeded:
+            raise
         except Exception as e:
-            print(f"Error analyzing text: {e}")
+            print(f"API error ({tier}): {e}")
+            self._count('api_errors')
+            if not self.dispatcher and _is_retryable(e):
+                retries = get_client().max_retries
+        latency = time.perf_counter() - start
+        
+        queue_wait = 0.0
+        if self.dispatcher:
+            retries, queue_wait = self.dispatcher.last_call_info()
+        
+        usage = getattr(response, 'usage', None)
+        call = self.metrics.record_call(
+            tier, model, latency - queue_wait,
+            getattr(usage, 'input_tokens', 0) or 0,
+            getattr(usage, 'output_tokens', 0) or 0,
+            retries=retries,
+            outcome='api_error' if response is None else None,
+            queue_wait=queue_wait,
+            escalated=escalated
+        )
+        return response, call
+    
+    def _count(self, key):
+        with self._stats_lock:
+            self.parse_stats[key] += 1
+    
+    def _parse_response(self, response, tool=SENTIMENT_TOOL, normalize=normalize_analysis):
+        """Extract a normalized analysis from a tool_use (or text) reply"""
+        for block in response.content:
+            if getattr(block, 'type', None) == 'tool_use' and block.name == tool['name']:
+                return normalize(block.input)
+        
+        # Fall back to JSON embedded in a text reply
+        for block in response.content:
+            if getattr(block, 'type', None) == 'text':
+                return normalize(_extract_json(block.text))
+        
+        return None
+    
+    def _repair(self, response, tool=SENTIMENT_TOOL, normalize=normalize_analysis, max_tokens=300):
+        """
+        Ask the cheap model to restate a malformed reply through the tool schema
+        
+        Returns:
+            Normalized analysis, or None if the repair also fails
+        """
+        prompt = self._build_repair_prompt(response, tool['name'])
+        if prompt is None:
+            return None
+        
+        repaired, call = self._create('repair', self.repair_model, tool=tool, max_tokens=max_tokens,
+                                      messages=[{"role": "user", "content": prompt}])
+        if repaired is None:
             return None
+        
+        result = self._parse_response(repaired, tool, normalize)
+        call['outcome'] = 'parsed' if result is not None else 'parse_failed'
+        return result
     
-    def analyze_batch(self, texts, context="general", max_items=None):
+    def _build_repair_prompt(self, response, tool_name=SENTIMENT_TOOL['name']):
+        """Build the repair prompt for a malformed reply (None if the reply is empty)"""
+        raw_parts = []
+        for block in response.content:
+            if getattr(block, 'type', None) == 'tool_use':
+                raw_parts.append(json.dumps(block.input))
+            elif getattr(block, 'type', None) == 'text':
+                raw_parts.append(block.text)
+        raw_output = '\n'.join(raw_parts).strip()
+        if not raw_output:
+            return None
+        
+        return f"""The following is an emotion analysis that is malformed or incomplete.
+Restate it by calling the {tool_name} tool. Keep every score it gives,
+use integers 0-100, and use 0 for any emotion it does not mention.
+
+Analysis:
+{raw_output[:2000]}"""
+    
+    def prompt_fingerprint(self):
+        """Short hash of the scoring prompt and tool schemas, so metrics dumps can be compared across prompt changes"""
+        payload = json.dumps([self._build_prompt(''), SENTIMENT_TOOL, THREAD_TOOL], sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+    
+    def parse_failure_rate(self):
+        """Fraction of API replies that could not be parsed on the first pass"""
+        if not self.parse_stats['responses']:
+            return 0.0
+        return self.parse_stats['parse_failures'] / self.parse_stats['responses']
+    
+    def analyze_batch(self, texts, context="general", max_items=None, backend='api'):
         """
         Analyze multiple texts
         
@@ -89,137 +595,629 @@ Respond ONLY with JSON in this exact format:
             texts: List of text strings
             context: Context hint
             max_items: Maximum number of items to process (None = all)
+            backend: 'api' (Claude) or 'local' (distilled model, no API calls)
             
         Returns:
             List of analysis results
         """
         if max_items:
             texts = texts[:max_items]
+        
+        if backend == 'local':
+            if self.local_model is None:
+                raise ValueError("backend='local' needs a local_model (see emotion_distiller.py)")
+            results = self.local_model.analyze_batch(texts, context)
+            print(f"Scored {len(results)} texts with the local model")
+            return results
             
         results = []
         total = len(texts)
         
-        for i, text in enumerate(texts, 1):
-            print(f"Analyzing {i}/{total}...", end='\r')
-            result = self.analyze_text(text, context)
-            if result:
-                results.append(result)
+        if self.dispatcher:
+            print(f"Analyzing {total} texts through the dispatcher...")
+            outcomes = self.dispatcher.map(lambda text: self.analyze_text(text, context), texts)
+            results = [result for result in outcomes if result]
+            if self.dispatcher.truncated:
+                self.truncated = True
+                print("\n⚠️  Cost cap reached - run truncated")
+        else:
+            for i, text in enumerate(texts, 1):
+                print(f"Analyzing {i}/{total}...", end='\r')
+                try:
+                    result = self.analyze_text(text, context)
+                except BudgetExceeded as e:
+                    self.truncated = True
+                    print(f"\n⚠️  {e} - stopping after {i - 1} texts")
+                    break
+                if result:
+                    results.append(result)
                 
         print(f"\nCompleted: {len(results)}/{total} analyzed")
+        self.print_run_stats()
         return results
     
-    def aggregate_emotions(self, analyses):
+    def analyze_sequential(self, texts, context="general", stop_rule=None, max_items=None, tags=None):
         """
-        Aggregate emotion scores across multiple analyses
+        Analyze texts one at a time until a stop rule is satisfied
         
         Args:
-            analyses: List of analysis dictionaries
+            texts: Iterable of text strings (consumed lazily)
+            context: Context hint
+            stop_rule: Object with add(analysis) and done() (e.g. ConfidenceStopRule)
+            max_items: Hard cap on texts sent to the API (None = no cap)
+            tags: Optional iterable of dicts parallel to texts, merged into each result
+                  (e.g. post_tags of the source post)
             
         Returns:
-            Dictionary with average scores and top themes
+            List of analysis results
+        """
+        results = []
+        attempted = 0
+        tags = iter(tags) if tags is not None else None
+        
+        for text in texts:
+            tag = next(tags) if tags is not None else None
+            if max_items and attempted >= max_items:
+                break
+            attempted += 1
+            print(f"Analyzing {attempted}...", end='\r')
+            try:
+                result = self.analyze_text(text, context)
+            except BudgetExceeded as e:
+                self.truncated = True
+                print(f"\n⚠️  {e} - stopping")
+                attempted -= 1
+                break
+            if result:
+                if tag:
+                    result.update(tag)
+                results.append(result)
+                if stop_rule:
+                    stop_rule.add(result)
+                    if stop_rule.done():
+                        print(f"\nConfidence target reached after {attempted} posts")
+                        break
+        
+        print(f"\nCompleted: {len(results)}/{attempted} analyzed")
+        self.print_run_stats()
+        return results
+    
+    def analyze_thread(self, post, comments, context="general", top_n=20, token_budget=2000):
         """
-        if not analyses:
+        Analyze a post and its top comments in a single API call
+        
+        Args:
+            post: Post dictionary (title, text, id)
+            comments: Comment dictionaries from RedditCollector.collect_comments
+            context: Context hint
+            top_n: Maximum comments packed into the request
+            token_budget: Approximate input token budget for the packed thread
+            
+        Returns:
+            Dictionary with the thread emotion profile, per-emotion spread across
+            comments and a disagreement index (None on failure)
+        """
+        post_text, comment_texts = pack_thread(post, comments, top_n, token_budget)
+        numbered = '\n'.join(f"[{i}] {text}" for i, text in enumerate(comment_texts, 1))
+        
+        prompt = f"""Analyze the emotional content of this Reddit thread. Score (0-100) these emotions:
+anxiety, stress, fear, anger, sadness, optimism, excitement, contentment.
+
+1. "thread": the overall emotion profile of the thread (post and comments together),
+   plus its primary struggle and 1-3 key themes.
+2. "comments": the emotion scores of each numbered comment, with its index.
+
+Post: "{post_text}"
+
+Comments:
+{numbered or '(none)'}
+
+Record your analysis by calling the record_thread_sentiment tool."""
+        
+        tier = self.router.route(f"{post_text} {' '.join(comment_texts)}", context)
+        model = self.router.model_for(tier)
+        response, call = self._create(tier, model, tool=THREAD_TOOL, max_tokens=300 + 80 * len(comment_texts),
+                                      messages=[{"role": "user", "content": prompt}])
+        if response is None:
             return None
+        
+        self._count('responses')
+        parsed = self._parse_response(response, THREAD_TOOL, normalize_thread)
+        call['outcome'] = 'parsed' if parsed is not None else 'parse_failed'
+        if parsed is None:
+            self._count('parse_failures')
+            try:
+                parsed = self._repair(response, THREAD_TOOL, normalize_thread,
+                                      max_tokens=300 + 80 * len(comment_texts))
+            except BudgetExceeded:
+                self.truncated = True
+                return None
+            if parsed is None:
+                return None
+            self._count('repaired')
+        
+        spread = {}
+        for emotion in EMOTIONS:
+            values = [c[emotion] for c in parsed['comments']]
+            if len(values) >= 2:
+                mean = sum(values) / len(values)
+                spread[emotion] = round((sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5, 1)
+        
+        return {
+            'post_id': post.get('id'),
+            'subreddit': post.get('subreddit'),
+            'thread': {**parsed['thread'], 'model_tier': tier},
+            'comments_analyzed': len(parsed['comments']),
+            'comments_packed': len(comment_texts),
+            'comment_spread': spread,
+            'disagreement': round(sum(spread.values()) / len(spread), 1) if spread else 0.0
+        }
+    
+    def analyze_until_deadline(self, posts, deadline_seconds, context="general",
+                               priority=post_priority, max_workers=4, max_items=None, on_update=None):
+        """
+        Anytime analysis: most important posts first, stop at a wall-clock deadline
+        
+        Posts are submitted in priority order with at most max_workers in flight.
+        The running aggregate is valid after every completed post; when the
+        deadline hits, in-flight calls are abandoned and whatever is done is returned.
+        
+        Args:
+            posts: List of post dictionaries (title, text, score, num_comments)
+            deadline_seconds: Wall-clock budget in seconds
+            context: Context hint
+            priority: Function post -> sort key (higher = analyzed first)
+            max_workers: Concurrent API calls
+            max_items: Only consider the top max_items posts by priority (None = all)
+            on_update: Called with (analyses, aggregated) after every completed post
             
-        # Calculate averages
-        emotions = ['anxiety', 'stress', 'fear', 'anger', 'sadness', 
-                   'optimism', 'excitement', 'contentment']
-        
-        aggregated = {
-            'sample_size': len(analyses),
-            'emotions': {},
-            'top_struggles': [],
-            'top_themes': []
+        Returns:
+            (analyses, aggregated, info) tuple
+        """
+        deadline = time.monotonic() + deadline_seconds
+        queue = sorted(posts, key=priority, reverse=True)
+        if max_items:
+            queue = queue[:max_items]
+        aggregate = RunningAggregate(self.theme_index)
+        analyses = []
+        submitted = 0
+        in_flight = set()
+        sources = {}   # future -> post
+        
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                while submitted < len(queue) and len(in_flight) < max_workers and time.monotonic() < deadline:
+                    post = queue[submitted]
+                    text = f"{post['title']}. {post.get('text', '')}"
+                    future = pool.submit(self.analyze_text, text, context)
+                    sources[future] = post
+                    in_flight.add(future)
+                    submitted += 1
+                
+                remaining = deadline - time.monotonic()
+                if not in_flight or remaining <= 0:
+                    break
+                
+                done, in_flight = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except BudgetExceeded as e:
+                        self.truncated = True
+                        print(f"\n⚠️  {e} - stopping")
+                        queue = queue[:submitted]
+                        continue
+                    if result:
+                        result.update(post_tags(sources[future]))
+                        analyses.append(result)
+                        aggregate.add(result)
+                        print(f"Analyzed {len(analyses)} ({max(0.0, deadline - time.monotonic()):.0f}s left)...", end='\r')
+                        if on_update:
+                            on_update(analyses, aggregate.snapshot())
+        finally:
+            # Don't wait on the slowest calls: abandon what is still in flight
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        info = {
+            'deadline_seconds': deadline_seconds,
+            'deadline_hit': time.monotonic() >= deadline,
+            'posts_available': len(posts),
+            'posts_considered': len(queue),
+            'posts_submitted': submitted,
+            'posts_abandoned': len(in_flight),
+            'posts_completed': len(analyses)
         }
+        print(f"\nCompleted: {len(analyses)}/{len(posts)} analyzed before the deadline "
+              f"({len(in_flight)} abandoned in flight)")
+        self.print_run_stats()
+        return analyses, aggregate.snapshot(), info
+    
+    def analyze_bulk(self, texts, context="general", poll_interval=30, timeout=None, tags=None):
+        """
+        Analyze texts through the Message Batches API (half price, not real-time)
         
-        # Average emotion scores
-        for emotion in emotions:
-            scores = [a.get(emotion, 0) for a in analyses if a.get(emotion) is not None]
-            if scores:
-                aggregated['emotions'][emotion] = round(sum(scores) / len(scores), 1)
+        Requests are routed per text as in analyze_text. Ambiguous fast-tier
+        results and unparseable replies are resubmitted together in one
+        follow-up batch (escalations on the full tier, repairs on the cheap model).
+        
+        Args:
+            texts: List of text strings
+            context: Context hint
+            poll_interval: Seconds between status checks
+            timeout: Give up waiting after this many seconds (None = wait for the batch to end)
+            tags: Optional list of dicts parallel to texts, merged into each result
+            
+        Returns:
+            List of analysis results in input order (failed texts are skipped)
+        """
+        tiers = {}
+        requests = []
+        for i, text in enumerate(texts):
+            custom_id = f"text-{i}"
+            tiers[custom_id] = self.router.route(text, context)
+            requests.append(self._batch_request(custom_id, tiers[custom_id], self._build_prompt(text)))
         
-        # Collect themes
-        all_themes = []
-        all_struggles = []
+        print(f"Submitting {len(requests)} texts as a message batch...")
+        responses = self._run_batch(requests, tiers, poll_interval, timeout)
         
-        for analysis in analyses:
-            if analysis.get('themes'):
-                all_themes.extend(analysis['themes'])
-            if analysis.get('primary_struggle'):
-                all_struggles.append(analysis['primary_struggle'])
+        results = {}
+        follow_up = []
+        follow_up_tiers = {}
+        for custom_id, (response, call) in responses.items():
+            self._count('responses')
+            result = self._parse_response(response)
+            call['outcome'] = 'parsed' if result is not None else 'parse_failed'
+            if result is None:
+                self._count('parse_failures')
+                prompt = self._build_repair_prompt(response)
+                if prompt:
+                    follow_up_tiers[custom_id] = 'repair'
+                    follow_up.append(self._batch_request(custom_id, 'repair', prompt, max_tokens=300))
+                continue
+            
+            result['model_tier'] = tiers[custom_id]
+            results[custom_id] = result
+            if tiers[custom_id] == 'fast' and self.router.needs_escalation(result):
+                index = int(custom_id.split('-')[1])
+                follow_up_tiers[custom_id] = 'full'
+                follow_up.append(self._batch_request(custom_id, 'full', self._build_prompt(texts[index])))
         
-        # Count theme frequency
-        theme_counts = {}
-        for theme in all_themes:
-            theme_lower = theme.lower()
-            theme_counts[theme_lower] = theme_counts.get(theme_lower, 0) + 1
+        if follow_up:
+            print(f"Submitting {len(follow_up)} escalations/repairs as a follow-up batch...")
+            for custom_id, (response, call) in self._run_batch(follow_up, follow_up_tiers, poll_interval, timeout,
+                                                                  follow_up=True).items():
+                result = self._parse_response(response)
+                call['outcome'] = 'parsed' if result is not None else 'parse_failed'
+                if result is None:
+                    continue
+                if follow_up_tiers[custom_id] == 'repair':
+                    self._count('repaired')
+                    result['model_tier'] = tiers[custom_id]
+                else:
+                    result['model_tier'] = 'full'
+                results[custom_id] = result
         
-        # Sort by frequency
-        sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
-        aggregated['top_themes'] = [{'theme': t[0], 'count': t[1]} for t in sorted_themes[:10]]
+        ordered = []
+        for i, text in enumerate(texts):
+            result = results.get(f"text-{i}")
+            if result is None:
+                continue
+            if self.label_cache:
+                self.label_cache.add(text, result)
+            if tags:
+                result.update(tags[i])
+            ordered.append(result)
+        print(f"\nCompleted: {len(ordered)}/{len(texts)} analyzed")
+        self.print_run_stats()
+        return ordered
+    
+    def _batch_request(self, custom_id, tier, prompt, max_tokens=500):
+        """One entry of a Message Batches request list"""
+        model = self.repair_model if tier == 'repair' else self.router.model_for(tier)
+        return {
+            "custom_id": custom_id,
+            "params": {
+                "model": model,
+                "max_tokens": max_tokens,
+                "tools": [SENTIMENT_TOOL],
+                "tool_choice": {"type": "tool", "name": SENTIMENT_TOOL['name']},
+                "messages": [{"role": "user", "content": prompt}]
+            }
+        }
+    
+    def _run_batch(self, requests, tiers, poll_interval, timeout, follow_up=False):
+        """
+        Submit a batch, wait for it to end and collect succeeded messages
         
-        # Top struggles (just first 10)
-        aggregated['top_struggles'] = all_struggles[:10]
+        With a dispatcher, the batch's worst-case cost is reserved against the
+        cost cap first; requests that do not fit are dropped (run truncated).
         
-        return aggregated
+        Returns:
+            Dictionary of custom_id -> (Message, metrics record)
+        """
+        reserved = 0.0
+        if self.dispatcher:
+            try:
+                admitted, reserved = self.dispatcher.reserve_batch(requests, BATCH_DISCOUNT)
+            except BudgetExceeded as e:
+                self.truncated = True
+                print(f"  ⚠️  {e} - batch not submitted")
+                return {}
+            if len(admitted) < len(requests):
+                self.truncated = True
+                print(f"  ⚠️  Cost cap reached - submitting {len(admitted)}/{len(requests)} requests")
+            requests = admitted
+        
+        usages = []
+        try:
+            return self._collect_batch(requests, tiers, poll_interval, timeout, follow_up, usages)
+        finally:
+            if self.dispatcher:
+                self.dispatcher.settle_batch(reserved, usages, BATCH_DISCOUNT)
+    
+    def _collect_batch(self, requests, tiers, poll_interval, timeout, follow_up, usages):
+        """_run_batch without the cost reservation; appends the usage of every succeeded request to usages"""
+        api = get_client()
+        batches = getattr(api.messages, 'batches', None) or api.beta.messages.batches
+        batch = batches.create(requests=requests)
+        print(f"  Batch {batch.id} submitted")
+        
+        started = time.monotonic()
+        while batch.processing_status != 'ended':
+            if timeout is not None and time.monotonic() - started > timeout:
+                print(f"  ⚠️  Batch {batch.id} still running after {timeout}s - cancelling")
+                batches.cancel(batch.id)
+                return {}
+            time.sleep(poll_interval)
+            batch = batches.retrieve(batch.id)
+            counts = batch.request_counts
+            print(f"  {batch.processing_status}: {counts.succeeded} succeeded, "
+                  f"{counts.processing} processing", end='\r')
+        
+        models = {entry['custom_id']: entry['params']['model'] for entry in requests}
+        responses = {}
+        for entry in batches.results(batch.id):
+            tier = tiers[entry.custom_id]
+            if entry.result.type != 'succeeded':
+                self._count('api_errors')
+                self.metrics.record_call(f"{tier}-batch", models[entry.custom_id], None, 0, 0,
+                                         outcome='api_error', discount=BATCH_DISCOUNT)
+                continue
+            message = entry.result.message
+            usage = getattr(message, 'usage', None)
+            usages.append((models[entry.custom_id], getattr(usage, 'input_tokens', 0) or 0,
+                           getattr(usage, 'output_tokens', 0) or 0))
+            # Batch results carry no per-request latency
+            call = self.metrics.record_call(
+                f"{tier}-batch", models[entry.custom_id], None,
+                getattr(usage, 'input_tokens', 0) or 0,
+                getattr(usage, 'output_tokens', 0) or 0,
+                escalated=follow_up and tier == 'full',
+                discount=BATCH_DISCOUNT
+            )
+            responses[entry.custom_id] = (message, call)
+        
+        print(f"\n  Batch {batch.id} ended after {time.monotonic() - started:.0f}s")
+        return responses
+    
+    def print_run_stats(self):
+        """Print parse, latency and per-tier cost statistics for this analyzer"""
+        print(f"Parse failure rate: {self.parse_failure_rate():.1%} "
+              f"({self.parse_stats['repaired']}/{self.parse_stats['parse_failures']} repaired)")
+        self.metrics.print_summary()
+        if self.dispatcher:
+            report = self.dispatcher.report()
+            print(f"Dispatcher: {report['requests']} requests, {report['rate_limited']} rate-limited, "
+                  f"${report['spent_usd']:.4f} spent")
+    
+    def aggregate_emotions(self, analyses):
+        """
+        Aggregate emotion scores across multiple analyses
+        
+        Args:
+            analyses: List of analysis dictionaries
+            
+        Returns:
+            Dictionary with average scores and top themes
+        """
+        aggregate = RunningAggregate(self.theme_index)
+        for analysis in analyses or []:
+            aggregate.add(analysis)
+        return aggregate.snapshot()
 
 
-def analyze_reddit_data(reddit_json_file, output_file='sentiment_results.json', max_posts=50):
+def analyze_reddit_data(reddit_json_file, output_file='sentiment_results.json', max_posts=50,
+                        subreddit_weights=None, target_ci_width=10.0, confidence=0.95, seed=None,
+                        bulk=False, poll_interval=30, label_cache_file=None,
+                        deadline_seconds=None, publish_interval=5, theme_index_file=THEMES_FILE,
+                        theme_retention_hours=RETENTION_HOURS,
+                        seen_index=None, post_filters=None, max_cost_usd=None, tpm_limit=None, rpm_limit=None,
+                        backend='api', local_model_file='emotion_model.json'):
     """
     Analyze Reddit data collected from reddit_collector.py
     
+    Posts are drawn across subreddits in proportion to subreddit_weights, and
+    analysis stops as soon as every emotion's confidence interval is narrower
+    than target_ci_width (or max_posts is reached).
+    
     Args:
-        reddit_json_file: Path to JSON file with Reddit data
+        reddit_json_file: Path to the collector's JSON or JSONL file
         output_file: Where to save results
         max_posts: Maximum number of posts to analyze (API cost control)
+        subreddit_weights: Dict of subreddit -> sampling weight (default: equal)
+        target_ci_width: Stop once all intervals are narrower than this (None = never stop early)
+        confidence: Confidence level of the intervals
+        seed: Random seed for the sampler
+        bulk: Submit the sampled posts as one message batch (cheaper, not real-time;
+              no early stopping)
+        poll_interval: Seconds between batch status checks in bulk mode
+        label_cache_file: JSONL file every analysis is appended to (with the post text) as a
+                          training label for emotion_distiller.py (None = don't keep; the
+                          file is never trimmed, so only turn this on to collect labels)
+        deadline_seconds: Anytime mode - analyze the highest-engagement posts first and
+                          publish whatever is done when this many seconds have passed
+        publish_interval: Seconds between partial publishes to output_file in anytime mode
+        theme_index_file: Persistent theme index that canonicalizes themes across runs and
+                          keeps hourly mention counts (None = in-memory only)
+        theme_retention_hours: Hourly theme counts older than this are dropped before the
+                               index is saved (None = keep everything)
+        seen_index: SeenIndex of post IDs analyzed by earlier runs; those posts are skipped
+                    and this run's posts are added (None = analyze everything)
+        post_filters: Only analyze posts matching these post_store filters
+                      (subreddits, since, until, min_score)
+        max_cost_usd: Hard cap on estimated API spend for this run (None = no cap)
+        tpm_limit, rpm_limit: Token and request per-minute ceilings for the API calls
+                              (calls go through an APIDispatcher when any limit is set)
+        backend: 'api' (Claude) or 'local' (the distilled model in local_model_file scores
+                 every sampled post with no API calls; no early stopping)
+        local_model_file: Model saved by emotion_distiller.py, used with backend='local'
+    
+    reddit_json_file may also be a post_store directory; only the matching partitions
+    and the columns the analysis needs are read, and the analyses are stored back
+    into it for the rollups.
     """
     print("=" * 60)
     print("THE HUMAN PULSE - Sentiment Analyzer")
     print("=" * 60)
     
-    # Load Reddit data
+    # Stream Reddit data, keeping only the posts this run could analyze
     print(f"\nLoading data from {reddit_json_file}...")
-    with open(reddit_json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    metadata = {}
+    read = {'posts': 0, 'skipped_seen': 0}
     
-    posts = data.get('posts', [])
-    print(f"Found {len(posts)} posts")
+    def unseen_posts():
+        for post in iter_reddit_posts(reddit_json_file, metadata, post_filters):
+            read['posts'] += 1
+            if seen_index is not None and post['id'] in seen_index:
+                read['skipped_seen'] += 1
+                continue
+            yield post
     
-    if max_posts:
-        posts = posts[:max_posts]
-        print(f"Analyzing first {len(posts)} posts (cost control)")
+    if deadline_seconds:
+        # Anytime mode analyzes by engagement, so only the top max_posts are kept
+        posts = heapq.nlargest(max_posts, unseen_posts(), key=post_priority) if max_posts else list(unseen_posts())
+    else:
+        posts, _ = reservoir_by_subreddit(unseen_posts(), max_posts or None, seed=seed)
+    print(f"Found {read['posts']} posts")
+    if seen_index is not None:
+        print(f"Skipping {read['skipped_seen']} posts analyzed in earlier runs")
     
-    # Prepare texts
-    texts = []
-    for post in posts:
-        # Combine title and text
-        full_text = f"{post['title']}. {post.get('text', '')}"
-        texts.append(full_text)
+    sampler = StratifiedSampler(posts, weights=subreddit_weights, seed=seed)
+    stop_rule = None
+    if backend == 'local':
+        print(f"Local mode: scoring {max_posts or 'all'} posts with {local_model_file}")
+    elif deadline_seconds:
+        print(f"Anytime mode: highest-engagement posts first, {deadline_seconds}s deadline")
+    elif bulk:
+        print(f"Bulk mode: batching {max_posts or 'all'} posts across {len(sampler.pools)} subreddits")
+    elif target_ci_width:
+        stop_rule = ConfidenceStopRule(EMOTIONS, target_width=target_ci_width, confidence=confidence)
+        print(f"Sampling across {len(sampler.pools)} subreddits until CI width < {target_ci_width} "
+              f"(max {max_posts or 'all'} posts)")
+    else:
+        print(f"Sampling {max_posts or 'all'} posts across {len(sampler.pools)} subreddits (cost control)")
     
-    # Analyze
-    analyzer = SentimentAnalyzer()
-    print("\nAnalyzing emotions...")
-    analyses = analyzer.analyze_batch(texts)
+    # Combine title and text, lazily so unsampled posts are never prepared
+    drawn, tagged = tee(sampler)
+    texts = (f"{post['title']}. {post.get('text', '')}" for post in drawn)
+    tags = (post_tags(post) for post in tagged)
     
-    # Aggregate
-    print("\nAggregating results...")
-    aggregated = analyzer.aggregate_emotions(analyses)
+    label_cache = LabelCache(label_cache_file) if label_cache_file else None
+    theme_index = ThemeIndex.load(theme_index_file) if theme_index_file else ThemeIndex()
+    dispatcher = make_dispatcher(max_cost_usd, tpm_limit, rpm_limit)
+    local_model = None
+    if backend == 'local':
+        # emotion_distiller imports this module, so it is only loaded when needed
+        from emotion_distiller import LocalEmotionModel
+        local_model = LocalEmotionModel.load(local_model_file)
+    analyzer = SentimentAnalyzer(dispatcher=dispatcher, label_cache=label_cache, local_model=local_model,
+                                 theme_index=theme_index)
     
-    # Save results
-    results = {
-        'aggregated': aggregated,
-        'individual_analyses': analyses,
-        'metadata': {
-            'source_file': reddit_json_file,
-            'total_posts_analyzed': len(analyses),
-            'collected_at': data.get('metadata', {}).get('collected_at')
+    def build_results(analyses, aggregated, extra_metadata=None):
+        return {
+            'aggregated': aggregated,
+            'individual_analyses': analyses,
+            'metadata': {
+                'source_file': reddit_json_file,
+                'total_posts_analyzed': len(analyses),
+                'collected_at': metadata.get('collected_at'),
+                'analyzed_at': datetime.utcnow().isoformat(),
+                'parse_stats': {
+                    **analyzer.parse_stats,
+                    'parse_failure_rate': round(analyzer.parse_failure_rate(), 4)
+                },
+                'model_tiers': analyzer.metrics.tier_report(),
+                'truncated': analyzer.truncated,
+                'dispatcher': dispatcher.report() if dispatcher else None,
+                'sampling': {
+                    'posts_read': read['posts'],
+                    'posts_drawn': sampler.drawn,
+                    'subreddit_weights': sampler.weights,
+                    'target_ci_width': target_ci_width,
+                    'confidence': confidence,
+                    'confidence_intervals': stop_rule.intervals() if stop_rule else None
+                },
+                **(extra_metadata or {})
+            }
         }
-    }
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    # Analyze
+    print("\nAnalyzing emotions...")
+    extra_metadata = None
+    if deadline_seconds and backend != 'local':
+        last_publish = [time.monotonic()]
+        
+        def publish_partial(analyses, aggregated):
+            if time.monotonic() - last_publish[0] >= publish_interval:
+                write_results(output_file, build_results(list(analyses), aggregated, {'partial': True}))
+                last_publish[0] = time.monotonic()
+        
+        analyses, aggregated, info = analyzer.analyze_until_deadline(
+            posts, deadline_seconds, max_items=max_posts, on_update=publish_partial)
+        extra_metadata = {'partial': False, 'anytime': info}
+    else:
+        if backend == 'local':
+            texts = list(islice(texts, max_posts)) if max_posts else list(texts)
+            analyses = analyzer.analyze_batch(texts, backend='local')
+            for analysis, tag in zip(analyses, tags):
+                analysis.update(tag)
+        elif bulk:
+            texts = list(islice(texts, max_posts)) if max_posts else list(texts)
+            analyses = analyzer.analyze_bulk(texts, poll_interval=poll_interval, tags=list(islice(tags, len(texts))))
+        else:
+            analyses = analyzer.analyze_sequential(texts, stop_rule=stop_rule, max_items=max_posts, tags=tags)
+        
+        # Aggregate
+        print("\nAggregating results...")
+        aggregated = analyzer.aggregate_emotions(analyses)
+    
+    # Count this run's themes in the hour each post was written, not the hour it was analyzed
+    for analysis in analyses:
+        created = created_timestamp(analysis)
+        for theme in analysis.get('themes') or []:
+            theme_index.add(theme, created)
+    if theme_retention_hours:
+        theme_index.prune(time.time() - theme_retention_hours * 3600)
+    if aggregated:
+        aggregated['trending_themes_24h'] = theme_index.top(10, since=time.time() - 24 * 3600)
+    if theme_index_file:
+        theme_index.save(theme_index_file)
+    if seen_index is not None:
+        seen_index.add(analysis['post_id'] for analysis in analyses if analysis.get('post_id'))
+    if os.path.isdir(reddit_json_file):
+        from post_store import write_analyses
+        write_analyses(analyses, reddit_json_file)
+    
+    # Save results, with per-subreddit/hour/theme and per-state views from the same analyses
+    from rollups import rollup_analyses
+    results = build_results(analyses, aggregated, extra_metadata)
+    results['rollups'] = rollup_analyses(analyses, theme_index=theme_index)
+    results['state_data'] = state_aggregates(analyses, theme_index)
+    write_results(output_file, results)
+    analyzer.metrics.dump(metrics_file_for(output_file), {'prompt_fingerprint': analyzer.prompt_fingerprint()})
     
-    print(f"\n✓ Results saved to {output_file}")
+    print(f"\n✓ Results saved to {output_file} (call metrics in {metrics_file_for(output_file)})")
     
     # Print summary
     print("\n" + "=" * 60)
@@ -238,6 +1236,110 @@ def analyze_reddit_data(reddit_json_file, output_file='sentiment_results.json',
             print(f"  • {theme_data['theme']} ({theme_data['count']} mentions)")
     
     print("=" * 60)
+    return results
+
+
+def _threads_with_comments(posts, top_n):
+    """Yield (post, comments): stored comments first, then fetched ones as they arrive"""
+    missing = {}
+    for post in posts:
+        if post.get('comments') is None:
+            missing[post['id']] = post
+        else:
+            yield post, post['comments']
+    if not missing:
+        return
+    
+    from reddit_collector import RedditCollector
+    for post_id, comments, error in RedditCollector().collect_comments_bulk(list(missing), limit=top_n):
+        if error is not None:
+            print(f"  ✗ Could not fetch comments for {post_id}: {error}")
+            comments = []
+        yield missing[post_id], comments
+
+
+def analyze_reddit_threads(reddit_json_file, output_file='thread_results.json', max_threads=20,
+                           top_n=20, token_budget=2000, seen_index=None, post_filters=None,
+                           max_cost_usd=None, tpm_limit=None, rpm_limit=None):
+    """
+    Analyze posts together with their top comments, one API call per thread
+    
+    Comments are taken from each post's 'comments' list when present, otherwise
+    fetched concurrently with RedditCollector.collect_comments_bulk; each thread
+    is analyzed as soon as its comments arrive.
+    
+    Args:
+        reddit_json_file: Path to the collector's JSON or JSONL file
+        output_file: Where to save thread results
+        max_threads: Maximum number of threads to analyze (highest engagement first)
+        top_n: Comments packed per thread
+        token_budget: Approximate input tokens per thread
+        seen_index: SeenIndex of threads analyzed by earlier runs; those are skipped
+                    and this run's threads are added (None = analyze everything)
+        post_filters: Only analyze posts matching these post_store filters
+                      (subreddits, since, until, min_score)
+        max_cost_usd: Hard cap on estimated API spend for this run (None = no cap)
+        tpm_limit, rpm_limit: Token and request per-minute ceilings for the API calls
+    """
+    print("=" * 60)
+    print("THE HUMAN PULSE - Thread Analyzer")
+    print("=" * 60)
+    
+    posts = iter_reddit_posts(reddit_json_file, filters=post_filters)
+    if seen_index is not None:
+        posts = (post for post in posts if post['id'] not in seen_index)
+    if max_threads:
+        posts = heapq.nlargest(max_threads, posts, key=post_priority)
+    else:
+        posts = sorted(posts, key=post_priority, reverse=True)
+    print(f"\nAnalyzing {len(posts)} threads (top {top_n} comments each)")
+    
+    dispatcher = make_dispatcher(max_cost_usd, tpm_limit, rpm_limit)
+    analyzer = SentimentAnalyzer(dispatcher=dispatcher)
+    threads = []
+    for i, (post, comments) in enumerate(_threads_with_comments(posts, top_n), 1):
+        print(f"Analyzing thread {i}/{len(posts)}...", end='\r')
+        try:
+            result = analyzer.analyze_thread(post, comments, top_n=top_n, token_budget=token_budget)
+        except BudgetExceeded as e:
+            analyzer.truncated = True
+            print(f"\n⚠️  {e} - stopping after {i - 1} threads")
+            break
+        if result:
+            threads.append(result)
+    
+    print(f"\nCompleted: {len(threads)}/{len(posts)} threads analyzed")
+    analyzer.print_run_stats()
+    if seen_index is not None:
+        seen_index.add(thread['post_id'] for thread in threads if thread.get('post_id'))
+    
+    aggregated = analyzer.aggregate_emotions([t['thread'] for t in threads])
+    if aggregated:
+        aggregated['avg_disagreement'] = round(sum(t['disagreement'] for t in threads) / len(threads), 1)
+    
+    results = {
+        'aggregated': aggregated,
+        'threads': threads,
+        'metadata': {
+            'source_file': reddit_json_file,
+            'threads_analyzed': len(threads),
+            'comments_analyzed': sum(t['comments_analyzed'] for t in threads),
+            'api_calls': len(analyzer.metrics.calls),
+            'truncated': analyzer.truncated,
+            'dispatcher': dispatcher.report() if dispatcher else None,
+            'analyzed_at': datetime.utcnow().isoformat()
+        }
+    }
+    write_results(output_file, results)
+    analyzer.metrics.dump(metrics_file_for(output_file), {'prompt_fingerprint': analyzer.prompt_fingerprint()})
+    print(f"✓ Thread results saved to {output_file} (call metrics in {metrics_file_for(output_file)})")
+    
+    if threads:
+        print("\nMOST DIVIDED THREADS:")
+        for thread in sorted(threads, key=lambda t: t['disagreement'], reverse=True)[:5]:
+            print(f"  • {thread['post_id']} (r/{thread['subreddit']}): disagreement {thread['disagreement']}")
+    print("=" * 60)
+    return results
 
 
 if __name__ == '__main__':
@@ -0,0 +1,169 @@
+"""
+Sentiment Sampler for The Human Pulse
+Draws posts across subreddits by weight and stops analysis once emotion means are precise enough
+"""
+
+import random
+from statistics import NormalDist
+
+
+class RunningStats:
+    """Running mean/variance of one series (Welford's algorithm)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        """Sample variance (0 until there are two values)"""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    def ci_half_width(self, z):
+        """Half-width of the normal confidence interval on the mean"""
+        if self.count < 2:
+            return float('inf')
+        return z * (self.variance / self.count) ** 0.5
+
+
+def reservoir_by_subreddit(posts, per_subreddit=None, seed=None):
+    """
+    Keep a uniform random sample of at most per_subreddit posts from each subreddit
+
+    Reads posts in one pass (Algorithm R per subreddit), so a streamed corpus of
+    any size costs memory for the kept posts only. StratifiedSampler never draws
+    more than max_posts from one subreddit, so sampling its input down to
+    max_posts per subreddit leaves its draws unchanged in distribution.
+
+    Args:
+        posts: Iterable of post dictionaries (must have 'subreddit')
+        per_subreddit: Posts kept per subreddit (None = keep everything)
+        seed: Random seed for reproducible samples
+
+    Returns:
+        (sampled posts, number of posts read) tuple
+    """
+    rng = random.Random(seed)
+    reservoirs = {}
+    seen = {}
+    for post in posts:
+        sub = post.get('subreddit', 'unknown')
+        reservoir = reservoirs.setdefault(sub, [])
+        seen[sub] = seen.get(sub, 0) + 1
+        if per_subreddit is None or len(reservoir) < per_subreddit:
+            reservoir.append(post)
+        else:
+            slot = rng.randrange(seen[sub])
+            if slot < per_subreddit:
+                reservoir[slot] = post
+    return [post for reservoir in reservoirs.values() for post in reservoir], sum(seen.values())
+
+
+class StratifiedSampler:
+    """
+    Yields posts interleaved across subreddits in proportion to a weighting
+
+    Subreddits without a weight get 1.0; a weight of 0 excludes the subreddit.
+    Order within each subreddit is shuffled so no listing position is favored.
+    """
+
+    def __init__(self, posts, weights=None, seed=None):
+        """
+        Args:
+            posts: List of post dictionaries (must have 'subreddit')
+            weights: Dict of subreddit -> relative sampling weight
+            seed: Random seed for reproducible draws
+        """
+        rng = random.Random(seed)
+        weights = weights or {}
+
+        self.pools = {}
+        for post in posts:
+            self.pools.setdefault(post.get('subreddit', 'unknown'), []).append(post)
+        for pool in self.pools.values():
+            rng.shuffle(pool)
+
+        self.weights = {sub: float(weights.get(sub, 1.0)) for sub in self.pools}
+        self.drawn = {sub: 0 for sub in self.pools}
+
+    def __iter__(self):
+        # Smooth weighted round-robin: each draw goes to the subreddit furthest
+        # behind its weighted share, skipping exhausted pools
+        credit = {sub: 0.0 for sub in self.pools}
+        while True:
+            active = [sub for sub, pool in self.pools.items()
+                      if self.weights[sub] > 0 and self.drawn[sub] < len(pool)]
+            if not active:
+                return
+
+            total = sum(self.weights[sub] for sub in active)
+            for sub in active:
+                credit[sub] += self.weights[sub]
+            chosen = max(active, key=lambda sub: credit[sub])
+            credit[chosen] -= total
+
+            post = self.pools[chosen][self.drawn[chosen]]
+            self.drawn[chosen] += 1
+            yield post
+
+
+class ConfidenceStopRule:
+    """Stops sampling once every emotion's confidence interval is narrower than a target width"""
+
+    def __init__(self, emotions, target_width=10.0, confidence=0.95, min_samples=10):
+        """
+        Args:
+            emotions: Emotion keys to track
+            target_width: Full interval width (score points) each emotion must get under
+            confidence: Confidence level of the intervals
+            min_samples: Never stop before this many analyses
+        """
+        self.target_width = target_width
+        self.confidence = confidence
+        self.min_samples = min_samples
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.stats = {emotion: RunningStats() for emotion in emotions}
+
+    def add(self, analysis):
+        """Fold one analysis into the running estimates"""
+        for emotion, stats in self.stats.items():
+            if analysis.get(emotion) is not None:
+                stats.add(analysis[emotion])
+
+    def done(self):
+        """True when every interval is narrower than the target width"""
+        if any(stats.count < self.min_samples for stats in self.stats.values()):
+            return False
+        return all(2 * stats.ci_half_width(self.z) < self.target_width
+                   for stats in self.stats.values())
+
+    def intervals(self):
+        """
+        Current confidence intervals
+
+        Returns:
+            Dictionary of emotion -> {'mean', 'low', 'high', 'n'}
+        """
+        intervals = {}
+        for emotion, stats in self.stats.items():
+            half = stats.ci_half_width(self.z)
+            if half == float('inf'):
+                low, high = None, None
+            else:
+                low, high = round(max(0.0, stats.mean - half), 1), round(min(100.0, stats.mean + half), 1)
+            intervals[emotion] = {
+                'mean': round(stats.mean, 1),
+                'low': low,
+                'high': high,
+                'n': stats.count
+            }
+        return intervals
@@ -0,0 +1,292 @@
+"""
+Stream Pipeline for The Human Pulse
+Streams new submissions from the target subreddits straight into analyzer workers and keeps
+a rolling emotion aggregate published every few seconds
+
+Usage:
+    python stream_pipeline.py [output_file]
+"""
+
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from location_tagger import state_aggregates
+from api_dispatcher import BudgetExceeded
+from sentiment_analyzer import SentimentAnalyzer, RunningAggregate, post_tags, write_results
+from theme_index import ThemeIndex
+
+# Call records kept for the metrics summary; a stream runs for days
+MAX_METRIC_CALLS = 10000
+
+# Reconnect delays after the Reddit stream fails (doubling up to the maximum)
+STREAM_RETRY_SECONDS = 5
+STREAM_MAX_RETRY_SECONDS = 300
+
+# Post IDs remembered across reconnects so replayed posts are not analyzed twice
+STREAM_SEEN_IDS = 1000
+
+
+class StreamPipeline:
+    """
+    Producer -> bounded queue -> analyzer workers -> rolling aggregate
+
+    The queue is the backpressure point: when the API slows down the workers
+    drain it more slowly, the queue fills, and the producer blocks instead of
+    buffering an unbounded backlog.
+    """
+
+    def __init__(self, analyzer=None, collector=None, subreddits=None, queue_size=100, workers=4,
+                 window_minutes=60, output_file='sentiment_results.json', publish_interval=5):
+        """
+        Args:
+            analyzer: SentimentAnalyzer (give it an APIDispatcher to share rate limits)
+            collector: RedditCollector used for the submission stream (created on first use)
+            subreddits: Subreddits to stream (default TARGET_SUBREDDITS)
+            queue_size: Posts allowed to wait for a worker before the producer blocks
+            workers: Concurrent analyzer workers
+            window_minutes: Rolling aggregate covers posts analyzed in this many minutes
+            output_file: Where the rolling results are published
+            publish_interval: Seconds between publishes
+        """
+        self.analyzer = analyzer or SentimentAnalyzer()
+        self.collector = collector
+        self.subreddits = subreddits
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.workers = workers
+        self.window_seconds = window_minutes * 60
+        self.output_file = output_file
+        self.publish_interval = publish_interval
+        self.theme_index = ThemeIndex()   # rebuilt from the window's analyses at every snapshot
+        self.analyzer.metrics.cap(MAX_METRIC_CALLS)
+
+        self.recent = deque()   # (analyzed_at monotonic, analysis) inside the window
+        self.stats = {
+            'received': 0,
+            'analyzed': 0,
+            'failed': 0,
+            'backpressure_waits': 0,
+            'last_lag_seconds': None
+        }
+        self.started = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        """Ask the producer, workers and publisher to finish"""
+        self._stop.set()
+
+    def submissions(self):
+        """
+        Yield new posts from the target subreddits as they are submitted
+
+        Uses one combined-subreddit stream; pause_after=0 makes it yield None
+        when nothing is new, so the loop can notice stop(). When the stream
+        fails it is reopened after a growing delay, replaying the newest posts
+        so none submitted during the outage are missed (repeats are skipped).
+        """
+        from reddit_collector import RedditCollector, TARGET_SUBREDDITS
+
+        collector = self.collector or RedditCollector()
+        subreddits = self.subreddits or TARGET_SUBREDDITS
+        by_name = {name.lower(): name for name in subreddits}
+        seen = deque(maxlen=STREAM_SEEN_IDS)
+        failures = 0
+
+        while not self._stop.is_set():
+            try:
+                combined = collector._thread_reddit().subreddit('+'.join(subreddits))
+                stream = combined.stream.submissions(skip_existing=not seen, pause_after=0)
+                for post in stream:
+                    if self._stop.is_set():
+                        return
+                    failures = 0
+                    if post is None:
+                        time.sleep(1)
+                        continue
+                    if post.id in seen:
+                        continue
+                    seen.append(post.id)
+                    name = by_name.get(str(post.subreddit).lower(), str(post.subreddit))
+                    yield collector._post_data(post, name)
+            except Exception as e:
+                delay = min(STREAM_MAX_RETRY_SECONDS, STREAM_RETRY_SECONDS * 2 ** failures)
+                failures += 1
+                print(f"\n⚠️  Stream failed ({e}) - reconnecting in {delay}s")
+                self._stop.wait(delay)
+
+    def submit(self, post):
+        """
+        Queue one post for analysis, blocking while the queue is full
+
+        Returns:
+            False if the pipeline was stopped while waiting
+        """
+        self.stats['received'] += 1
+        if self.queue.full():
+            self.stats['backpressure_waits'] += 1
+        while not self._stop.is_set():
+            try:
+                self.queue.put(post, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, source):
+        try:
+            for post in source:
+                if not self.submit(post) or self._stop.is_set():
+                    break
+        except Exception as e:
+            print(f"\n❌ Stream failed: {e}")
+            self.stop()
+
+    def _work(self):
+        # On stop, finish the current post and abandon the rest of the queue
+        while not self._stop.is_set():
+            try:
+                post = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                text = f"{post['title']}. {post.get('text', '')}"
+                result = self.analyzer.analyze_text(text)
+            except BudgetExceeded as e:
+                print(f"\n⚠️  {e} - stopping stream")
+                self.analyzer.truncated = True
+                self.stop()
+                result = None
+            except Exception as e:
+                print(f"\n⚠️  Analysis failed: {e}")
+                result = None
+            finally:
+                self.queue.task_done()
+
+            if not result:
+                with self._lock:
+                    self.stats['failed'] += 1
+                continue
+            result.update(post_tags(post))
+            with self._lock:
+                self.recent.append((time.monotonic(), result))
+                self.stats['analyzed'] += 1
+                self.stats['last_lag_seconds'] = _lag_seconds(post)
+
+    def snapshot(self):
+        """
+        Rolling aggregate over the analyses completed inside the window
+
+        Returns:
+            Results dictionary in the analyze_reddit_data shape
+        """
+        with self._lock:
+            cutoff = time.monotonic() - self.window_seconds
+            while self.recent and self.recent[0][0] < cutoff:
+                self.recent.popleft()
+            analyses = [analysis for _, analysis in self.recent]
+            stats = dict(self.stats)
+
+        # A fresh index per snapshot holds only the window's themes, so it cannot grow without bound
+        self.theme_index = ThemeIndex()
+        aggregate = RunningAggregate(self.theme_index)
+        for analysis in analyses:
+            aggregate.add(analysis)
+
+        elapsed = time.monotonic() - self.started if self.started else 0
+        return {
+            'aggregated': aggregate.snapshot(),
+            'individual_analyses': analyses,
+            'state_data': state_aggregates(analyses, self.theme_index),
+            'metadata': {
+                'source': 'reddit_stream',
+                'total_posts_analyzed': len(analyses),
+                'window_minutes': self.window_seconds / 60,
+                'analyzed_at': datetime.utcnow().isoformat(),
+                'stream': {
+                    **stats,
+                    'queue_depth': self.queue.qsize(),
+                    'queue_size': self.queue.maxsize,
+                    'posts_per_minute': round(stats['analyzed'] / elapsed * 60, 1) if elapsed else 0.0
+                },
+                'truncated': self.analyzer.truncated,
+                'dispatcher': self.analyzer.dispatcher.report() if self.analyzer.dispatcher else None
+            }
+        }
+
+    def publish(self):
+        """Write the rolling snapshot to output_file"""
+        results = self.snapshot()
+        write_results(self.output_file, results)
+        stream = results['metadata']['stream']
+        lag = stream['last_lag_seconds']
+        lag_text = f"lag {lag:.0f}s" if lag is not None else "lag -"
+        print(f"📡 {stream['analyzed']} analyzed, queue {stream['queue_depth']}/{stream['queue_size']}, "
+              f"{lag_text}, {stream['posts_per_minute']}/min", end='\r')
+        return results
+
+    def run(self, source=None, duration=None):
+        """
+        Stream, analyze and publish until stop(), Ctrl+C, duration or the source ends
+
+        Args:
+            source: Iterable of post dictionaries (default: the live Reddit stream)
+            duration: Stop after this many seconds (None = run until stopped)
+
+        Returns:
+            The final published results
+        """
+        self.started = time.monotonic()
+        self._stop.clear()
+        producer = threading.Thread(target=self._produce, args=(source if source is not None else self.submissions(),),
+                                    daemon=True)
+        workers = [threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)]
+        producer.start()
+        for worker in workers:
+            worker.start()
+
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(self.publish_interval)
+                self.publish()
+                if duration is not None and time.monotonic() - self.started >= duration:
+                    self.stop()
+                if not producer.is_alive() and self.queue.empty():
+                    # Finite source fully consumed: let workers finish in-flight posts
+                    self.queue.join()
+                    self.stop()
+        except KeyboardInterrupt:
+            print("\n⚠️  Stopping stream...")
+            self.stop()
+
+        for worker in workers:
+            worker.join(timeout=30)
+        results = self.publish()
+        print(f"\n✓ Stream stopped - {self.stats['analyzed']} analyzed, results in {self.output_file}")
+        self.analyzer.print_run_stats()
+        return results
+
+
+def _lag_seconds(post):
+    """Seconds between a post's creation and now"""
+    try:
+        return max(0.0, time.time() - datetime.fromisoformat(post['created_utc']).timestamp())
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def main():
+    output_file = sys.argv[1] if len(sys.argv) > 1 else 'sentiment_results.json'
+
+    print("=" * 60)
+    print("THE HUMAN PULSE - Stream Pipeline (Ctrl+C to stop)")
+    print("=" * 60)
+
+    StreamPipeline(output_file=output_file).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""
+Theme Index for The Human Pulse
+Maps free-text themes and struggles ("Job insecurity", "job-security") to canonical IDs
+and keeps running counts per time window for instant top-k queries
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+
+THEMES_FILE = 'theme_index.json'
+
+# Width of a counting window (one hour)
+WINDOW_SECONDS = 3600
+
+# Windows older than this are pruned before the index is saved
+RETENTION_HOURS = 30 * 24
+
+# Trigram Dice similarity needed to merge a new theme into an existing one
+MATCH_THRESHOLD = 0.7
+
+# Shorter key / longer key needed for a fuzzy match, so a phrase does not merge
+# into a shorter theme it contains ("stock market crash" is not "stock market")
+MIN_LENGTH_RATIO = 0.8
+
+STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'to', 'for', 'in', 'on', 'with',
+             'about', 'my', 'your', 'our', 'their', 'over'}
+
+# Longest suffixes first; a stem keeps at least three characters
+SUFFIXES = ['ations', 'ation', 'ities', 'ness', 'ment', 'ings', 'ing', 'ies',
+            'ity', 'ers', 'ed', 'es', 'er', 'ly', 's', 'y']
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def stem(word):
+    """Light suffix-stripping stemmer (job/jobs, worry/worries, secure/security)"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word.rstrip('e') if len(word) > 3 else word
+
+
+def theme_key(text):
+    """
+    Canonical lookup key for a theme: lowercase, punctuation and stopwords
+    dropped, each word stemmed ("Cost-of-living" -> "cost liv")
+    """
+    words = [w.strip("'") for w in WORD_PATTERN.findall(text.lower())]
+    return ' '.join(stem(w) for w in words if w and w not in STOPWORDS)
+
+
+def trigrams(key):
+    """Character trigrams of a key, padded so word starts count"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ThemeIndex:
+    """
+    Incremental theme canonicalizer with windowed counts
+
+    Resolution goes: exact raw text -> exact key -> key without spaces
+    ("lay off" == "layoff") -> trigram fuzzy match; a theme that matches nothing
+    becomes a new canonical entry. Every step is a dictionary lookup except the
+    fuzzy match, which only scores entries sharing one of the key's rarer trigrams.
+    """
+
+    def __init__(self, window_seconds=WINDOW_SECONDS, match_threshold=MATCH_THRESHOLD):
+        self.window_seconds = window_seconds
+        self.match_threshold = match_threshold
+        self.entries = []          # id -> {'label', 'key', 'grams', 'aliases': {surface: count}}
+        self.totals = {}           # id -> count over all windows
+        self.windows = {}          # window start (epoch seconds) -> {id: count}
+        self._by_text = {}         # lowercased raw text -> id
+        self._by_key = {}          # key -> id
+        self._by_compact = {}      # key without spaces -> id
+        self._by_trigram = {}      # trigram -> set of ids
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def resolve(self, text):
+        """
+        Canonical ID for a theme, creating a new entry if nothing matches
+
+        Returns:
+            Integer ID, or None for empty text
+        """
+        surface = ' '.join(text.lower().split())
+        if not surface:
+            return None
+
+        with self._lock:
+            theme_id = self._by_text.get(surface)
+            if theme_id is None:
+                theme_id = self._match(theme_key(surface), surface)
+                self._by_text[surface] = theme_id
+            return theme_id
+
+    def _match(self, key, surface):
+        if not key:
+            key = surface
+        theme_id = self._by_key.get(key)
+        if theme_id is None:
+            theme_id = self._by_compact.get(key.replace(' ', ''))
+        if theme_id is None:
+            theme_id = self._fuzzy(key)
+        if theme_id is None:
+            theme_id = self._create(key, surface)
+        else:
+            self._by_key.setdefault(key, theme_id)
+        return theme_id
+
+    def _fuzzy(self, key):
+        grams = trigrams(key)
+        # A match at the threshold shares at least t/(2-t) of the key's trigrams, so
+        # it must contain one of the rarest remaining ones (prefix filtering) - probing
+        # only those keeps common trigrams like "  j" from touching every entry
+        min_overlap = math.ceil(self.match_threshold / (2 - self.match_threshold) * len(grams))
+        ranked = sorted(grams, key=lambda gram: len(self._by_trigram.get(gram, ())))
+        candidates = set()
+        for gram in ranked[:len(grams) - min_overlap + 1]:
+            candidates.update(self._by_trigram.get(gram, ()))
+
+        best_id, best_score = None, self.match_threshold
+        for theme_id in candidates:
+            other_key = self.entries[theme_id]['key']
+            if min(len(key), len(other_key)) < MIN_LENGTH_RATIO * max(len(key), len(other_key)):
+                continue
+            other = self.entries[theme_id]['grams']
+            score = 2 * len(grams & other) / (len(grams) + len(other))
+            if score >= best_score:
+                best_id, best_score = theme_id, score
+        return best_id
+
+    def _create(self, key, surface):
+        theme_id = len(self.entries)
+        grams = trigrams(key)
+        self.entries.append({'label': surface, 'key': key, 'grams': grams, 'aliases': {}})
+        self._by_key[key] = theme_id
+        self._by_compact.setdefault(key.replace(' ', ''), theme_id)
+        for gram in grams:
+            self._by_trigram.setdefault(gram, set()).add(theme_id)
+        return theme_id
+
+    def add(self, text, timestamp=None, count=1):
+        """
+        Resolve a theme and count it in the window containing timestamp
+
+        Args:
+            text: Free-text theme or struggle
+            timestamp: Epoch seconds (defaults to now)
+            count: How many mentions to add
+
+        Returns:
+            Canonical ID (None for empty text)
+        """
+        theme_id = self.resolve(text)
+        if theme_id is None:
+            return None
+
+        surface = ' '.join(text.lower().split())
+        window = int((timestamp if timestamp is not None else time.time()) // self.window_seconds) * self.window_seconds
+        with self._lock:
+            entry = self.entries[theme_id]
+            aliases = entry['aliases']
+            aliases[surface] = aliases.get(surface, 0) + count
+            # The most common wording becomes the display label
+            if aliases[surface] > aliases.get(entry['label'], 0):
+                entry['label'] = surface
+            self.totals[theme_id] = self.totals.get(theme_id, 0) + count
+            counts = self.windows.setdefault(window, {})
+            counts[theme_id] = counts.get(theme_id, 0) + count
+        return theme_id
+
+    def label(self, theme_id):
+        """Display label for a canonical ID"""
+        return self.entries[theme_id]['label']
+
+    def top(self, k=10, since=None, until=None):
+        """
+        Most-mentioned themes overall or within a time range
+
+        Args:
+            k: Number of themes to return
+            since: Only count windows that end after this epoch time
+            until: Only count windows starting before this epoch time
+
+        Returns:
+            List of {'id', 'theme', 'count'} dictionaries, most mentioned first
+        """
+        with self._lock:
+            if since is None and until is None:
+                counts = self.totals
+            else:
+                counts = {}
+                for window, window_counts in self.windows.items():
+                    if (since is None or window + self.window_seconds > since) and (until is None or window < until):
+                        for theme_id, count in window_counts.items():
+                            counts[theme_id] = counts.get(theme_id, 0) + count
+            ranked = heapq.nlargest(k, counts.items(), key=lambda item: item[1])
+            return [{'id': theme_id, 'theme': self.entries[theme_id]['label'], 'count': count}
+                    for theme_id, count in ranked]
+
+    def prune(self, before):
+        """
+        Drop windows that start before an epoch time (their mentions leave the totals too)
+
+        Themes left without a mention in any remaining window are removed with
+        their aliases, and the remaining themes are renumbered, so IDs from
+        before a prune are no longer valid.
+        """
+        with self._lock:
+            for window in [w for w in self.windows if w < before]:
+                for theme_id, count in self.windows.pop(window).items():
+                    self.totals[theme_id] -= count
+                    if not self.totals[theme_id]:
+                        del self.totals[theme_id]
+            if len(self.totals) == len(self.entries):
+                return
+
+            live = sorted(self.totals)
+            remap = {old_id: new_id for new_id, old_id in enumerate(live)}
+            entries = [self.entries[old_id] for old_id in live]
+            self.entries = []
+            self._by_text, self._by_key, self._by_compact, self._by_trigram = {}, {}, {}, {}
+            for entry in entries:
+                theme_id = self._create(entry['key'], entry['label'])
+                self.entries[theme_id]['aliases'] = entry['aliases']
+                for surface in entry['aliases']:
+                    self._by_text[surface] = theme_id
+            self.totals = {remap[theme_id]: count for theme_id, count in self.totals.items()}
+            self.windows = {window: {remap[theme_id]: count for theme_id, count in counts.items()}
+                            for window, counts in self.windows.items()}
+
+    def save(self, filename=THEMES_FILE):
+        """Save entries, aliases and windowed counts as JSON (written atomically)"""
+        with self._lock:
+            data = {
+                'window_seconds': self.window_seconds,
+                'match_threshold': self.match_threshold,
+                'themes': [{'id': i, 'label': e['label'], 'key': e['key'], 'aliases': e['aliases']}
+                           for i, e in enumerate(self.entries)],
+                'windows': {str(w): {str(i): c for i, c in counts.items()}
+                            for w, counts in self.windows.items()}
+            }
+        tmp_file = f"{filename}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, filename)
+
+    @classmethod
+    def load(cls, filename=THEMES_FILE):
+        """Load an index saved with save() (an empty index if the file does not exist)"""
+        if not os.path.exists(filename):
+            return cls()
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        index = cls(window_seconds=data.get('window_seconds', WINDOW_SECONDS),
+                    match_threshold=data.get('match_threshold', MATCH_THRESHOLD))
+        for theme in data.get('themes', []):
+            theme_id = index._create(theme['key'], theme['label'])
+            index.entries[theme_id]['aliases'] = theme.get('aliases', {})
+            for surface in theme.get('aliases', {}):
+                index._by_text[surface] = theme_id
+        for window, counts in data.get('windows', {}).items():
+            window_counts = index.windows.setdefault(int(window), {})
+            for theme_id, count in counts.items():
+                window_counts[int(theme_id)] = count
+                index.totals[int(theme_id)] = index.totals.get(int(theme_id), 0) + count
+        return index
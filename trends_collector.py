@@ -1,11 +1,21 @@
-from pytrends.request import TrendReq
 import json
 import time
 import os
 from datetime import datetime
 
-# Initialize PyTrends
-pytrends = TrendReq(hl='en-US', tz=360)
+# PyTrends is created on first use: its constructor does a cookie handshake
+# with Google and pulls in pandas, which importing this module should not do
+_pytrends = None
+
+
+def get_pytrends():
+    """Shared TrendReq instance, created on first use"""
+    global _pytrends
+    if _pytrends is None:
+        from pytrends.request import TrendReq
+        _pytrends = TrendReq(hl='en-US', tz=360)
+    return _pytrends
+
 
 # US States mapping
 US_STATES = {
@@ -109,8 +119,8 @@ def collect_data_by_state(keywords, description):
         try:
             # Collect data for each batch
             for batch_num, keyword_batch in enumerate(keyword_batches, 1):
-                pytrends.build_payload(keyword_batch, timeframe='now 1-d', geo=state_code)
-                data = pytrends.interest_over_time()
+                get_pytrends().build_payload(keyword_batch, timeframe='now 1-d', geo=state_code)
+                data = get_pytrends().interest_over_time()
                 
                 if not data.empty:
                     # Add this batch's keywords to state results
@@ -139,8 +149,8 @@ def collect_data_by_state(keywords, description):
 def get_related_queries(keyword, state_code):
     """Get related rising queries for a specific keyword and state"""
     try:
-        pytrends.build_payload([keyword], timeframe='now 7-d', geo=state_code)
-        related = pytrends.related_queries()
+        get_pytrends().build_payload([keyword], timeframe='now 7-d', geo=state_code)
+        related = get_pytrends().related_queries()
         
         if related and keyword in related:
             rising = related[keyword]['rising']
@@ -380,6 +390,7 @@ def main():
     
     print(f"\n💾 Data saved to: sentiment_results.json")
     print("=" * 60)
+    return results
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,11 @@
 import json
 from datetime import datetime
 
-def process_trends_data():
+def process_trends_data(input_file='trends_data.json', output_file='sentiment_results.json'):
     """Process Google Trends data into dashboard format"""
     
     # Load the trends data
-    with open('trends_data.json', 'r') as f:
+    with open(input_file, 'r') as f:
         trends = json.load(f)
     
     # Calculate average emotions across all states
@@ -65,7 +65,7 @@ def process_trends_data():
     }
     
     # Save processed data
-    with open('sentiment_results.json', 'w') as f:
+    with open(output_file, 'w') as f:
         json.dump(dashboard_data, f, indent=2)
     
     print(f"✅ Processed Google Trends data!")
@@ -0,0 +1,239 @@
+"""
+Trends Stitcher for Panic Atlas
+Chains overlapping daily Google Trends chunks into one consistently scaled series per
+state and keyword batch
+
+Google rescales every response so its own peak is 100, and answers with daily
+points only for ranges of up to ~270 days. A long range is therefore requested
+as chunks that deliberately overlap; the overlapping days appear in both
+chunks, so their ratio is the scale factor between the two responses. Each
+chunk is rescaled onto the previous one and the chained series is finally
+rescaled so its overall peak is 100. Keywords requested together share one
+scale, so one factor per batch is estimated from all of the batch's keywords.
+
+Chunks are cached on disk and never requested twice.
+
+Usage:
+    python trends_stitcher.py [START_DATE] [END_DATE] [STATE_CODE ...]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from backtest_data_collector import BACKTEST_KEYWORDS, US_STATES, get_pytrends, keyword_batches
+
+CACHE_DIR = 'backtest_data/trends_cache'
+OUTPUT_FILE = 'backtest_data/stitched_trends.json'
+
+# Longest range Google Trends still answers with daily resolution
+DAILY_MAX_DAYS = 269
+
+# Days shared by consecutive chunks; more days give a steadier scale factor
+STITCH_OVERLAP_DAYS = 30
+
+
+def plan_chunks(start_date, end_date, overlap_days=STITCH_OVERLAP_DAYS, max_days=DAILY_MAX_DAYS):
+    """
+    Daily-resolution chunks covering [start_date, end_date], consecutive chunks sharing overlap_days days
+
+    Returns:
+        List of (start, end) YYYY-MM-DD pairs
+    """
+    if not 0 < overlap_days < max_days:
+        raise ValueError(f"overlap_days must be between 1 and {max_days - 1}, got {overlap_days}")
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    chunks = []
+    while True:
+        chunk_end = min(start + timedelta(days=max_days - 1), end)
+        chunks.append((start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')))
+        if chunk_end >= end:
+            return chunks
+        start = chunk_end - timedelta(days=overlap_days - 1)
+
+
+def cache_path(state_code, keyword_batch, start_date, end_date, cache_dir=CACHE_DIR):
+    batch_key = hashlib.blake2b('|'.join(keyword_batch).encode('utf-8'), digest_size=6).hexdigest()
+    return os.path.join(cache_dir, f"{state_code}_{batch_key}_{start_date}_{end_date}.json")
+
+
+def fetch_chunk(state_code, keyword_batch, start_date, end_date, cache_dir=CACHE_DIR):
+    """
+    Daily interest for one state, keyword batch and date range (read from the cache when present)
+
+    Returns:
+        ({'dates': [...], 'values': {keyword: [...]}}, fetched) tuple; fetched is
+        False for cache hits. Request errors are raised and nothing is cached.
+    """
+    path = cache_path(state_code, keyword_batch, start_date, end_date, cache_dir)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f), False
+
+    get_pytrends().build_payload(keyword_batch, timeframe=f'{start_date} {end_date}', geo=state_code)
+    data = get_pytrends().interest_over_time()
+    chunk = {'dates': [], 'values': {keyword: [] for keyword in keyword_batch}}
+    if not data.empty:
+        chunk['dates'] = [index.strftime('%Y-%m-%d') for index in data.index]
+        for keyword in keyword_batch:
+            chunk['values'][keyword] = (data[keyword].astype(int).tolist() if keyword in data.columns
+                                        else [0] * len(data))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(chunk, f)
+    return chunk, True
+
+
+def overlap_scale(series, chunk, pairs):
+    """
+    Factor that puts chunk on the scale of series, from the days they share
+
+    The ratio of sums over days where both sides are non-zero: days Google
+    rounded down to 0 on either side carry no scale information.
+
+    Args:
+        series: Stitched series so far ({'values': {keyword: [...]}})
+        chunk: Next chunk
+        pairs: (series row, chunk row) of every shared day
+
+    Returns:
+        Scale factor, or None when the overlap has no non-zero days
+    """
+    reference = scaled = 0.0
+    for keyword, values in chunk['values'].items():
+        known = series['values'][keyword]
+        for i, j in pairs:
+            if known[i] > 0 and values[j] > 0:
+                reference += known[i]
+                scaled += values[j]
+    return reference / scaled if scaled else None
+
+
+def stitch(chunks, keywords):
+    """
+    Chain chunks (in date order) into one series with a common scale, peak 100
+
+    Shared days keep the earlier chunk's (rescaled) values; each later chunk
+    contributes only the days after them. When an overlap has no non-zero days
+    the chunk cannot be anchored and is kept at the previous chunk's scale
+    (flagged in 'joins').
+
+    Returns:
+        {'dates', 'values': {keyword: [...]}, 'keywords', 'joins': [{'start', 'overlap_days', 'scale', 'anchored'}]}
+    """
+    series = {'dates': [], 'values': {keyword: [] for keyword in keywords}, 'keywords': list(keywords),
+              'joins': []}
+    scale = 1.0
+    for chunk in chunks:
+        if not chunk['dates']:
+            continue
+        rows = {date: i for i, date in enumerate(series['dates'])}
+        pairs = [(rows[date], j) for j, date in enumerate(chunk['dates']) if date in rows]
+        if series['dates']:
+            estimate = overlap_scale(series, chunk, pairs)
+            series['joins'].append({
+                'start': chunk['dates'][0],
+                'overlap_days': len(pairs),
+                'scale': round(estimate if estimate is not None else scale, 6),
+                'anchored': estimate is not None
+            })
+            if estimate is not None:
+                scale = estimate
+
+        last = series['dates'][-1] if series['dates'] else ''
+        for j, date in enumerate(chunk['dates']):
+            if date <= last:
+                continue
+            series['dates'].append(date)
+            for keyword in keywords:
+                values = chunk['values'].get(keyword)
+                series['values'][keyword].append(values[j] * scale if values else 0.0)
+
+    peak = max((max(values) for values in series['values'].values() if values), default=0)
+    if peak:
+        for keyword, values in series['values'].items():
+            series['values'][keyword] = [round(value * 100.0 / peak, 2) for value in values]
+    return series
+
+
+def collect_stitched(start_date, end_date, keywords=BACKTEST_KEYWORDS, states=US_STATES,
+                     overlap_days=STITCH_OVERLAP_DAYS, cache_dir=CACHE_DIR, pause_seconds=2):
+    """
+    Fetch (or load from cache) every chunk and stitch one series per state and keyword batch
+
+    A chunk that fails to download leaves a gap the next chunk cannot be
+    anchored across; the chunk is skipped and reported in stats['failed'].
+
+    Returns:
+        (stitched, stats) tuple; stitched maps state name -> list of stitched
+        series (one per keyword batch), stats counts requests, cache hits,
+        failures and unanchored joins
+    """
+    chunks = plan_chunks(start_date, end_date, overlap_days)
+    batches = keyword_batches(keywords)
+    print(f"📊 Loading {start_date} to {end_date} for {len(states)} states: "
+          f"{len(chunks)} chunks x {len(batches)} keyword batches per state ({overlap_days}-day overlaps)")
+
+    stitched = {}
+    stats = {'requests': 0, 'cached': 0, 'failed': 0, 'unanchored': 0}
+    for state_name, state_code in states.items():
+        print(f"   {state_name}...", end=' ')
+        state_series = []
+        failed = 0
+        for keyword_batch in batches:
+            batch_chunks = []
+            for chunk_start, chunk_end in chunks:
+                try:
+                    chunk, fetched = fetch_chunk(state_code, keyword_batch, chunk_start, chunk_end, cache_dir)
+                except Exception as e:
+                    print(f"\n      ⚠️ {chunk_start} to {chunk_end}: {e}", end=' ')
+                    stats['failed'] += 1
+                    failed += 1
+                    time.sleep(5)
+                    continue
+                if fetched:
+                    stats['requests'] += 1
+                    time.sleep(pause_seconds)  # Rate limiting between requests
+                else:
+                    stats['cached'] += 1
+                batch_chunks.append(chunk)
+            series = stitch(batch_chunks, keyword_batch)
+            stats['unanchored'] += sum(1 for join in series['joins'] if not join['anchored'])
+            state_series.append(series)
+        stitched[state_name] = state_series
+        print("✗" if failed else "✓")
+
+    print(f"   ✅ {stats['requests']} requests, {stats['cached']} cached, {stats['failed']} failed, "
+          f"{stats['unanchored']} unanchored joins")
+    return stitched, stats
+
+
+def main():
+    start_date = sys.argv[1] if len(sys.argv) > 1 else '2020-01-01'
+    end_date = sys.argv[2] if len(sys.argv) > 2 else '2024-12-31'
+    codes = set(sys.argv[3:])
+    states = {name: code for name, code in US_STATES.items() if not codes or code in codes}
+
+    print("=" * 60)
+    print("PANIC ATLAS - Trends Stitcher")
+    print("=" * 60)
+
+    stitched, stats = collect_stitched(start_date, end_date, states=states)
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, 'w') as f:
+        json.dump({
+            'range': {'start_date': start_date, 'end_date': end_date},
+            'keywords': BACKTEST_KEYWORDS,
+            'fetch': stats,
+            'states': stitched
+        }, f)
+    print(f"💾 Stitched series saved to: {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Walk-Forward Backtest for Panic Atlas
+Scores the panic signature for every day of a multi-year range from one long
+Google Trends fetch per state and keyword batch, instead of one fetch per event window
+
+The range is fetched and stitched into one consistently scaled daily series per
+state and keyword batch by trends_stitcher (cached, so reruns make no requests).
+Each window's keyword values are then rebuilt locally: the window's slice of
+the series is rescaled so its peak is 100, as Google scales a request for that
+window alone, and fed through the same panic score, summary and
+EventAnalyzer.check_panic_signature as the per-event backtest.
+
+Usage:
+    python walk_forward_backtest.py [START_DATE] [END_DATE]
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from backtest_data_collector import BACKTEST_KEYWORDS, EVENTS, US_STATES, calculate_panic_scores, summarize_panic
+from event_analyzer import EventAnalyzer
+from trends_stitcher import CACHE_DIR, STITCH_OVERLAP_DAYS, collect_stitched
+
+OUTPUT_FILE = 'backtest_data/walk_forward.json'
+
+
+def _date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+class _SeriesIndex:
+    """A stitched series as a (days x keywords) array with a date -> row lookup"""
+
+    def __init__(self, series):
+        import numpy as np
+
+        self.keywords = series['keywords']
+        self.rows = {date: i for i, date in enumerate(series['dates'])}
+        self.values = np.array([series['values'][keyword] for keyword in self.keywords], dtype=float).T
+
+    def window(self, start_date, end_date):
+        """Keyword values a request for [start_date, end_date] would return (None if not covered)"""
+        import numpy as np
+
+        if start_date not in self.rows or end_date not in self.rows:
+            return None
+        rows = self.values[self.rows[start_date]:self.rows[end_date] + 1]
+        peak = rows.max() if len(rows) else 0
+        if not peak:
+            return {keyword: 0 for keyword in self.keywords}
+        rescaled = np.round(rows * (100.0 / peak)).mean(axis=0)
+        return {keyword: int(value) for keyword, value in zip(self.keywords, rescaled)}
+
+
+def window_keyword_data(indexed_history, start_date, end_date):
+    """
+    Per-state keyword values for one window, in collect_historical_data_by_state's shape
+
+    Batches whose series does not cover the window get zeros, like a failed request.
+    """
+    keyword_data = {}
+    for state_name, batches in indexed_history.items():
+        state_keywords = {}
+        for series in batches:
+            values = series.window(start_date, end_date)
+            state_keywords.update(values if values is not None else {keyword: 0 for keyword in series.keywords})
+        keyword_data[state_name] = state_keywords
+    return keyword_data
+
+
+def walk_forward(start_date, end_date, days_before=7, keywords=BACKTEST_KEYWORDS, states=US_STATES,
+                 cache_dir=CACHE_DIR, pause_seconds=2, events=EVENTS, output_file=OUTPUT_FILE,
+                 overlap_days=STITCH_OVERLAP_DAYS):
+    """
+    Run the panic signature check for every window end date in the range
+
+    Args:
+        start_date, end_date: Range to fetch (YYYY-MM-DD); the first window ends
+                              days_before days after start_date
+        days_before: Window length before each end date, as in collect_event_data
+        keywords: Search terms (split into batches of 5)
+        states: State name -> geo code
+        cache_dir: Where fetched chunks are cached
+        pause_seconds: Pause after each uncached request
+        events: Events to report detection for ({'name', 'date'})
+        output_file: Where the results are written (None = don't save)
+        overlap_days: Days shared by consecutive fetched chunks (see trends_stitcher)
+
+    Returns:
+        Results dictionary with one entry per day, per-event detection and totals
+    """
+    stitched, fetch_stats = collect_stitched(start_date, end_date, keywords, states, overlap_days,
+                                             cache_dir, pause_seconds)
+    indexed = {state: [_SeriesIndex(series) for series in batches] for state, batches in stitched.items()}
+    analyzer = EventAnalyzer()
+
+    print(f"\n🔁 Scoring daily windows ({days_before} days each)...")
+    started = time.monotonic()
+    days = []
+    window_end = _date(start_date) + timedelta(days=days_before)
+    while window_end <= _date(end_date):
+        end = window_end.strftime('%Y-%m-%d')
+        start = (window_end - timedelta(days=days_before)).strftime('%Y-%m-%d')
+        summary = summarize_panic(calculate_panic_scores(window_keyword_data(indexed, start, end)),
+                                  analyzer.panic_threshold)
+        signature = analyzer.check_panic_signature({'summary': summary})
+        days.append({
+            'date': end,
+            'signature_detected': signature['signature_detected'],
+            'signal_strength': signature['signal_strength'],
+            'criteria_met': signature['criteria_met'],
+            'states_above_threshold': summary['states_above_threshold'],
+            'total_regions_affected': summary['total_regions_affected'],
+            'top_states': summary['top_10_states'][:3]
+        })
+        window_end += timedelta(days=1)
+    print(f"   ✅ {len(days)} windows scored in {time.monotonic() - started:.1f}s")
+
+    by_date = {day['date']: day for day in days}
+    event_results = []
+    event_days = set()
+    for event in events:
+        event_dt = _date(event['date'])
+        lead = [(event_dt - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days_before, -1, -1)]
+        event_days.update(lead)
+        if event['date'] not in by_date:
+            continue
+        first_signal = next((date for date in lead if by_date.get(date, {}).get('signature_detected')), None)
+        event_results.append({
+            'event_name': event['name'],
+            'event_date': event['date'],
+            'signature_detected': by_date[event['date']]['signature_detected'],
+            'signal_strength': by_date[event['date']]['signal_strength'],
+            'first_signal': first_signal
+        })
+
+    signal_days = [day['date'] for day in days if day['signature_detected']]
+    detected = sum(1 for result in event_results if result['first_signal'])
+    results = {
+        'analysis_date': datetime.now().isoformat(),
+        'range': {'start_date': start_date, 'end_date': end_date, 'days_before': days_before},
+        'keywords': keywords,
+        'fetch': fetch_stats,
+        'totals': {
+            'windows': len(days),
+            'signal_days': len(signal_days),
+            'signal_days_outside_events': sum(1 for date in signal_days if date not in event_days),
+            'events_in_range': len(event_results),
+            'events_detected': detected,
+            'event_detection_rate': round(detected / len(event_results) * 100, 1) if event_results else None
+        },
+        'events': event_results,
+        'days': days
+    }
+
+    if output_file:
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        with open(output_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to: {output_file}")
+    return results
+
+
+def main():
+    start_date = sys.argv[1] if len(sys.argv) > 1 else '2020-01-01'
+    end_date = sys.argv[2] if len(sys.argv) > 2 else '2024-12-31'
+
+    print("\n" + "=" * 70)
+    print("PANIC ATLAS - WALK-FORWARD BACKTEST")
+    print("=" * 70)
+
+    results = walk_forward(start_date, end_date)
+    totals = results['totals']
+    print(f"\n📊 {totals['signal_days']}/{totals['windows']} days with the signature "
+          f"({totals['signal_days_outside_events']} outside any event window)")
+    for event in results['events']:
+        mark = '✓' if event['first_signal'] else '✗'
+        print(f"   {mark} {event['event_name']:28} {event['event_date']}  first signal: {event['first_signal']}")
+    if totals['event_detection_rate'] is not None:
+        print(f"\n🎯 Event detection rate: {totals['event_detection_rate']}%")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()